@@ -172,6 +172,53 @@ def create_admin_router(global_config):
                         detail="Failed to update frontend settings"
                     )
             
+            elif command == 'stats':
+                # Return runtime cache statistics
+                from services.message_services.compact_conversion_cache import get_compact_conversion_cache
+                from services.message_services.compact_conversion_stage import get_compact_conversion_stage
+                from services.message_services.html_parse_pool import get_html_parse_pool
+                from services.message_services.chat_card_translation_cache import get_current_cache
+                from services.system_services.service_factory import get_ai_session_manager, get_websocket_manager
+                from services.ai_services.tokenizer_service import get_tokenizer_service
+                from services.ai_services.prompt_cache import get_prompt_cache_stats
+                from shared.utils.prompt_encoder import get_prompt_encoder
+                from shared.core.unified_message_processor import get_unified_processor
+                from services.message_services.websocket_message_collector import get_websocket_message_collector
+                
+                return {
+                    'status': 'success',
+                    'command': 'stats',
+                    'timestamp': datetime.now().isoformat(),
+                    'compact_conversion_cache': get_compact_conversion_cache().get_stats(),
+                    'compact_conversion_stage': get_compact_conversion_stage().get_stats(),
+                    'html_parse_pool': get_html_parse_pool().get_stats(),
+                    'translation_cache': get_current_cache().get_cache_stats(),
+                    'ai_sessions': get_ai_session_manager().get_stats(),
+                    'tokenizer': get_tokenizer_service().get_stats(),
+                    'prompt_encoder': get_prompt_encoder().get_stats(),
+                    'prompt_cache': dict(
+                        get_prompt_cache_stats().get_stats(),
+                        system_prompt_memo=get_unified_processor().get_system_prompt_cache_stats()
+                    ),
+                    'rpc': get_websocket_manager().rpc_registry.get_stats(),
+                    'send_queues': get_websocket_manager().get_send_queue_stats(),
+                    'tasks': get_websocket_manager().task_supervisor.get_stats(),
+                    'message_ingest': get_websocket_message_collector().get_all_stats().get('ingest_by_client', {})
+                }
+            
+            elif command == 'tasks':
+                # Return the live background task table
+                from services.system_services.service_factory import get_websocket_manager
+                
+                task_supervisor = get_websocket_manager().task_supervisor
+                return {
+                    'status': 'success',
+                    'command': 'tasks',
+                    'timestamp': datetime.now().isoformat(),
+                    'tasks': task_supervisor.get_task_table(),
+                    'stats': task_supervisor.get_stats()
+                }
+            
             elif command == 'start_test_session':
                 # Start a test session for a client
                 return await handle_start_test_session(request_data, logger)
@@ -200,7 +247,7 @@ def create_admin_router(global_config):
                 raise HTTPException(
                     status_code=400,
                     detail=f"Unknown admin command: {command}",
-                    headers={"X-Supported-Commands": "status, reload_keys, set_admin_password, update_settings, start_test_session, test_command, end_test_session, list_test_sessions, get_test_session_state, execute_test_commands"}
+                    headers={"X-Supported-Commands": "status, reload_keys, set_admin_password, update_settings, stats, tasks, start_test_session, test_command, end_test_session, list_test_sessions, get_test_session_state, execute_test_commands"}
                 )
             
         except HTTPException:
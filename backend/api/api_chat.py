@@ -17,11 +17,15 @@ from datetime import datetime
 from shared.utils.log_utils import truncate_for_log
 
 from shared.core.unified_message_processor import get_unified_processor
+from shared.utils.prompt_encoder import encode_for_prompt
 from services.system_services.universal_settings import extract_universal_settings, get_provider_config
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Upper bound (seconds) on waiting for in-flight chat message/roll ingestion before collecting
+INGEST_WAIT_TIMEOUT = 1.0
+
 # Create router (prefix added in server.py for consistency)
 router = APIRouter(tags=["api_chat"])
 
@@ -385,11 +389,22 @@ async def process_with_function_calling_or_standard(
             # Determine first turn status
             is_first_turn = not get_ai_session_manager().is_first_turn_complete(session_id)
             
-            initial_messages = build_initial_messages_with_delta(
-                universal_settings=universal_settings,
-                system_prompt=system_prompt,
-                is_first_turn=is_first_turn
-            )
+            if provider_config.get('prompt_caching'):
+                # Keep the system prompt identical between turns; the combat status travels with the turn
+                static_prompt, combat_status = unified_processor.split_system_prompt(system_prompt, compact_messages)
+                initial_messages = build_initial_messages_with_delta(
+                    universal_settings=universal_settings,
+                    system_prompt=static_prompt,
+                    is_first_turn=is_first_turn,
+                    cache_layout=True,
+                    dynamic_context=combat_status
+                )
+            else:
+                initial_messages = build_initial_messages_with_delta(
+                    universal_settings=universal_settings,
+                    system_prompt=system_prompt,
+                    is_first_turn=is_first_turn
+                )
             
             # Debug logging: Show complete initial_messages array (everything sent to AI)
             # Decode escape sequences in content strings for better readability
@@ -399,7 +414,7 @@ async def process_with_function_calling_or_standard(
             logger.info(f"===== END SENDING INITIAL MESSAGES =====")
         else:
             # STANDARD MODE: System prompt + chat context
-            compact_json_context = json.dumps(compact_messages, indent=2)
+            compact_json_context = encode_for_prompt(compact_messages, 'chat_context', provider_config.get('model'))
             initial_messages = [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": f"Chat Context (Compact JSON Format):\n{compact_json_context}"}
@@ -542,8 +557,14 @@ async def collect_chat_messages(count: int, client_id: str) -> List[Dict[str, An
     
     logger.info(f"Collecting {count} messages for client {client_id} via WebSocket message collector")
     
-    # Small delay to allow any recent messages to be processed
-    await asyncio.sleep(0.1)
+    # Let chat messages and rolls already received from this client finish ingesting
+    try:
+        from services.system_services.service_factory import get_websocket_manager
+        await get_websocket_manager().task_supervisor.wait_for_tasks(
+            client_id, ("chat_message", "dice_roll"), timeout=INGEST_WAIT_TIMEOUT
+        )
+    except Exception as e:
+        logger.debug(f"Could not wait for message ingestion for client {client_id}: {e}")
     
     # Get combined messages and rolls from WebSocket message collector
     message_collector = get_message_collector()
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Repositories for The Gold Box
+Storage backends for persistent server state
+"""
+
+from .session_repository import SessionRepository, SQLiteSessionRepository, create_session_repository
+
+__all__ = [
+    'SessionRepository',
+    'SQLiteSessionRepository',
+    'create_session_repository'
+]
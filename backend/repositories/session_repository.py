@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Session Repository for The Gold Box
+Storage backends for AI sessions and their conversation history
+
+Backends:
+- SessionRepository: in-memory only (no persistence, history lives in the session manager)
+- SQLiteSessionRepository: persists sessions and history to SQLite (WAL), writes batched
+  on a background thread so callers on the event loop never block on disk; reads
+  use their own connection and see queued message writes from memory
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Get absolute path to backend directory
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+
+DEFAULT_DB_FILE = 'shared/server_files/ai_sessions.db'
+
+# Session fields that survive a restart (paused conversations are transient)
+PERSISTED_SESSION_FIELDS = (
+    'client_id', 'provider', 'model', 'created_at', 'last_activity',
+    'last_message_timestamp', 'has_first_turn_complete'
+)
+
+def get_absolute_path(relative_path: str) -> Path:
+    """
+    Convert a relative path to an absolute path based on backend directory.
+    This ensures consistent file operations regardless of where script is called from.
+    """
+    return (BACKEND_DIR / relative_path).resolve()
+
+class SessionRepository:
+    """
+    In-memory session storage (no persistence)
+    
+    Defines the storage interface used by AISessionManager. With this backend
+    the manager keeps the complete history in memory, exactly as before.
+    """
+    
+    # Whether older history can be dropped from memory and paged back in
+    persistent = False
+    
+    def load_sessions(self, active_since: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Load sessions active since a given time
+        
+        Args:
+            active_since: Unix time; older sessions are ignored
+        
+        Returns:
+            Dictionary mapping session_id to session fields plus 'history_next_seq'
+        """
+        return {}
+    
+    def save_session(self, session_id: str, session_data: Dict[str, Any]):
+        """Insert or update a session's persisted fields"""
+        pass
+    
+    def delete_session(self, session_id: str):
+        """Delete a session and its history"""
+        pass
+    
+    def delete_expired_sessions(self, cutoff_time: float):
+        """Delete sessions inactive since before cutoff_time"""
+        pass
+    
+    def append_message(self, session_id: str, seq: int, message: Dict[str, Any]):
+        """Append a message with its per-session sequence number"""
+        pass
+    
+    def load_messages(self, session_id: str, before_seq: Optional[int] = None,
+                      limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Load the newest messages older than before_seq
+        
+        Args:
+            session_id: Session identifier
+            before_seq: Only messages with a lower sequence number (None for all)
+            limit: Maximum number of messages (None for no limit)
+        
+        Returns:
+            List of (seq, message) tuples, oldest first
+        """
+        return []
+    
+    def load_last_message_with_role(self, session_id: str, role: str,
+                                    before_seq: Optional[int] = None) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Load the newest message with the given role older than before_seq"""
+        return None
+    
+    def clear_messages(self, session_id: str):
+        """Delete all history for a session"""
+        pass
+    
+    def delete_messages_before(self, session_id: str, cutoff_time: float):
+        """Delete timestamped messages older than cutoff_time"""
+        pass
+    
+    def flush(self):
+        """Write any queued changes"""
+        pass
+    
+    def close(self):
+        """Flush and release resources"""
+        pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get storage statistics"""
+        return {'backend': 'memory', 'persistent': False}
+
+class SQLiteSessionRepository(SessionRepository):
+    """
+    SQLite-backed session storage
+    
+    Writes are queued in order and applied in one transaction per batch by a
+    background thread; a batch that fails to commit is queued again. Reads never
+    wait for the writer: they use a separate connection (WAL readers do not
+    block on the writer) and apply the queued and in-flight message writes of
+    the session on top of what is on disk.
+    """
+    
+    persistent = True
+    
+    FLUSH_INTERVAL_SECONDS = 0.5
+    FLUSH_BATCH_SIZE = 200
+    
+    def __init__(self, db_file: str = DEFAULT_DB_FILE, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        """
+        Initialize SQLite session repository
+        
+        Args:
+            db_file: Database path relative to the backend directory (or absolute)
+            flush_interval: Maximum seconds between background flushes
+        """
+        self.db_file = get_absolute_path(db_file)
+        self.flush_interval = flush_interval
+        
+        # Ordered write queue of (sql, params, message op); the op replays the write
+        # for reads (see _apply_pending), None for writes reads do not need
+        self._pending: List[Tuple[str, tuple, Optional[tuple]]] = []
+        # Batch being committed by flush()
+        self._inflight: List[Tuple[str, tuple, Optional[tuple]]] = []
+        # Guards the queues and the read connection; never held while committing
+        self._lock = threading.Lock()
+        # Serializes flushes on the write connection
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        
+        # Statistics
+        self.writes_flushed = 0
+        self.flush_failures = 0
+        self.pages_loaded = 0
+        
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                client_id TEXT,
+                provider TEXT,
+                model TEXT,
+                created_at REAL,
+                last_activity REAL NOT NULL,
+                last_message_timestamp INTEGER,
+                has_first_turn_complete INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity);
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role TEXT,
+                timestamp REAL,
+                body TEXT NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            );
+        """)
+        self._db.commit()
+        self._reader = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        
+        self._writer = threading.Thread(target=self._write_loop, name="session-repository-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        
+        logger.info(f"SQLiteSessionRepository initialized at {self.db_file}")
+    
+    def load_sessions(self, active_since: float) -> Dict[str, Dict[str, Any]]:
+        # Called at startup, before any caller runs on the event loop
+        self.flush()
+        rows = self._read(lambda db, ops: db.execute(
+            """
+            SELECT s.session_id, s.client_id, s.provider, s.model, s.created_at, s.last_activity,
+                   s.last_message_timestamp, s.has_first_turn_complete,
+                   (SELECT MAX(m.seq) FROM messages m WHERE m.session_id = s.session_id)
+            FROM sessions s WHERE s.last_activity >= ?
+            """,
+            (active_since,)
+        ).fetchall())
+        
+        sessions = {}
+        for row in rows:
+            session_id, client_id, provider, model, created_at, last_activity, last_ts, first_turn, max_seq = row
+            sessions[session_id] = {
+                'client_id': client_id,
+                'provider': provider,
+                'model': model,
+                'created_at': created_at,
+                'last_activity': last_activity,
+                'last_message_timestamp': last_ts,
+                'has_first_turn_complete': bool(first_turn),
+                'history_next_seq': (max_seq + 1) if max_seq is not None else 0
+            }
+        return sessions
+    
+    def save_session(self, session_id: str, session_data: Dict[str, Any]):
+        self._enqueue(
+            """
+            INSERT INTO sessions (session_id, client_id, provider, model, created_at, last_activity,
+                                  last_message_timestamp, has_first_turn_complete)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                last_activity = excluded.last_activity,
+                last_message_timestamp = excluded.last_message_timestamp,
+                has_first_turn_complete = excluded.has_first_turn_complete
+            """,
+            (session_id,) + tuple(
+                int(bool(session_data.get(name))) if name == 'has_first_turn_complete' else session_data.get(name)
+                for name in PERSISTED_SESSION_FIELDS
+            )
+        )
+    
+    def delete_session(self, session_id: str):
+        self._enqueue("DELETE FROM messages WHERE session_id = ?", (session_id,), ('clear', session_id))
+        self._enqueue("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+    
+    def delete_expired_sessions(self, cutoff_time: float):
+        # Sessions still being read are active in memory, so reads need no op for this
+        self._enqueue(
+            "DELETE FROM messages WHERE session_id IN (SELECT session_id FROM sessions WHERE last_activity < ?)",
+            (cutoff_time,)
+        )
+        self._enqueue("DELETE FROM sessions WHERE last_activity < ?", (cutoff_time,))
+    
+    def append_message(self, session_id: str, seq: int, message: Dict[str, Any]):
+        # Serialize now so later mutation of the dict cannot race the writer
+        role, timestamp, body = message.get('role'), message.get('timestamp'), json.dumps(message, default=str)
+        self._enqueue(
+            "INSERT OR REPLACE INTO messages (session_id, seq, role, timestamp, body) VALUES (?, ?, ?, ?, ?)",
+            (session_id, seq, role, timestamp, body),
+            ('put', session_id, seq, role, timestamp, body)
+        )
+    
+    def load_messages(self, session_id: str, before_seq: Optional[int] = None,
+                      limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        def query(db: sqlite3.Connection, ops: List[tuple]) -> List[Tuple[int, str]]:
+            # Queued deletes can remove rows of a limited page, so read the whole range then
+            has_deletes = any(op[0] != 'put' for op in ops)
+            rows = self._select_messages(db, session_id, before_seq, None, None if has_deletes else limit)
+            self._apply_pending(rows, ops)
+            seqs = sorted((seq for seq in rows if before_seq is None or seq < before_seq), reverse=True)
+            if limit is not None:
+                seqs = seqs[:limit]
+            return [(seq, rows[seq][2]) for seq in reversed(seqs)]
+        
+        rows = self._read(query, session_id)
+        self.pages_loaded += 1
+        return [(seq, json.loads(body)) for seq, body in rows]
+    
+    def load_last_message_with_role(self, session_id: str, role: str,
+                                    before_seq: Optional[int] = None) -> Optional[Tuple[int, Dict[str, Any]]]:
+        def query(db: sqlite3.Connection, ops: List[tuple]) -> Optional[Tuple[int, str]]:
+            # Any queued write can change which row is newest, so read all candidates then
+            rows = self._select_messages(db, session_id, before_seq, role, None if ops else 1)
+            self._apply_pending(rows, ops)
+            seqs = [seq for seq, (row_role, _, _) in rows.items()
+                    if row_role == role and (before_seq is None or seq < before_seq)]
+            return (max(seqs), rows[max(seqs)][2]) if seqs else None
+        
+        row = self._read(query, session_id)
+        return (row[0], json.loads(row[1])) if row else None
+    
+    def clear_messages(self, session_id: str):
+        self._enqueue("DELETE FROM messages WHERE session_id = ?", (session_id,), ('clear', session_id))
+    
+    def delete_messages_before(self, session_id: str, cutoff_time: float):
+        self._enqueue(
+            "DELETE FROM messages WHERE session_id = ? AND timestamp IS NOT NULL AND timestamp < ?",
+            (session_id, cutoff_time),
+            ('delete_before', session_id, cutoff_time)
+        )
+    
+    def flush(self):
+        # One flush at a time, so there is at most one in-flight batch
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._inflight = batch
+            
+            if not batch:
+                return
+            if self._db is None:
+                with self._lock:
+                    self._pending = batch + self._pending
+                    self._inflight = []
+                return
+            
+            try:
+                with self._db:
+                    for sql, params, _ in batch:
+                        self._db.execute(sql, params)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write AI sessions to {self.db_file}: {e}")
+                self.flush_failures += 1
+                # Keep the batch for the next flush rather than losing history
+                with self._lock:
+                    self._pending = batch + self._pending
+                    self._inflight = []
+                return
+            
+            with self._lock:
+                self._inflight = []
+            self.writes_flushed += len(batch)
+    
+    def close(self):
+        if self._stopped.is_set():
+            return
+        
+        self._stopped.set()
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
+        
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            queued = len(self._pending)
+        
+        return {
+            'backend': 'sqlite',
+            'persistent': True,
+            'db_file': str(self.db_file),
+            'queued_writes': queued,
+            'writes_flushed': self.writes_flushed,
+            'flush_failures': self.flush_failures,
+            'pages_loaded': self.pages_loaded
+        }
+    
+    def _enqueue(self, sql: str, params: tuple, op: Optional[tuple] = None):
+        """Queue a write for the background thread (op: how reads replay it, see _apply_pending)"""
+        with self._lock:
+            self._pending.append((sql, params, op))
+            flush_now = len(self._pending) >= self.FLUSH_BATCH_SIZE
+        
+        if self._stopped.is_set():
+            self.flush()
+        elif flush_now:
+            self._wake.set()
+    
+    def _read(self, query: Callable[[sqlite3.Connection, List[tuple]], Any], session_id: Optional[str] = None) -> Any:
+        """
+        Run a query on the read connection without waiting for the writer
+        
+        Args:
+            query: Called with the read connection and the session's queued and
+                in-flight message ops, oldest first
+            session_id: Session whose ops are passed (None passes none)
+        
+        Returns:
+            Query result
+        """
+        # Holding the queue lock keeps later writes from being committed while the
+        # query reads; the in-flight batch may or may not be on disk yet, which is
+        # fine because replaying its ops on top of it gives the same rows.
+        with self._lock:
+            if self._reader is None:
+                raise RuntimeError("Session repository is closed")
+            ops = [op for _, _, op in self._inflight + self._pending
+                   if op is not None and op[1] == session_id] if session_id is not None else []
+            return query(self._reader, ops)
+    
+    @staticmethod
+    def _select_messages(db: sqlite3.Connection, session_id: str, before_seq: Optional[int],
+                         role: Optional[str], limit: Optional[int]) -> Dict[int, Tuple[Optional[str], Any, str]]:
+        """Read stored messages, newest first, as {seq: (role, timestamp, body)}"""
+        sql = "SELECT seq, role, timestamp, body FROM messages WHERE session_id = ?"
+        params: tuple = (session_id,)
+        if role is not None:
+            sql += " AND role = ?"
+            params += (role,)
+        if before_seq is not None:
+            sql += " AND seq < ?"
+            params += (before_seq,)
+        sql += " ORDER BY seq DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return {seq: (row_role, timestamp, body) for seq, row_role, timestamp, body in db.execute(sql, params)}
+    
+    @staticmethod
+    def _apply_pending(rows: Dict[int, Tuple[Optional[str], Any, str]], ops: List[tuple]):
+        """Replay queued message writes on rows read from disk"""
+        for op in ops:
+            if op[0] == 'put':
+                _, _, seq, role, timestamp, body = op
+                rows[seq] = (role, timestamp, body)
+            elif op[0] == 'clear':
+                rows.clear()
+            elif op[0] == 'delete_before':
+                # Same rows as the SQL: text timestamps sort after numbers in SQLite
+                cutoff_time = op[2]
+                for seq in [seq for seq, (_, timestamp, _) in rows.items()
+                            if isinstance(timestamp, (int, float)) and timestamp < cutoff_time]:
+                    del rows[seq]
+    
+    def _write_loop(self):
+        """Background thread: apply queued writes on size or interval"""
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+def create_session_repository(backend: str = 'sqlite', **kwargs) -> SessionRepository:
+    """
+    Create a session storage backend
+    
+    Args:
+        backend: 'sqlite' or 'memory'
+        **kwargs: Backend-specific options (e.g. db_file for sqlite)
+    
+    Returns:
+        SessionRepository instance
+    
+    Raises:
+        ValueError: If backend is unknown
+    """
+    if backend == 'sqlite':
+        return SQLiteSessionRepository(**kwargs)
+    if backend == 'memory':
+        return SessionRepository()
+    raise ValueError(f"Unknown session repository backend: {backend}")
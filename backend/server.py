@@ -74,7 +74,7 @@ from shared.security.security import (
     verify_dependency_integrity, validate_prompt, get_session_id_from_request
 )
 from services.system_services.universal_settings import extract_universal_settings, get_provider_config, UniversalSettings
-from services.message_services.message_collector import add_client_message, add_client_roll
+from services.message_services.websocket_message_collector import add_client_message, add_client_roll
 
 # Pydantic models for FastAPI request/response validation
 class PromptRequest(BaseModel):
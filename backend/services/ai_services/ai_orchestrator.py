@@ -4,13 +4,21 @@ AI Orchestrator for The Gold Box
 Manages function calling workflow - coordinates between AI service and tool execution
 """
 
+import asyncio
 import logging
 import json
+import os
 import time
+import uuid
 from typing import Dict, Any, Optional, List
 
+from shared.utils.prompt_encoder import encode_for_prompt
+
 logger = logging.getLogger(__name__)
 
+# Upper bound (seconds) on waiting for the frontend's world state at the start of a first turn
+WORLD_STATE_REFRESH_TIMEOUT = float(os.environ.get('WORLD_STATE_REFRESH_TIMEOUT', 5.0))
+
 class AIOrchestrator:
     """
     Orchestrates function calling workflow
@@ -51,6 +59,118 @@ class AIOrchestrator:
             self._tool_executor = get_ai_tool_executor()
         return self._tool_executor
     
+    def _create_chunk_forwarder(self, config: Dict[str, Any], client_id: str, session_id: str):
+        """
+        Create a forwarder for partial AI text when streaming is enabled
+        
+        Args:
+            config: Provider configuration (streaming enabled via config['stream'])
+            client_id: Client ID to forward chat_response_chunk frames to
+            session_id: Session ID echoed back in each chunk
+        
+        Returns:
+            ChatResponseChunkForwarder, or None when streaming is disabled
+        """
+        if not config.get('stream') or not client_id:
+            return None
+        
+        from .ai_service import ChatResponseChunkForwarder
+        return ChatResponseChunkForwarder(client_id, session_id)
+    
+    async def _execute_tool_calls(
+        self,
+        tool_calls: List[Any],
+        conversation: List[Dict[str, Any]],
+        session_id: str,
+        client_id: str
+    ) -> None:
+        """
+        Execute one assistant turn's tool calls and record their results
+        
+        Read-only tools are run concurrently by the tool executor; mutating tools
+        keep their order. Results are appended in the original tool_call order so
+        every tool_call_id is answered exactly as the AI issued them.
+        
+        Args:
+            tool_calls: Tool calls from the AI response (OpenAI format)
+            conversation: In-memory conversation to append tool results to
+            session_id: Session ID for conversation history storage
+            client_id: Client ID for message collection (transient, from WebSocket)
+        """
+        from ..ai_services.ai_session_manager import get_ai_session_manager
+        
+        ai_session_manager = get_ai_session_manager()
+        tool_executor = self._get_tool_executor()
+        
+        # Execute tools with explicit client_id
+        tool_results = await tool_executor.execute_tool_calls(
+            [(tc.function.name, json.loads(tc.function.arguments)) for tc in tool_calls],
+            client_id
+        )
+        
+        for tool_call, tool_result in zip(tool_calls, tool_results):
+            # Build tool result message (OpenAI format)
+            tool_result_message = {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": encode_for_prompt(tool_result, f"tool:{tool_call.function.name}")
+            }
+            
+            # Append to in-memory conversation
+            conversation.append(tool_result_message)
+            
+            # Store in session using existing method
+            ai_session_manager.add_conversation_message(session_id, tool_result_message)
+    
+    async def _refresh_world_state(self, websocket_manager, collector, client_id: str) -> bool:
+        """
+        Request fresh world state from the frontend and wait until it is stored
+        
+        The frontend answers world_state_refresh with a world_state_sync that
+        carries the same request_id. The wait ends as soon as that state is
+        stored, or after WORLD_STATE_REFRESH_TIMEOUT seconds.
+        
+        Args:
+            websocket_manager: WebSocket connection manager
+            collector: WebSocket message collector holding the world state
+            client_id: Client to refresh
+        
+        Returns:
+            True if fresh world state arrived in time
+        """
+        request_id = str(uuid.uuid4())
+        version_before = collector.get_world_state_version(client_id)
+        started = time.monotonic()
+        
+        rpc_registry = websocket_manager.rpc_registry
+        future = rpc_registry.register(client_id, request_id, 'world_state_refresh')
+        try:
+            await websocket_manager.send_to_client(client_id, {
+                "type": "world_state_refresh",
+                "request_id": request_id,
+                "data": {},
+                "timestamp": time.time()
+            })
+            
+            version = await asyncio.wait_for(future, timeout=WORLD_STATE_REFRESH_TIMEOUT)
+            if version <= version_before:
+                logger.warning(f"World state refresh for client {client_id} did not store newer state "
+                               f"(version {version}, had {version_before})")
+                return False
+            
+            logger.info(f"Fresh world state for client {client_id} after {time.monotonic() - started:.3f}s")
+            return True
+            
+        except asyncio.TimeoutError:
+            logger.warning(f"World state refresh for client {client_id} timed out after "
+                           f"{WORLD_STATE_REFRESH_TIMEOUT}s, using stored world state")
+            return False
+        except Exception as e:
+            logger.warning(f"World state refresh for client {client_id} failed: {e}")
+            return False
+        finally:
+            rpc_registry.release(client_id, request_id)
+    
     async def execute_function_call_loop(
         self,
         initial_messages: List[Dict[str, str]],
@@ -94,16 +214,7 @@ class AIOrchestrator:
                 websocket_manager = ServiceRegistry.get('websocket_manager')
                 
                 if websocket_manager:
-                    # Send world state refresh request
-                    await websocket_manager.send_to_client(client_id, {
-                        "type": "world_state_refresh",
-                        "data": {},
-                        "timestamp": time.time()
-                    })
-                    
-                    # Brief pause to allow frontend to respond
-                    import asyncio
-                    await asyncio.sleep(0.5)
+                    await self._refresh_world_state(websocket_manager, collector, client_id)
                     
             except Exception as e:
                 logger.error(f"Error requesting world state refresh: {e}")
@@ -126,7 +237,8 @@ class AIOrchestrator:
             response_data = await ai_service.call_ai_provider(
                 messages=conversation,
                 config=config,
-                tools=tools
+                tools=tools,
+                chunk_forwarder=self._create_chunk_forwarder(config, client_id, session_id)
             )
             
             # Check if AI made tool calls
@@ -156,31 +268,8 @@ class AIOrchestrator:
                 # Store in session using existing method
                 ai_session_manager.add_conversation_message(session_id, assistant_message)
                 
-                # Execute each tool call
-                for tool_call in tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    
-                    # Execute tool with explicit client_id
-                    tool_executor = self._get_tool_executor()
-                    tool_result = await tool_executor.execute_tool(
-                        tool_name, 
-                        tool_args, 
-                        client_id
-                    )
-                    
-                    # Build tool result message (OpenAI format)
-                    tool_result_message = {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result)
-                    }
-                    
-                    # Append to in-memory conversation
-                    conversation.append(tool_result_message)
-                    
-                    # Store in session using existing method
-                    ai_session_manager.add_conversation_message(session_id, tool_result_message)
+                # Execute tool calls (independent reads run concurrently)
+                await self._execute_tool_calls(tool_calls, conversation, session_id, client_id)
                 
                 # Continue loop (AI will see tool results and make next decision)
                 continue
@@ -240,31 +329,8 @@ class AIOrchestrator:
             # Store in session
             ai_session_manager.add_conversation_message(session_id, assistant_message)
             
-            # Execute each tool call
-            for tool_call in tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments)
-                
-                # Execute tool with explicit client_id
-                tool_executor = self._get_tool_executor()
-                tool_result = await tool_executor.execute_tool(
-                    tool_name, 
-                    tool_args, 
-                    client_id
-                )
-                
-                # Build tool result message
-                tool_result_message = {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(tool_result)
-                }
-                
-                # Append to in-memory conversation
-                conversation.append(tool_result_message)
-                
-                # Store in session
-                ai_session_manager.add_conversation_message(session_id, tool_result_message)
+            # Execute tool calls (independent reads run concurrently)
+            await self._execute_tool_calls(tool_calls, conversation, session_id, client_id)
         
         # Store paused state for potential resume
         paused_state = {
@@ -343,7 +409,8 @@ class AIOrchestrator:
             response_data = await ai_service.call_ai_provider(
                 messages=conversation,
                 config=config,
-                tools=tools
+                tools=tools,
+                chunk_forwarder=self._create_chunk_forwarder(config, client_id, session_id)
             )
             
             # Check if AI made tool calls
@@ -373,31 +440,8 @@ class AIOrchestrator:
                 # Store in session using existing method
                 ai_session_manager.add_conversation_message(session_id, assistant_message)
                 
-                # Execute each tool call
-                for tool_call in tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    
-                    # Execute tool with explicit client_id
-                    tool_executor = self._get_tool_executor()
-                    tool_result = await tool_executor.execute_tool(
-                        tool_name, 
-                        tool_args, 
-                        client_id
-                    )
-                    
-                    # Build tool result message (OpenAI format)
-                    tool_result_message = {
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": json.dumps(tool_result)
-                    }
-                    
-                    # Append to in-memory conversation
-                    conversation.append(tool_result_message)
-                    
-                    # Store in session using existing method
-                    ai_session_manager.add_conversation_message(session_id, tool_result_message)
+                # Execute tool calls (independent reads run concurrently)
+                await self._execute_tool_calls(tool_calls, conversation, session_id, client_id)
                 
                 # Continue loop (AI will see tool results and make next decision)
                 continue
@@ -8,6 +8,7 @@ Provides unified interface for both simple_chat and process_chat endpoints
 
 import os
 import time
+import uuid
 import asyncio
 import logging
 import litellm
@@ -15,10 +16,82 @@ from typing import Dict, Any, Optional, List
 from ..system_services.service_factory import get_provider_manager
 from ..system_services.universal_settings import get_provider_config
 from ..message_services.whisper_service import get_whisper_service
+from .prompt_cache import LAYOUT_CACHE, LAYOUT_DEFAULT, add_cache_hints, get_prompt_cache_stats, supports_cache_hints
+from shared.utils.prompt_encoder import encode_for_prompt
 from shared.exceptions import APIKeyException, ProviderException, TimeoutException, ValidationException
 
 logger = logging.getLogger(__name__)
 
+class ChatResponseChunkForwarder:
+    """
+    Forward partial assistant text to a WebSocket client while the AI is streaming
+    
+    Deltas are coalesced so the client receives a handful of chat_response_chunk
+    frames per second rather than one frame per token.
+    """
+    
+    def __init__(self, client_id: str, session_id: Optional[str] = None, min_chars: int = 32, max_interval: float = 0.1):
+        """
+        Initialize chunk forwarder
+        
+        Args:
+            client_id: WebSocket client to forward chunks to
+            session_id: AI session the stream belongs to (echoed back to the client)
+            min_chars: Flush once this many characters are buffered
+            max_interval: Flush once this many seconds passed since the last frame
+        """
+        self.client_id = client_id
+        self.session_id = session_id
+        self.stream_id = str(uuid.uuid4())
+        self.min_chars = min_chars
+        self.max_interval = max_interval
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._last_sent = time.monotonic()
+        self._index = 0
+    
+    async def send(self, text: str):
+        """Buffer a text delta and flush if the size or interval threshold is reached"""
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+        
+        if self._buffered_chars >= self.min_chars or time.monotonic() - self._last_sent >= self.max_interval:
+            await self._flush(done=False)
+    
+    async def finish(self):
+        """Flush remaining text and tell the client the stream has ended"""
+        await self._flush(done=True)
+    
+    async def _flush(self, done: bool):
+        """Send buffered text as one chat_response_chunk frame"""
+        if not self._buffer and not done:
+            return
+        
+        delta = ''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._last_sent = time.monotonic()
+        
+        try:
+            from ..system_services.service_factory import get_websocket_manager
+            from shared.core.message_protocol import MessageProtocol
+            
+            websocket_manager = get_websocket_manager()
+            await websocket_manager.send_to_client(self.client_id, {
+                "type": MessageProtocol.TYPE_CHAT_RESPONSE_CHUNK,
+                "data": {
+                    "session_id": self.session_id,
+                    "stream_id": self.stream_id,
+                    "index": self._index,
+                    "delta": delta,
+                    "done": done
+                }
+            })
+            self._index += 1
+        except Exception as e:
+            # Streaming preview is best-effort - never fail the AI call because of it
+            logger.debug(f"Failed to forward response chunk to client {self.client_id}: {e}")
+
 class AIService:
     """
     Unified AI service for all API calls
@@ -34,7 +107,7 @@ class AIService:
         """
         self.provider_manager = provider_manager
     
-    async def call_ai_provider(self, messages: List[Dict[str, str]], config: Dict[str, Any], tools: Optional[List[Dict]] = None) -> Dict[str, Any]:
+    async def call_ai_provider(self, messages: List[Dict[str, str]], config: Dict[str, Any], tools: Optional[List[Dict]] = None, chunk_forwarder: Optional[ChatResponseChunkForwarder] = None) -> Dict[str, Any]:
         """
         Make AI call using LiteLLM with unified configuration
         
@@ -42,6 +115,7 @@ class AIService:
             messages: List of messages in chat format [{'role': 'system', 'content': '...'}, ...]
             config: Provider configuration from universal settings (pre-validated)
             tools: Optional list of tool definitions in OpenAI format for function calling
+            chunk_forwarder: Optional forwarder for partial text when config['stream'] is enabled
             
         Returns:
             Dictionary with response data and metadata, including tool_calls if present
@@ -111,7 +185,7 @@ class AIService:
                 "api_key": api_key,
                 "temperature": float(config.get('temperature', 0.1)) if config.get('temperature') is not None else 0.1,
                 "max_tokens": int(config.get('max_tokens', 0)) if config.get('max_tokens') is not None else None,  # No limit by default
-                "stream": False  # Stream internally but wait for complete response
+                "stream": bool(config.get('stream', False))  # Streaming forwards partial text, response is still assembled in full
             }
             
             # Add tools if provided (function calling)
@@ -139,6 +213,14 @@ class AIService:
                 completion_params['custom_llm_provider'] = provider_id
                 logger.debug(f"Setting custom_llm_provider={provider_id} for prefixed model support")
             
+            # Prompt caching: static-first layout is built by the caller, add provider cache hints here
+            prompt_layout = LAYOUT_CACHE if config.get('prompt_caching') else LAYOUT_DEFAULT
+            if prompt_layout == LAYOUT_CACHE and supports_cache_hints(model, completion_params.get('custom_llm_provider')):
+                completion_params["messages"], hinted_tools = add_cache_hints(messages, tools)
+                if hinted_tools:
+                    completion_params["tools"] = hinted_tools
+                get_prompt_cache_stats().hinted_requests += 1
+            
             if config.get('headers'):
                 # Set custom headers without forcing OpenAI client
                 # Let LiteLLM auto-detect provider from model name
@@ -148,10 +230,13 @@ class AIService:
             timeout = int(config.get('timeout', 30)) if config.get('timeout') is not None else 30
             
             # Use LiteLLM to call any provider API
-            response = await asyncio.wait_for(
-                litellm.acompletion(**completion_params),
-                timeout=timeout
-            )
+            if completion_params["stream"]:
+                response = await self._consume_stream(completion_params, timeout, chunk_forwarder)
+            else:
+                response = await asyncio.wait_for(
+                    litellm.acompletion(**completion_params),
+                    timeout=timeout
+                )
             
             if response and response.choices:
                 # Provider API responded!
@@ -219,6 +304,9 @@ class AIService:
                 whisper_service = get_whisper_service()
                 thinking = whisper_service.extract_ai_thinking({}, response)
                 
+                # Record prompt tokens served from the provider's prompt cache
+                cached_tokens = get_prompt_cache_stats().record(prompt_layout, getattr(response, 'usage', None))
+                
                 # Extract metadata
                 metadata = {
                     'provider': provider_id,
@@ -226,6 +314,8 @@ class AIService:
                     'model': model,
                     'finish_reason': getattr(choice, 'finish_reason', 'unknown'),
                     'usage': getattr(response, 'usage', None),
+                    'cached_tokens': cached_tokens,
+                    'prompt_layout': prompt_layout,
                     'has_thinking': bool(thinking),
                     'has_tool_calls': bool(tool_calls)
                 }
@@ -252,6 +342,75 @@ class AIService:
             # Wrap unexpected exceptions
             raise ProviderException(f"Provider API failed: {str(e)}")
     
+    async def _consume_stream(self, completion_params: Dict[str, Any], timeout: int, chunk_forwarder: Optional[ChatResponseChunkForwarder] = None):
+        """
+        Consume a streaming LiteLLM completion and rebuild the full response
+        
+        Text deltas are forwarded to the client as they arrive. Tool call deltas are
+        collected chunk by chunk and assembled by LiteLLM's stream_chunk_builder, so
+        the caller receives the same response shape as a non-streaming call.
+        
+        Args:
+            completion_params: LiteLLM completion parameters (with stream=True)
+            timeout: Seconds allowed until the first chunk and between chunks
+            chunk_forwarder: Optional forwarder for partial assistant text
+            
+        Returns:
+            Assembled LiteLLM ModelResponse
+            
+        Raises:
+            asyncio.TimeoutError: When the provider stalls for longer than timeout
+            ProviderException: When the stream ends without any chunks
+        """
+        stream = await asyncio.wait_for(litellm.acompletion(**completion_params), timeout=timeout)
+        stream_iterator = stream.__aiter__()
+        chunks = []
+        
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream_iterator.__anext__(), timeout=timeout)
+                except StopAsyncIteration:
+                    break
+                
+                chunks.append(chunk)
+                
+                # Forward partial assistant text (tool call deltas are only assembled)
+                if chunk_forwarder and chunk.choices:
+                    delta = getattr(chunk.choices[0], 'delta', None)
+                    text = getattr(delta, 'content', None) if delta else None
+                    if text:
+                        await chunk_forwarder.send(text)
+        except asyncio.CancelledError:
+            # AI turn superseded or client gone - release the provider connection now
+            await self._close_stream(stream)
+            raise
+        finally:
+            if chunk_forwarder:
+                await chunk_forwarder.finish()
+        
+        if not chunks:
+            raise ProviderException('No response chunks received from API')
+        
+        logger.debug(f"Assembled streamed response from {len(chunks)} chunks")
+        return litellm.stream_chunk_builder(chunks, messages=completion_params["messages"])
+    
+    @staticmethod
+    async def _close_stream(stream) -> None:
+        """Close the provider stream underlying a LiteLLM stream wrapper"""
+        completion_stream = getattr(stream, 'completion_stream', None)
+        for closable in (stream, completion_stream):
+            close = getattr(closable, 'aclose', None) or getattr(closable, 'close', None)
+            if close is None:
+                continue
+            try:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+                return
+            except Exception as e:
+                logger.debug(f"Error closing cancelled stream: {e}")
+    
     async def process_message_context(self, message_context: List[Dict], settings: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process message context for simple chat endpoint
@@ -382,6 +541,7 @@ class AIService:
             custom_headers = provider_config.get('custom_headers')
             timeout = provider_config['timeout']
             max_retries = provider_config['max_retries']
+            stream = provider_config.get('stream', False)
             
             # Use provider's default model if none specified
             if not model:
@@ -424,8 +584,7 @@ class AIService:
                 # Store new user messages (compact JSON converted to OpenAI format)
                 if processed_messages:
                     # Convert compact JSON context to user message
-                    import json
-                    compact_json_context = json.dumps(processed_messages, indent=2)
+                    compact_json_context = encode_for_prompt(processed_messages, 'chat_context', model)
                     
                     # Get timestamp from newest message in processed_messages for proper delta tracking
                     newest_timestamp = None
@@ -450,8 +609,7 @@ class AIService:
                     ai_session_manager.add_conversation_message(session_id, user_message)
                 
                 # No session_id - fallback to single message with compact context
-                import json
-                compact_json_context = json.dumps(processed_messages, indent=2)
+                compact_json_context = encode_for_prompt(processed_messages, 'chat_context', model)
                 
                 ai_messages = [
                     {"role": "user", "content": f"Chat Context (Compact JSON Format):\n{compact_json_context}"}
@@ -479,7 +637,8 @@ class AIService:
                 "model": model,
                 "base_url": base_url,
                 "timeout": timeout,
-                "max_retries": max_retries
+                "max_retries": max_retries,
+                "stream": stream
             }
             
             # Parse custom headers if provided
@@ -491,8 +650,14 @@ class AIService:
                 except json.JSONDecodeError as e:
                     raise ValidationException(f"Invalid custom headers JSON: {e}")
             
+            # Forward partial text to the requesting client when streaming
+            chunk_forwarder = None
+            client_id = settings.get('relay_client_id')
+            if stream and client_id:
+                chunk_forwarder = ChatResponseChunkForwarder(client_id, session_id)
+            
             # Make AI call
-            response = await self.call_ai_provider(ai_messages, provider_config)
+            response = await self.call_ai_provider(ai_messages, provider_config, chunk_forwarder=chunk_forwarder)
             
             # Store AI response in conversation history if session_id provided
             if session_id and response.get('success'):
@@ -8,20 +8,32 @@ Enhanced session tracking that stores:
 - Last message timestamp sent to AI (for delta filtering)
 - Session activity tracking for cleanup
 - Full conversation history (OpenAI format for AI compatibility)
+
+Sessions and history are persisted through a pluggable repository
+(see repositories/session_repository.py); only a hot tail of each
+session's history is kept in memory.
 """
 
+import bisect
+import heapq
 import logging
 import time
 import secrets
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 
+from repositories.session_repository import SessionRepository, create_session_repository
+from .tokenizer_service import get_tokenizer_service
+
 logger = logging.getLogger(__name__)
 
-# Simple token estimation (approximate, can be refined later)
-def estimate_tokens(text: str) -> int:
-    """Rough token estimation - ~4 characters per token"""
-    return len(text) // 4 if text else 0
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Token count for text using the model's tokenizer (see tokenizer_service)"""
+    return get_tokenizer_service().count_tokens(text, model)
+
+def estimate_message_tokens(message: Dict[str, Any], model: Optional[str] = None) -> int:
+    """Token count for a single conversation message using the model's tokenizer"""
+    return get_tokenizer_service().count_message_tokens(message, model)
 
 class AISessionManager:
     """
@@ -34,8 +46,19 @@ class AISessionManager:
     - Full conversation history in OpenAI format
     """
     
-    def __init__(self, session_timeout_minutes: int = 20160, cleanup_interval_minutes: int = 10):  # 2 weeks = 20160 minutes
+    # Messages kept in memory per session when history is persisted
+    DEFAULT_HOT_TAIL_MESSAGES = 200
+    # Page size when older history is read back from the repository
+    HISTORY_PAGE_SIZE = 100
+    
+    def __init__(self, session_timeout_minutes: int = 20160, cleanup_interval_minutes: int = 10,  # 2 weeks = 20160 minutes
+                 repository: Optional[SessionRepository] = None, hot_tail_messages: int = DEFAULT_HOT_TAIL_MESSAGES):
         self.sessions: Dict[str, Dict[str, Any]] = {}
+        # (client_id, provider, model) -> session IDs in creation order
+        self._session_index: Dict[Tuple[Optional[str], Optional[str], Optional[str]], List[str]] = {}
+        # Min-heap of (last_activity, session_id); entries may be stale and are
+        # re-checked against the session when they reach the top
+        self._expiry_heap: List[Tuple[float, str]] = []
         self.session_timeout_minutes = session_timeout_minutes
         self.cleanup_interval_minutes = cleanup_interval_minutes
         self._last_cleanup_time = time.time()
@@ -45,6 +68,11 @@ class AISessionManager:
         self.default_max_history_hours = 24  # 1 day
         self.default_cleanup_hours = 168  # 1 week
         
+        # Storage backend (in-memory only unless a persistent repository is given)
+        self._repository = repository or SessionRepository()
+        self.hot_tail_messages = hot_tail_messages
+        self._load_persisted_sessions()
+        
         logger.info(f"AISessionManager initialized - timeout: {session_timeout_minutes}min, cleanup: {cleanup_interval_minutes}min")
     
     def create_or_get_session(self, client_id: str, session_id: Optional[str] = None, provider: Optional[str] = None, model: Optional[str] = None) -> str:
@@ -72,12 +100,12 @@ class AISessionManager:
                 
                 # Update activity and return existing session
                 session_data['last_activity'] = current_time
+                self._repository.save_session(session_id, session_data)
                 logger.debug(f"Continued existing AI session {session_id} for client {client_id}")
                 return session_id
             else:
                 # Session expired or wrong client - remove it
-                if session_id in self.sessions:
-                    del self.sessions[session_id]
+                self._drop_session(session_id)
                 logger.info(f"Removed invalid/expired session {session_id}")
         
         # Create session key that includes provider/model for uniqueness
@@ -85,11 +113,8 @@ class AISessionManager:
         
         # Check if we have an existing session for this client+provider+model combo
         existing_session_id = None
-        for sid, sdata in self.sessions.items():
-            if (sdata.get('client_id') == client_id and 
-                sdata.get('provider') == provider and 
-                sdata.get('model') == model and
-                current_time - sdata.get('last_activity', 0) < self.session_timeout_minutes * 60):
+        for sid in self._session_index.get((client_id, provider, model), ()):
+            if current_time - self.sessions[sid].get('last_activity', 0) < self.session_timeout_minutes * 60:
                 existing_session_id = sid
                 break
         
@@ -97,13 +122,14 @@ class AISessionManager:
             # Use existing session for this provider/model combo
             session_data = self.sessions[existing_session_id]
             session_data['last_activity'] = current_time
+            self._repository.save_session(existing_session_id, session_data)
             logger.debug(f"Reusing existing AI session {existing_session_id} for client {client_id} with {provider}/{model}")
             return existing_session_id
         
         # Create new session
         new_session_id = session_id or self._generate_session_id()
         
-        self.sessions[new_session_id] = {
+        self._register_session(new_session_id, {
             'client_id': client_id,
             'provider': provider,
             'model': model,
@@ -113,8 +139,16 @@ class AISessionManager:
             'conversation_history': [],  # Store full conversation history
             'has_first_turn_complete': False,  # Track first AI turn completion
             'paused_conversation': None,  # Store paused conversation state for resume
-            'paused_at': None  # Timestamp when conversation was paused
-        }
+            'paused_at': None,  # Timestamp when conversation was paused
+            'history_seqs': [],  # Repository sequence numbers of conversation_history entries
+            'history_next_seq': 0,
+            'history_has_older': False,  # Older history exists only in the repository
+            'history_tokens': [],  # Cached token count per conversation_history entry
+            'history_chat_token_prefix': [0],  # Running sums of non-system tokens (len = messages + 1)
+            'history_token_total': 0,  # Tokens across conversation_history, system messages included
+            'history_last_system_seq': None  # Sequence number of the newest system message
+        })
+        self._repository.save_session(new_session_id, self.sessions[new_session_id])
         
         # logger.info(f"Created new AI session {new_session_id} for client {client_id} with {provider}/{model}")
         return new_session_id
@@ -145,6 +179,7 @@ class AISessionManager:
         # Update timestamp and activity
         session_data['last_message_timestamp'] = message_timestamp
         session_data['last_activity'] = current_time
+        self._repository.save_session(session_id, session_data)
         
         logger.debug(f"Updated session {session_id} timestamp to {message_timestamp}")
         return True
@@ -168,7 +203,7 @@ class AISessionManager:
         # Check if session is expired
         if current_time - session_data.get('last_activity', 0) >= self.session_timeout_minutes * 60:
             logger.info(f"Session {session_id} expired during timestamp retrieval")
-            del self.sessions[session_id]
+            self._drop_session(session_id)
             return None
         
         return session_data.get('last_message_timestamp')
@@ -197,6 +232,7 @@ class AISessionManager:
         # Clear timestamp and update activity
         session_data['last_message_timestamp'] = None
         session_data['last_activity'] = current_time
+        self._repository.save_session(session_id, session_data)
         
         logger.info(f"Cleared timestamp for session {session_id} - will send full context next call")
         return True
@@ -243,13 +279,26 @@ class AISessionManager:
         current_time = time.time()
         cutoff_time = current_time - (self.session_timeout_minutes * 60)
         
-        expired_sessions = [
-            session_id for session_id, session_data in self.sessions.items()
-            if session_data.get('last_activity', 0) < cutoff_time
-        ]
+        # Pop heap entries older than the cutoff - O(expired + stale entries)
+        expired_sessions = []
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff_time:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            session_data = self.sessions.get(session_id)
+            if session_data is None:
+                continue  # Already removed
+            
+            last_activity = session_data.get('last_activity', 0)
+            if last_activity >= cutoff_time:
+                # Active since this entry was pushed - requeue at its real position
+                heapq.heappush(self._expiry_heap, (last_activity, session_id))
+                continue
+            
+            self._unregister_session(session_id)
+            expired_sessions.append(session_id)
         
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
+        # Indexed DELETE in the store for the same cutoff
+        if self._repository.persistent:
+            self._repository.delete_expired_sessions(cutoff_time)
         
         if expired_sessions:
             logger.info(f"Cleaned up {len(expired_sessions)} expired AI sessions: {expired_sessions[:3]}...")
@@ -279,7 +328,8 @@ class AISessionManager:
             'active_sessions': active_sessions,
             'sessions_with_timestamps': sessions_with_timestamps,
             'session_timeout_minutes': self.session_timeout_minutes,
-            'cleanup_interval_minutes': self.cleanup_interval_minutes
+            'cleanup_interval_minutes': self.cleanup_interval_minutes,
+            'storage': self._repository.get_stats()
         }
     
     def _generate_session_id(self) -> str:
@@ -291,6 +341,213 @@ class AISessionManager:
         """
         return f"ai_session_{secrets.token_urlsafe(16)}"
     
+    def _load_persisted_sessions(self) -> None:
+        """
+        Load non-expired sessions from the repository
+        
+        History is not loaded here; each session's hot tail is read on first use.
+        """
+        active_since = time.time() - (self.session_timeout_minutes * 60)
+        try:
+            persisted = self._repository.load_sessions(active_since)
+        except Exception as e:
+            logger.error(f"Failed to load persisted AI sessions: {e}")
+            return
+        
+        for session_id, session_data in persisted.items():
+            session_data.update({
+                'conversation_history': None,  # Loaded lazily by _get_history_tail
+                'history_seqs': [],
+                'history_has_older': False,
+                'paused_conversation': None,
+                'paused_at': None
+            })
+            self._register_session(session_id, session_data)
+        
+        if persisted:
+            logger.info(f"Restored {len(persisted)} AI sessions from storage")
+    
+    def _register_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        """Add a session to memory, the lookup index and the expiry heap"""
+        self.sessions[session_id] = session_data
+        key = (session_data.get('client_id'), session_data.get('provider'), session_data.get('model'))
+        self._session_index.setdefault(key, []).append(session_id)
+        heapq.heappush(self._expiry_heap, (session_data.get('last_activity', 0), session_id))
+    
+    def _unregister_session(self, session_id: str) -> None:
+        """Remove a session from memory and the lookup index (heap entries are discarded lazily)"""
+        session_data = self.sessions.pop(session_id, None)
+        if session_data is None:
+            return
+        
+        key = (session_data.get('client_id'), session_data.get('provider'), session_data.get('model'))
+        indexed = self._session_index.get(key)
+        if indexed:
+            indexed.remove(session_id)
+            if not indexed:
+                del self._session_index[key]
+    
+    def _drop_session(self, session_id: str) -> None:
+        """Remove a session from memory and storage"""
+        self._unregister_session(session_id)
+        self._repository.delete_session(session_id)
+    
+    def _get_history_tail(self, session_id: str, session_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Get the in-memory tail of a session's history, reading it from storage on first use
+        
+        Args:
+            session_id: Session identifier
+            session_data: Session data for session_id
+            
+        Returns:
+            Most recent conversation messages (mutable, owned by the session)
+        """
+        if session_data.get('conversation_history') is None:
+            try:
+                rows = self._repository.load_messages(session_id, limit=self.hot_tail_messages)
+            except Exception as e:
+                logger.error(f"Failed to load history for session {session_id}: {e}")
+                rows = []
+            session_data['conversation_history'] = [message for _, message in rows]
+            session_data['history_seqs'] = [seq for seq, _ in rows]
+            session_data['history_has_older'] = len(rows) >= self.hot_tail_messages
+            self._index_history_tokens(session_data)
+        
+        return session_data['conversation_history']
+    
+    def _index_history_tokens(self, session_data: Dict[str, Any],
+                              token_counts: Optional[List[int]] = None) -> None:
+        """
+        Rebuild a session's token bookkeeping for its in-memory history
+        
+        Args:
+            session_data: Session data whose conversation_history and history_seqs are current
+            token_counts: Known token counts per message (estimated when None)
+        """
+        conversation_history = session_data['conversation_history']
+        if token_counts is None:
+            model = session_data.get('model')
+            token_counts = [estimate_message_tokens(msg, model) for msg in conversation_history]
+        
+        chat_prefix = [0]
+        last_system_seq = None
+        for msg, seq, tokens in zip(conversation_history, session_data['history_seqs'], token_counts):
+            if msg.get('role') == 'system':
+                chat_prefix.append(chat_prefix[-1])
+                last_system_seq = seq
+            else:
+                chat_prefix.append(chat_prefix[-1] + tokens)
+        
+        session_data['history_tokens'] = list(token_counts)
+        session_data['history_chat_token_prefix'] = chat_prefix
+        session_data['history_token_total'] = sum(token_counts)
+        session_data['history_last_system_seq'] = last_system_seq
+    
+    def _trim_history_tail(self, session_data: Dict[str, Any]) -> None:
+        """Drop the oldest in-memory messages once the tail outgrows its limit (persistent storage only)"""
+        if not self._repository.persistent:
+            return
+        
+        conversation_history = session_data['conversation_history']
+        # Trim in chunks so appends stay amortized O(1)
+        if len(conversation_history) <= self.hot_tail_messages + self.hot_tail_messages // 2:
+            return
+        
+        drop = len(conversation_history) - self.hot_tail_messages
+        del conversation_history[:drop]
+        del session_data['history_seqs'][:drop]
+        # Prefix sums stay valid as differences, so only the leading entries go
+        session_data['history_token_total'] -= sum(session_data['history_tokens'][:drop])
+        del session_data['history_tokens'][:drop]
+        del session_data['history_chat_token_prefix'][:drop]
+        session_data['history_has_older'] = True
+    
+    def _load_older_history(self, session_id: str, before_seq: Optional[int],
+                            limit: Optional[int] = None) -> List[Tuple[int, Dict[str, Any]]]:
+        """Page older history in from storage, returning (seq, message) tuples oldest first"""
+        try:
+            return self._repository.load_messages(session_id, before_seq=before_seq, limit=limit)
+        except Exception as e:
+            logger.error(f"Failed to page history for session {session_id}: {e}")
+            return []
+    
+    def _load_history(self, session_id: str, session_data: Dict[str, Any],
+                      max_messages: Optional[int], max_tokens: Optional[int]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Assemble as much history as the requested limits can reach
+        
+        The in-memory tail is used directly when it covers the request; otherwise
+        older messages are paged in from the repository. The result is equivalent
+        to applying the limits to the full history.
+        
+        Args:
+            session_id: Session identifier
+            session_data: Session data for session_id
+            max_messages: Message count limit applied by the caller (None for no limit)
+            max_tokens: Token limit applied by the caller (None for no limit)
+            
+        Returns:
+            Tuple of (conversation messages oldest first, token count per message)
+        """
+        tail = self._get_history_tail(session_id, session_data)
+        history = list(tail)
+        token_counts = list(session_data['history_tokens'])
+        
+        if not session_data.get('history_has_older'):
+            return history, token_counts
+        
+        before_seq = session_data['history_seqs'][0] if session_data['history_seqs'] else None
+        
+        if max_tokens is None or max_tokens <= 0:
+            # No token budget (pruning is a no-op for non-positive limits)
+            if max_messages is not None and max_messages <= len(history):
+                return history, token_counts
+            
+            # Count-limited or unlimited request reaching past the tail
+            limit = max_messages - len(history) if max_messages is not None else None
+            older = [message for _, message in self._load_older_history(session_id, before_seq, limit)]
+            model = session_data.get('model')
+            return older + history, [estimate_message_tokens(msg, model) for msg in older] + token_counts
+        
+        # Token-limited: page back until non-system content alone exceeds the budget,
+        # at which point everything older would be pruned anyway
+        chat_prefix = session_data['history_chat_token_prefix']
+        non_system_tokens = chat_prefix[-1] - chat_prefix[0]
+        last_system_seq = session_data.get('history_last_system_seq')
+        has_system = last_system_seq is not None and before_seq is not None and last_system_seq >= before_seq
+        exhausted = False
+        
+        while non_system_tokens <= max_tokens:
+            older = self._load_older_history(session_id, before_seq, self.HISTORY_PAGE_SIZE)
+            if older:
+                before_seq = older[0][0]
+                page = [message for _, message in older]
+                page_tokens = [estimate_message_tokens(msg, session_data.get('model')) for msg in page]
+                history = page + history
+                token_counts = page_tokens + token_counts
+                for msg, tokens in zip(page, page_tokens):
+                    if msg.get('role') == 'system':
+                        has_system = True
+                    else:
+                        non_system_tokens += tokens
+            if len(older) < self.HISTORY_PAGE_SIZE:
+                exhausted = True
+                break
+        
+        # Pruning keeps the most recent system message, which may be older than the pages read
+        if not exhausted and not has_system:
+            try:
+                system_row = self._repository.load_last_message_with_role(session_id, 'system', before_seq)
+            except Exception as e:
+                logger.error(f"Failed to load system message for session {session_id}: {e}")
+                system_row = None
+            if system_row:
+                history.insert(0, system_row[1])
+                token_counts.insert(0, estimate_message_tokens(system_row[1], session_data.get('model')))
+        
+        return history, token_counts
+    
     def add_conversation_message(self, session_id: str, message: Dict[str, Any]) -> bool:
         """
         Add a message to conversation history
@@ -314,13 +571,29 @@ class AISessionManager:
             logger.warning(f"Attempted to add message to expired session {session_id}")
             return False
         
-        # Add message to conversation history
-        if 'conversation_history' not in session_data:
-            session_data['conversation_history'] = []
-        
-        session_data['conversation_history'].append(message)
+        # Add message to conversation history (hot tail) and the repository
+        conversation_history = self._get_history_tail(session_id, session_data)
+        seq = session_data.get('history_next_seq', 0)
+        session_data['history_next_seq'] = seq + 1
+        conversation_history.append(message)
+        session_data['history_seqs'].append(seq)
         session_data['last_activity'] = current_time
         
+        # Token count is computed once here and reused by every later pruning pass
+        tokens = estimate_message_tokens(message, session_data.get('model'))
+        chat_prefix = session_data['history_chat_token_prefix']
+        session_data['history_tokens'].append(tokens)
+        session_data['history_token_total'] += tokens
+        if message.get('role') == 'system':
+            chat_prefix.append(chat_prefix[-1])
+            session_data['history_last_system_seq'] = seq
+        else:
+            chat_prefix.append(chat_prefix[-1] + tokens)
+        
+        self._repository.append_message(session_id, seq, message)
+        self._repository.save_session(session_id, session_data)
+        self._trim_history_tail(session_data)
+        
         # Log message summary (simplified to reduce log noise)
         role = message.get('role', 'unknown')
         content = message.get('content', '')
@@ -371,14 +644,20 @@ class AISessionManager:
         # Check if session is expired
         if current_time - session_data.get('last_activity', 0) >= self.session_timeout_minutes * 60:
             logger.info(f"Session {session_id} expired during history retrieval")
-            del self.sessions[session_id]
+            self._drop_session(session_id)
             return []
         
-        conversation_history = session_data.get('conversation_history', [])
+        self._get_history_tail(session_id, session_data)
         
-        # Apply token-based pruning if specified
-        if max_tokens is not None:
-            conversation_history = self.prune_by_tokens(conversation_history, max_tokens)
+        if max_tokens is not None and max_tokens > 0 and not session_data.get('history_has_older'):
+            # Whole history is in memory - prune straight from the prefix sums
+            conversation_history = self._prune_history_tail(session_data, max_tokens)
+        else:
+            conversation_history, token_counts = self._load_history(session_id, session_data, max_messages, max_tokens)
+            
+            # Apply token-based pruning if specified
+            if max_tokens is not None:
+                conversation_history = self.prune_by_tokens(conversation_history, max_tokens, token_counts)
         
         # Apply message count limit if provided
         if max_messages is not None:
@@ -394,7 +673,8 @@ class AISessionManager:
         
         return conversation_history
     
-    def prune_by_tokens(self, conversation_history: List[Dict[str, Any]], max_tokens: int) -> List[Dict[str, Any]]:
+    def prune_by_tokens(self, conversation_history: List[Dict[str, Any]], max_tokens: int,
+                        token_counts: Optional[List[int]] = None, model: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Prune conversation history to stay within token limit
         Removes oldest messages first, keeping system message if present
@@ -402,6 +682,8 @@ class AISessionManager:
         Args:
             conversation_history: List of conversation messages in OpenAI format
             max_tokens: Maximum tokens allowed
+            token_counts: Token count per message, if already known (counted once otherwise)
+            model: Model whose tokenizer counts the messages (None for the default)
             
         Returns:
             Pruned conversation history
@@ -409,10 +691,11 @@ class AISessionManager:
         if not conversation_history or max_tokens <= 0:
             return conversation_history
         
+        if token_counts is None:
+            token_counts = [estimate_message_tokens(msg, model) for msg in conversation_history]
+        
         # Calculate total tokens
-        total_tokens = sum(
-            estimate_tokens(msg.get('content', '')) for msg in conversation_history
-        )
+        total_tokens = sum(token_counts)
         
         if total_tokens <= max_tokens:
             logger.debug(f"Conversation history within token limit: {total_tokens}/{max_tokens}")
@@ -422,38 +705,81 @@ class AISessionManager:
         
         # Find system message (keep if present)
         system_message = None
+        system_tokens = 0
         filtered_history = []
-        for msg in conversation_history:
+        filtered_tokens = []
+        for msg, tokens in zip(conversation_history, token_counts):
             if msg.get('role') == 'system':
                 system_message = msg
+                system_tokens = tokens
             else:
                 filtered_history.append(msg)
+                filtered_tokens.append(tokens)
         
-        # Remove oldest messages until under token limit
-        while filtered_history:
-            total_tokens = sum(
-                estimate_tokens(msg.get('content', '')) for msg in filtered_history
-            )
-            
-            if total_tokens <= max_tokens:
-                break
-            
-            # Remove oldest non-system message
-            removed = filtered_history.pop(0)
-            removed_tokens = estimate_tokens(removed.get('content', ''))
-            total_tokens -= removed_tokens
-            
-            logger.debug(f"Removed oldest message ({removed_tokens} tokens) to stay under limit")
+        # Single pass from the front: drop oldest messages until under token limit
+        remaining_tokens = sum(filtered_tokens)
+        start = 0
+        while start < len(filtered_history) and remaining_tokens > max_tokens:
+            remaining_tokens -= filtered_tokens[start]
+            start += 1
+        
+        if start:
+            logger.debug(f"Removed {start} oldest messages to stay under limit")
+        filtered_history = filtered_history[start:]
         
         # Add back system message if it existed
         if system_message:
             filtered_history.insert(0, system_message)
+            remaining_tokens += system_tokens
             logger.debug(f"Preserved system message in pruned conversation history")
         
-        final_tokens = sum(
-            estimate_tokens(msg.get('content', '')) for msg in filtered_history
-        )
-        logger.info(f"Pruned conversation history to {final_tokens}/{max_tokens} tokens ({len(filtered_history)} messages)")
+        logger.info(f"Pruned conversation history to {remaining_tokens}/{max_tokens} tokens ({len(filtered_history)} messages)")
+        
+        return filtered_history
+    
+    def _prune_history_tail(self, session_data: Dict[str, Any], max_tokens: int) -> List[Dict[str, Any]]:
+        """
+        Token-prune a fully in-memory history using its cached prefix sums
+        
+        Equivalent to prune_by_tokens over the whole history, but the cut point is
+        found by binary search and only the kept messages are visited.
+        
+        Args:
+            session_data: Session data with its history loaded and history_has_older False
+            max_tokens: Maximum tokens allowed (must be positive)
+            
+        Returns:
+            Pruned conversation history
+        """
+        conversation_history = session_data['conversation_history']
+        total_tokens = session_data['history_token_total']
+        
+        if total_tokens <= max_tokens:
+            logger.debug(f"Conversation history within token limit: {total_tokens}/{max_tokens}")
+            return list(conversation_history)
+        
+        logger.info(f"Pruning conversation history: {total_tokens} tokens > {max_tokens} limit")
+        
+        # First message index whose non-system suffix fits the budget
+        chat_prefix = session_data['history_chat_token_prefix']
+        start = bisect.bisect_left(chat_prefix, chat_prefix[-1] - max_tokens)
+        remaining_tokens = chat_prefix[-1] - chat_prefix[start]
+        
+        filtered_history = [
+            msg for msg in conversation_history[start:] if msg.get('role') != 'system'
+        ]
+        
+        # Add back the newest system message if it existed
+        last_system_seq = session_data.get('history_last_system_seq')
+        if last_system_seq is not None:
+            history_seqs = session_data['history_seqs']
+            index = bisect.bisect_left(history_seqs, last_system_seq)
+            if index < len(history_seqs) and history_seqs[index] == last_system_seq:
+                filtered_history.insert(0, conversation_history[index])
+                remaining_tokens += session_data['history_tokens'][index]
+                logger.debug(f"Preserved system message in pruned conversation history")
+        
+        logger.info(f"Pruned conversation history to {remaining_tokens}/{max_tokens} tokens ({len(filtered_history)} messages)")
         
         return filtered_history
     
@@ -480,7 +806,12 @@ class AISessionManager:
         
         # Clear conversation history and update activity
         session_data['conversation_history'] = []
+        session_data['history_seqs'] = []
+        session_data['history_has_older'] = False
+        self._index_history_tokens(session_data, [])
         session_data['last_activity'] = current_time
+        self._repository.clear_messages(session_id)
+        self._repository.save_session(session_id, session_data)
         
         logger.info(f"Cleared conversation history for session {session_id}")
         return True
@@ -532,6 +863,7 @@ class AISessionManager:
         # Set first turn complete flag and update activity
         session_data['has_first_turn_complete'] = True
         session_data['last_activity'] = current_time
+        self._repository.save_session(session_id, session_data)
         
         logger.info(f"Marked first turn complete for session {session_id}")
         return True
@@ -586,7 +918,7 @@ class AISessionManager:
         # Check if session is expired
         if current_time - session_data.get('last_activity', 0) >= self.session_timeout_minutes * 60:
             logger.info(f"Session {session_id} expired during paused conversation retrieval")
-            del self.sessions[session_id]
+            self._drop_session(session_id)
             return None
         
         # Check if there's a paused conversation
@@ -689,7 +1021,7 @@ class AISessionManager:
         current_time = time.time()
         
         for session_id, session_data in list(self.sessions.items()):
-            if 'conversation_history' not in session_data:
+            if session_data.get('conversation_history') is None:
                 continue
             
             # Apply default limits
@@ -698,15 +1030,20 @@ class AISessionManager:
             cleanup_hours = session_data.get('cleanup_hours', self.default_cleanup_hours)
             
             conversation_history = session_data['conversation_history']
+            history_seqs = session_data['history_seqs']
+            history_tokens = session_data['history_tokens']
             
             # Remove messages older than max_hours
             if max_hours is not None:
                 cutoff_time = current_time - (max_hours * 3600)
                 original_count = len(conversation_history)
-                conversation_history = [
-                    msg for msg in conversation_history
+                kept = [
+                    (msg, seq, tokens) for msg, seq, tokens in zip(conversation_history, history_seqs, history_tokens)
                     if msg.get('timestamp', current_time) >= cutoff_time
                 ]
+                conversation_history = [msg for msg, _, _ in kept]
+                session_data['history_seqs'] = [seq for _, seq, _ in kept]
+                self._repository.delete_messages_before(session_id, cutoff_time)
                 removed_count = original_count - len(conversation_history)
                 if removed_count > 0:
                     logger.debug(f"Cleaned up {removed_count} old messages from session {session_id}")
@@ -721,6 +1058,8 @@ class AISessionManager:
             
             # Update session data
             session_data['conversation_history'] = conversation_history
+            if len(conversation_history) != len(history_tokens):
+                self._index_history_tokens(session_data, [tokens for _, _, tokens in kept])
     
     def _decode_json_recursively(self, obj):
         """
@@ -807,6 +1146,19 @@ class AISessionManager:
 # Global instance for application-wide use
 _ai_session_manager = None
 
+def _create_default_repository() -> SessionRepository:
+    """
+    Create the default session storage backend (SQLite, falling back to memory)
+    
+    Returns:
+        SessionRepository instance
+    """
+    try:
+        return create_session_repository('sqlite')
+    except Exception as e:
+        logger.error(f"Failed to open AI session storage, history will not persist: {e}")
+        return create_session_repository('memory')
+
 def get_ai_session_manager() -> AISessionManager:
     """
     Get the global AI session manager instance
@@ -816,7 +1168,7 @@ def get_ai_session_manager() -> AISessionManager:
     """
     global _ai_session_manager
     if _ai_session_manager is None:
-        _ai_session_manager = AISessionManager()
+        _ai_session_manager = AISessionManager(repository=_create_default_repository())
     return _ai_session_manager
 
 def reset_ai_session_manager() -> AISessionManager:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Prompt Cache Support for The Gold Box
+Provider prompt-prefix caching hints and cache-hit accounting
+
+Providers cache the longest prompt prefix they have seen recently, so a
+request is cheap to resend when everything that does not change comes first.
+With the 'prompt caching' setting the initial messages are laid out
+static-first (tool schemas, role prompt, world state, then history, then the
+delta; see build_initial_messages_with_delta), and for models LiteLLM knows to
+support prompt caching, cache-control breakpoints are set after the tools,
+after the static system messages and on the newest message, so every
+function-calling iteration reuses the prefix of the previous one.
+
+Cached prompt tokens reported in the response usage are recorded for every
+call, per layout, so the savings are measurable.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import copy
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Layouts usage is recorded under
+LAYOUT_DEFAULT = 'default'
+LAYOUT_CACHE = 'cache'
+
+# Cache-control marker understood by LiteLLM (dropped for providers that cache automatically)
+CACHE_CONTROL = {"type": "ephemeral"}
+
+def supports_cache_hints(model: str, custom_llm_provider: Optional[str] = None) -> bool:
+    """
+    Check whether LiteLLM supports prompt caching for a model
+    
+    Args:
+        model: Model name as passed to LiteLLM
+        custom_llm_provider: Explicit LiteLLM provider, if any
+    
+    Returns:
+        True if cache-control hints can be sent
+    """
+    try:
+        from litellm.utils import supports_prompt_caching
+        return bool(supports_prompt_caching(model=model, custom_llm_provider=custom_llm_provider))
+    except Exception as e:
+        logger.debug(f"Prompt caching support unknown for model {model}: {e}")
+        return False
+
+def _with_cache_control(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a message whose (text) content carries a cache-control breakpoint"""
+    hinted = dict(message)
+    content = message.get('content')
+    if isinstance(content, str):
+        hinted['content'] = [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]
+    elif isinstance(content, list) and content:
+        hinted['content'] = copy.copy(content)
+        hinted['content'][-1] = dict(content[-1], cache_control=CACHE_CONTROL)
+    return hinted
+
+def add_cache_hints(
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+    """
+    Set cache-control breakpoints on a request
+    
+    Breakpoints go on the last tool schema, on the last leading system
+    message and on the newest user or tool message. The inputs are not
+    modified; the session keeps storing plain messages.
+    
+    Args:
+        messages: Messages in OpenAI format, static-first
+        tools: Tool definitions in OpenAI format
+    
+    Returns:
+        Tuple of (messages, tools) to send
+    """
+    hinted_tools = tools
+    if tools:
+        hinted_tools = list(tools)
+        hinted_tools[-1] = dict(tools[-1], cache_control=CACHE_CONTROL)
+    
+    hinted_messages = list(messages)
+    
+    # End of the static prefix: the last system message before the conversation starts
+    static_end = None
+    for index, message in enumerate(messages):
+        if message.get('role') != 'system':
+            break
+        static_end = index
+    if static_end is not None:
+        hinted_messages[static_end] = _with_cache_control(messages[static_end])
+    
+    # Newest message, so the next iteration of the tool loop reads everything before it from cache
+    for index in range(len(messages) - 1, -1, -1):
+        if index == static_end:
+            break
+        if messages[index].get('role') in ('user', 'tool'):
+            hinted_messages[index] = _with_cache_control(messages[index])
+            break
+    
+    return hinted_messages, hinted_tools
+
+def cached_prompt_tokens(usage: Any) -> Tuple[int, int]:
+    """
+    Read cache statistics from a LiteLLM usage object
+    
+    Args:
+        usage: Response usage (object or dictionary), may be None
+    
+    Returns:
+        Tuple of (prompt tokens read from cache, prompt tokens written to cache)
+    """
+    if usage is None:
+        return 0, 0
+    
+    def field(source: Any, name: str) -> Any:
+        if isinstance(source, dict):
+            return source.get(name)
+        return getattr(source, name, None)
+    
+    details = field(usage, 'prompt_tokens_details')
+    cached = (field(details, 'cached_tokens') if details is not None else None) or field(usage, 'cache_read_input_tokens')
+    written = field(usage, 'cache_creation_input_tokens')
+    return int(cached or 0), int(written or 0)
+
+class PromptCacheStats:
+    """
+    Prompt token and cache-hit counters per prompt layout
+    """
+    
+    def __init__(self):
+        """Initialize counters"""
+        self._layouts: Dict[str, Dict[str, int]] = {}
+        self.hinted_requests = 0
+    
+    def record(self, layout: str, usage: Any) -> int:
+        """
+        Record the usage of one provider call
+        
+        Args:
+            layout: LAYOUT_DEFAULT or LAYOUT_CACHE
+            usage: Response usage, may be None
+        
+        Returns:
+            Prompt tokens read from cache
+        """
+        cached, written = cached_prompt_tokens(usage)
+        prompt_tokens = usage.get('prompt_tokens') if isinstance(usage, dict) else getattr(usage, 'prompt_tokens', None)
+        
+        counters = self._layouts.setdefault(layout, {
+            'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'cache_write_tokens': 0, 'calls_with_hits': 0
+        })
+        counters['calls'] += 1
+        counters['prompt_tokens'] += int(prompt_tokens or 0)
+        counters['cached_tokens'] += cached
+        counters['cache_write_tokens'] += written
+        if cached:
+            counters['calls_with_hits'] += 1
+        return cached
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get prompt cache statistics
+        
+        Returns:
+            Dictionary with counters and the cached share of prompt tokens per layout
+        """
+        return {
+            'hinted_requests': self.hinted_requests,
+            'layouts': {
+                layout: dict(
+                    counters,
+                    cached_ratio=round(counters['cached_tokens'] / counters['prompt_tokens'], 4)
+                    if counters['prompt_tokens'] else 0.0
+                )
+                for layout, counters in self._layouts.items()
+            }
+        }
+
+# Global statistics shared by all provider calls
+_prompt_cache_stats: Optional[PromptCacheStats] = None
+
+def get_prompt_cache_stats() -> PromptCacheStats:
+    """Get the global prompt cache statistics instance"""
+    global _prompt_cache_stats
+    if _prompt_cache_stats is None:
+        _prompt_cache_stats = PromptCacheStats()
+    return _prompt_cache_stats
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Tokenizer Service for The Gold Box
+Counts tokens with a model-appropriate local tokenizer
+
+Tokenizer selection per model, first match wins:
+- tiktoken BPE encoding for OpenAI models
+- The tokenizer LiteLLM selects for the model (e.g. Anthropic); the server
+  turns off LiteLLM's tokenizer downloads at startup unless
+  TOKENIZER_ALLOW_DOWNLOADS is set
+- Character heuristic (~4 characters per token) when neither is available offline
+
+Counts are memoized by tokenizer and content hash, so unchanged messages are
+never re-tokenized.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# LiteLLM bundles the common tiktoken encodings (cl100k_base, o200k_base, p50k_base);
+# point tiktoken at them so encodings load without network access
+try:
+    from importlib import resources as _resources
+    _bundled_encodings = str(_resources.files('litellm').joinpath('litellm_core_utils/tokenizers'))
+    if os.path.isdir(_bundled_encodings):
+        os.environ.setdefault('TIKTOKEN_CACHE_DIR', _bundled_encodings)
+except Exception:
+    pass
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import litellm
+except ImportError:
+    litellm = None
+
+# Tokenizer used when no model is known
+DEFAULT_TOKENIZER_MODEL = 'gpt-4'
+
+# Memoized counts across all tokenizers; sized for a few sessions' hot history
+DEFAULT_MAX_ENTRIES = 8192
+
+HEURISTIC_TOKENIZER = 'heuristic'
+
+# Let LiteLLM fetch HuggingFace tokenizers it does not bundle (applied once at server startup)
+ALLOW_TOKENIZER_DOWNLOADS = os.environ.get('TOKENIZER_ALLOW_DOWNLOADS', '').lower() in ['true', '1', 'yes']
+
+def heuristic_token_count(text: str) -> int:
+    """Rough token estimation - ~4 characters per token"""
+    return len(text) // 4 if text else 0
+
+class TokenizerService:
+    """
+    Model-aware token counter with memoized counts
+    
+    Tokenizers are resolved once per model name. Count lookups are keyed by
+    tokenizer name and the SHA-256 of the text, so models that share an
+    encoding also share cached counts.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize tokenizer service
+        
+        Args:
+            max_entries: Maximum number of memoized counts (LRU eviction beyond this)
+        """
+        self.max_entries = max_entries
+        
+        # model name -> (tokenizer name, count function)
+        self._tokenizers: Dict[str, Tuple[str, Callable[[str], int]]] = {}
+        # "tokenizer:sha256" -> token count, least recently used first
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tokenizer_errors = 0
+        
+        logger.info(f"TokenizerService initialized (tiktoken={'yes' if tiktoken else 'no'}, "
+                    f"litellm={'yes' if litellm else 'no'}, max_entries={max_entries})")
+    
+    @staticmethod
+    def _base_model_name(model: Optional[str]) -> str:
+        """Strip provider prefixes such as 'openai/' or 'openrouter/anthropic/'"""
+        if not model or model == 'unknown':
+            return DEFAULT_TOKENIZER_MODEL
+        return model.rsplit('/', 1)[-1]
+    
+    def _resolve_tokenizer(self, model: Optional[str]) -> Tuple[str, Callable[[str], int]]:
+        """
+        Get the tokenizer for a model, resolving and caching it on first use
+        
+        Args:
+            model: Model name as configured (provider prefixes allowed)
+        
+        Returns:
+            Tuple of (tokenizer name, count function)
+        """
+        key = model or ''
+        resolved = self._tokenizers.get(key)
+        if resolved is not None:
+            return resolved
+        
+        base_model = self._base_model_name(model)
+        resolved = self._resolve_tiktoken(base_model) or self._resolve_litellm(base_model)
+        if resolved is None:
+            resolved = (HEURISTIC_TOKENIZER, heuristic_token_count)
+        
+        logger.debug(f"Tokenizer for model {model!r}: {resolved[0]}")
+        with self._lock:
+            self._tokenizers[key] = resolved
+        return resolved
+    
+    @staticmethod
+    def _resolve_tiktoken(base_model: str) -> Optional[Tuple[str, Callable[[str], int]]]:
+        """Resolve a tiktoken encoding for OpenAI model names"""
+        if tiktoken is None:
+            return None
+        
+        try:
+            encoding = tiktoken.encoding_for_model(base_model)
+        except KeyError:
+            return None  # Not an OpenAI model
+        except Exception as e:
+            logger.debug(f"tiktoken encoding unavailable for {base_model}: {e}")
+            return None
+        
+        return f"tiktoken:{encoding.name}", lambda text: len(encoding.encode(text, disallowed_special=()))
+    
+    @staticmethod
+    def _resolve_litellm(base_model: str) -> Optional[Tuple[str, Callable[[str], int]]]:
+        """Resolve the tokenizer LiteLLM would use for this model"""
+        if litellm is None:
+            return None
+        
+        def count(text: str) -> int:
+            return len(litellm.encode(model=base_model, text=text))
+        
+        try:
+            count('probe')
+        except Exception as e:
+            logger.debug(f"LiteLLM tokenizer unavailable for {base_model}: {e}")
+            return None
+        
+        return f"litellm:{base_model}", count
+    
+    def get_tokenizer_name(self, model: Optional[str] = None) -> str:
+        """
+        Get the name of the tokenizer used for a model
+        
+        Args:
+            model: Model name (None for the default tokenizer)
+        
+        Returns:
+            Tokenizer name, e.g. 'tiktoken:cl100k_base' or 'heuristic'
+        """
+        return self._resolve_tokenizer(model)[0]
+    
+    def count_tokens(self, text: Any, model: Optional[str] = None) -> int:
+        """
+        Count tokens in text
+        
+        Args:
+            text: Text to count; non-string values are counted as their JSON form
+            model: Model name used to pick the tokenizer (None for the default)
+        
+        Returns:
+            Number of tokens
+        """
+        if not text:
+            return 0
+        if not isinstance(text, str):
+            text = json.dumps(text, ensure_ascii=False)
+        
+        tokenizer_name, count = self._resolve_tokenizer(model)
+        if tokenizer_name == HEURISTIC_TOKENIZER:
+            return count(text)  # Cheaper than hashing
+        
+        key = f"{tokenizer_name}:{hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()}"
+        
+        with self._lock:
+            tokens = self._counts.get(key)
+            if tokens is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return tokens
+            self.misses += 1
+        
+        try:
+            tokens = count(text)
+        except Exception as e:
+            # Malformed input for this tokenizer - fall back rather than fail the turn
+            self.tokenizer_errors += 1
+            logger.debug(f"Tokenizer {tokenizer_name} failed, using heuristic: {e}")
+            return heuristic_token_count(text)
+        
+        if self.max_entries > 0:
+            with self._lock:
+                self._counts[key] = tokens
+                while len(self._counts) > self.max_entries:
+                    self._counts.popitem(last=False)
+                    self.evictions += 1
+        
+        return tokens
+    
+    def count_message_tokens(self, message: Dict[str, Any], model: Optional[str] = None) -> int:
+        """
+        Count tokens in an OpenAI-format message
+        
+        Covers the content and any tool call arguments, which are sent to the
+        provider as text as well.
+        
+        Args:
+            message: Message dictionary with role, content, etc.
+            model: Model name used to pick the tokenizer (None for the default)
+        
+        Returns:
+            Number of tokens
+        """
+        tokens = self.count_tokens(message.get('content', ''), model)
+        
+        for tool_call in message.get('tool_calls') or ():
+            function = tool_call.get('function', {}) if isinstance(tool_call, dict) else {}
+            tokens += self.count_tokens(function.get('name', ''), model)
+            tokens += self.count_tokens(function.get('arguments', ''), model)
+        
+        return tokens
+    
+    def clear(self):
+        """Drop memoized counts and resolved tokenizers"""
+        with self._lock:
+            self._counts.clear()
+            self._tokenizers.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get tokenizer statistics
+        
+        Returns:
+            Dictionary with tokenizer statistics
+        """
+        with self._lock:
+            size = len(self._counts)
+            tokenizers = {model or DEFAULT_TOKENIZER_MODEL: name for model, (name, _) in self._tokenizers.items()}
+        
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'tokenizer_errors': self.tokenizer_errors,
+            'tokenizers': tokenizers
+        }
+
+# Global tokenizer service instance
+_tokenizer_service: Optional[TokenizerService] = None
+
+def get_tokenizer_service() -> TokenizerService:
+    """Get the global tokenizer service instance"""
+    global _tokenizer_service
+    if _tokenizer_service is None:
+        _tokenizer_service = TokenizerService()
+    return _tokenizer_service
@@ -266,3 +266,25 @@ def get_tool_definitions() -> list:
             }
         }
     ]
+
+# Tools that only read state (or whose side effects are independent of the other
+# tools in the same assistant turn) and may therefore run concurrently.
+# Every other tool is treated as mutating and acts as an ordering barrier.
+CONCURRENT_SAFE_TOOLS = frozenset({
+    'get_message_history',
+    'roll_dice',
+    'get_encounter',
+    'get_actor_details'
+})
+
+def is_concurrent_safe(tool_name: str) -> bool:
+    """
+    Check whether a tool may run concurrently with its neighbours
+    
+    Args:
+        tool_name: Name of tool from an AI function call
+    
+    Returns:
+        True if the tool is read-only/independent, False if it mutates game state
+    """
+    return tool_name in CONCURRENT_SAFE_TOOLS
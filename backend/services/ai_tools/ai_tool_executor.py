@@ -6,7 +6,7 @@ Executes AI tools with proper separation of concerns
 
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
@@ -14,10 +14,7 @@ logger = logging.getLogger(__name__)
 
 # Import log truncation utility
 from shared.utils.log_utils import truncate_for_log
-
-# Dictionary to store pending roll requests
-# Key: request_id, Value: asyncio.Future
-_pending_roll_requests: Dict[str, asyncio.Future] = {}
+from .frontend_batch import FrontendRequestCoalescer, reject_unsent, send_frontend_request, send_frontend_requests
 
 class AIToolExecutor:
     """
@@ -82,6 +79,134 @@ class AIToolExecutor:
         else:
             raise ValueError(f"Unknown tool: {tool_name}")
     
+    async def execute_tool_calls(
+        self,
+        tool_calls: List[Tuple[str, Dict[str, Any]]],
+        client_id: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute all tool calls from one assistant turn
+        
+        Consecutive concurrent-safe tools (see CONCURRENT_SAFE_TOOLS) are run
+        together with asyncio.gather, and the frontend requests they issue go out
+        in one batch_request frame. Mutating tools act as barriers: they wait for
+        everything before them and run alone, so their relative order is preserved.
+        
+        Args:
+            tool_calls: List of (tool_name, tool_args) in the order the AI issued them
+            client_id: Client ID for message collection (transient, from WebSocket)
+        
+        Returns:
+            Tool results in the same order as tool_calls
+        
+        Raises:
+            ValueError: If a tool_name is unknown (raised once its concurrent batch settles)
+        """
+        from .ai_tool_definitions import is_concurrent_safe
+        
+        results: List[Dict[str, Any]] = [None] * len(tool_calls)
+        batch: List[int] = []
+        
+        async def run_batch():
+            if not batch:
+                return
+            coalescer_token = None
+            if len(batch) > 1:
+                logger.info(f"Executing {len(batch)} tools concurrently for client {client_id}: {[tool_calls[i][0] for i in batch]}")
+                coalescer_token = FrontendRequestCoalescer(client_id).activate()
+            try:
+                outcomes = await asyncio.gather(
+                    *(self.execute_tool(tool_calls[i][0], tool_calls[i][1], client_id) for i in batch),
+                    return_exceptions=True
+                )
+            finally:
+                if coalescer_token is not None:
+                    FrontendRequestCoalescer.deactivate(coalescer_token)
+            indices = list(batch)
+            batch.clear()
+            for index, outcome in zip(indices, outcomes):
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                results[index] = outcome
+        
+        for index, (tool_name, tool_args) in enumerate(tool_calls):
+            if is_concurrent_safe(tool_name):
+                batch.append(index)
+                continue
+            
+            # Mutating tool - drain pending reads first, then run it on its own
+            await run_batch()
+            results[index] = await self.execute_tool(tool_name, tool_args, client_id)
+        
+        await run_batch()
+        return results
+    
+    async def execute_frontend_batch(
+        self,
+        operations: List[Dict[str, Any]],
+        client_id: str,
+        timeout: float = 30.0
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several frontend operations with one round-trip
+        
+        All operations go out in a single batch_request frame and each
+        response comes back as its own frame. One timeout covers the whole
+        batch.
+        
+        Args:
+            operations: Frontend operations, each {'type': <request frame type>, 'data': {...}}
+                        (e.g. 'execute_roll', 'get_actor_details', 'combat_state_refresh')
+            client_id: Client ID for WebSocket communication
+            timeout: Seconds to wait for all responses
+        
+        Returns:
+            One result per operation, in order: {'request_id', 'type', 'success', 'data' or 'error'}
+        """
+        from ..system_services.service_factory import get_websocket_manager
+        
+        websocket_manager = get_websocket_manager()
+        rpc_registry = websocket_manager.rpc_registry
+        
+        requests = []
+        futures = []
+        for operation in operations:
+            request_id = str(uuid.uuid4())
+            futures.append(rpc_registry.register(client_id, request_id, operation['type']))
+            requests.append({
+                "type": operation['type'],
+                "request_id": request_id,
+                "data": {
+                    **operation.get('data', {}),
+                    "timestamp": datetime.now().isoformat()
+                }
+            })
+        
+        try:
+            if not await send_frontend_requests(websocket_manager, client_id, requests):
+                reject_unsent(websocket_manager, client_id, requests)
+            if futures:
+                await asyncio.wait(futures, timeout=timeout)
+            
+            results = []
+            for request, future in zip(requests, futures):
+                result = {"request_id": request['request_id'], "type": request['type']}
+                if not future.done() or future.cancelled():
+                    result.update(success=False, error="Timeout waiting for frontend response")
+                elif future.exception() is not None:
+                    result.update(success=False, error=str(future.exception()))
+                else:
+                    result.update(success=True, data=future.result())
+                results.append(result)
+            
+            logger.info(f"Frontend batch for client {client_id}: "
+                        f"{sum(1 for r in results if r['success'])}/{len(results)} operations succeeded")
+            return results
+        
+        finally:
+            for request in requests:
+                rpc_registry.release(client_id, request['request_id'])
+    
     async def execute_get_message_history(
         self,
         args: Dict[str, Any],
@@ -107,9 +232,12 @@ class AIToolExecutor:
             # FIXED: Use WebSocketMessageCollector to match testing harness and live AI behavior
             from ..system_services.service_factory import get_websocket_message_collector
             from shared.core.unified_message_processor import get_unified_processor
+            from ..message_services.compact_conversion_stage import get_compact_conversion_stage
             
             websocket_message_collector = get_websocket_message_collector()
             unified_processor = get_unified_processor()
+            conversion_stage = get_compact_conversion_stage()
+            item_store = websocket_message_collector.get_item_store(client_id)
             
             # Log which collector is being used for debugging
             logger.info(f"get_message_history: Using WebSocketMessageCollector for client {client_id}")
@@ -126,6 +254,15 @@ class AIToolExecutor:
             # Log message collection results for debugging
             logger.info(f"get_message_history: Collected {len(messages)} messages for client {client_id}")
             
+            # Parse HTML messages the background stage has not reached yet in the HTML parse pool
+            html_messages = [msg for msg in messages
+                             if msg.get('type', '') not in ['roll', 'chat', 'cm']
+                             and isinstance(msg.get('content'), str) and '<' in msg.get('content')]
+            try:
+                await conversion_stage.prepare(item_store, html_messages)
+            except Exception as e:
+                logger.warning(f"get_message_history: Batch compact conversion failed: {e}")
+            
             # Convert messages to compact JSON - handle both WebSocket JSON and HTML formats
             compact_messages = []
             for msg in messages:
@@ -184,12 +321,8 @@ class AIToolExecutor:
                     
                     if isinstance(content, str) and '<' in content:
                         try:
-                            # Parse HTML to compact JSON
-                            compact = unified_processor.html_to_compact_json(content)
-                            
-                            # Preserve original timestamp
-                            if 'timestamp' in msg:
-                                compact['ts'] = msg['timestamp']
+                            # Compact JSON precomputed at ingest (parsed now if not ready yet)
+                            compact = conversion_stage.compact_message(item_store, msg)
                             
                             compact_messages.append(compact)
                             logger.debug(f"Parsed HTML to compact: {compact.get('t', 'unknown')}")
@@ -268,9 +401,8 @@ class AIToolExecutor:
             logger.info(f"roll_dice: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await the result
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"roll_dice: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'roll_dice')
+            logger.info(f"roll_dice: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send roll request to frontend
@@ -283,7 +415,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, roll_message)
+                await send_frontend_request(websocket_manager, client_id, roll_message)
                 logger.info(f"roll_dice: Sent {len(rolls)} roll requests to client {client_id}, request_id: {request_id}")
                 
                 # Wait for result with timeout (30 seconds)
@@ -301,11 +433,6 @@ class AIToolExecutor:
                     
                 except asyncio.TimeoutError:
                     logger.error(f"roll_dice: Timeout waiting for roll results, request_id: {request_id}")
-                    # Check if future is still pending
-                    if request_id in _pending_roll_requests:
-                        logger.error(f"Future still in _pending_roll_requests but timed out")
-                    else:
-                        logger.error(f"Future removed from _pending_roll_requests before timeout")
                     return {
                         "success": False,
                         "error": "Timeout waiting for roll results from frontend",
@@ -315,11 +442,8 @@ class AIToolExecutor:
             finally:
                 # Clean up pending request
                 logger.info(f"Cleaning up future for request {request_id}")
-                if request_id in _pending_roll_requests:
-                    del _pending_roll_requests[request_id]
-                    logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                else:
-                    logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                if websocket_manager.rpc_registry.release(client_id, request_id):
+                    logger.info(f"Released unanswered request {request_id}")
             
         except Exception as e:
             logger.error(f"roll_dice execution failed: {e}")
@@ -445,9 +569,8 @@ class AIToolExecutor:
             logger.info(f"get_encounter: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"get_encounter: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'get_encounter')
+            logger.info(f"get_encounter: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send combat state refresh request to frontend
@@ -459,7 +582,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, refresh_message)
+                await send_frontend_request(websocket_manager, client_id, refresh_message)
                 logger.info(f"get_encounter: Sent combat_state_refresh request to client {client_id}, request_id: {request_id}")
                 
                 # Wait for combat state response with timeout (5 seconds - matches health check)
@@ -470,11 +593,6 @@ class AIToolExecutor:
                     
                 except asyncio.TimeoutError:
                     logger.debug(f"get_encounter: Timeout waiting for combat state, request_id: {request_id}")
-                    # Check if future is still pending
-                    if request_id in _pending_roll_requests:
-                        logger.debug(f"Future still in _pending_roll_requests but timed out")
-                    else:
-                        logger.debug(f"Future removed from _pending_roll_requests before timeout")
                     
                     # Timeout is acceptable - continue with cached state
                     logger.info(f"get_encounter: Using cached combat state after timeout")
@@ -482,11 +600,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
                 
                 # UPDATED: Use new multi-encounter storage and check both sources
                 if encounter_id:
@@ -593,9 +708,8 @@ class AIToolExecutor:
             logger.info(f"create_encounter: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"create_encounter: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'create_encounter')
+            logger.info(f"create_encounter: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             # Variable to store combat state from frontend response
             frontend_combat_state = None
@@ -612,7 +726,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, create_message)
+                await send_frontend_request(websocket_manager, client_id, create_message)
                 logger.info(f"create_encounter: Sent encounter creation request to client {client_id} with {len(actor_ids)} actors, request_id: {request_id}")
                 
                 # Wait for combat state response with timeout (15 seconds - Foundry operations can be slow)
@@ -645,7 +759,7 @@ class AIToolExecutor:
                     else:
                         # Log diagnostic information to help debug timeout issues
                         logger.debug(f"create_encounter: Checking message collector for client {client_id}")
-                        logger.debug(f"create_encounter: Pending requests count: {len(_pending_roll_requests)}")
+                        logger.debug(f"create_encounter: Pending requests count: {websocket_manager.rpc_registry.in_flight(client_id)}")
                         
                         return {
                             "success": False,
@@ -654,18 +768,15 @@ class AIToolExecutor:
                                 "request_id": request_id,
                                 "timeout_seconds": 15,
                                 "client_id": client_id,
-                                "pending_requests": len(_pending_roll_requests)
+                                "pending_requests": websocket_manager.rpc_registry.in_flight(client_id)
                             }
                         }
                 
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
                 
                 # Use combat state from frontend response (not cached state)
                 # This ensures we return the correct combat_id for the newly created encounter
@@ -758,9 +869,8 @@ class AIToolExecutor:
             logger.info(f"activate_combat: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"activate_combat: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'activate_combat')
+            logger.info(f"activate_combat: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send activation request to frontend
@@ -773,7 +883,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, activate_message)
+                await send_frontend_request(websocket_manager, client_id, activate_message)
                 logger.info(f"activate_combat: Sent activation request to client {client_id}, request_id: {request_id}")
                 
                 # Wait for combat state response with timeout (15 seconds - Foundry operations can be slow)
@@ -805,11 +915,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
                 
                 # Verify activation
                 combat_state = websocket_message_collector.get_specific_combat_state(client_id, encounter_id)
@@ -891,9 +998,8 @@ class AIToolExecutor:
             logger.info(f"delete_encounter: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"delete_encounter: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'delete_encounter')
+            logger.info(f"delete_encounter: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send encounter deletion request to frontend
@@ -906,7 +1012,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, delete_message)
+                await send_frontend_request(websocket_manager, client_id, delete_message)
                 logger.info(f"delete_encounter: Sent encounter deletion request to client {client_id}, request_id: {request_id}")
                 
                 # Wait for combat state response with timeout (15 seconds - Foundry operations can be slow)
@@ -946,11 +1052,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
                 
                 # Verify combat is no longer active by checking the message collector
                 # The frontend's response should have updated the cache via set_combat_state_from_frontend
@@ -1082,9 +1185,8 @@ class AIToolExecutor:
             logger.info(f"advance_combat_turn: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"advance_combat_turn: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'advance_combat_turn')
+            logger.info(f"advance_combat_turn: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send turn advancement request to frontend
@@ -1097,7 +1199,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, advance_message)
+                await send_frontend_request(websocket_manager, client_id, advance_message)
                 logger.info(f"advance_combat_turn: Sent turn advancement request to client {client_id}, request_id: {request_id}")
                 
                 # Wait for combat state response with timeout (15 seconds - Foundry operations can be slow)
@@ -1142,11 +1244,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
                 
                 # Get updated combat state from message collector
                 combat_state = websocket_message_collector.get_specific_combat_state(client_id, encounter_id)
@@ -1241,9 +1340,8 @@ class AIToolExecutor:
             logger.info(f"get_actor_details: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await actor data response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"get_actor_details: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'get_actor_details')
+            logger.info(f"get_actor_details: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send actor details request to frontend
@@ -1257,7 +1355,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, actor_details_message)
+                await send_frontend_request(websocket_manager, client_id, actor_details_message)
                 logger.info(f"get_actor_details: Sent actor details request to client {client_id} for token {token_id}, request_id: {request_id}")
                 
                 # Wait for actor data response with timeout (5 seconds - should be fast)
@@ -1292,11 +1390,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
             
             except Exception as inner_error:
                 logger.error(f"get_actor_details: Error during actor details request for client {client_id}: {inner_error}")
@@ -1361,9 +1456,8 @@ class AIToolExecutor:
             logger.info(f"modify_token_attribute: Creating future for request {request_id} with client_id {client_id}")
             
             # Create a future to await combat state response
-            result_future = asyncio.Future()
-            _pending_roll_requests[request_id] = result_future
-            logger.info(f"modify_token_attribute: Stored future in _pending_roll_requests. Total pending: {len(_pending_roll_requests)}")
+            result_future = websocket_manager.rpc_registry.register(client_id, request_id, 'modify_token_attribute')
+            logger.info(f"modify_token_attribute: Registered pending request. In flight for client: {websocket_manager.rpc_registry.in_flight(client_id)}")
             
             try:
                 # Send attribute modification request to frontend
@@ -1380,7 +1474,7 @@ class AIToolExecutor:
                     }
                 }
                 
-                await websocket_manager.send_to_client(client_id, modify_message)
+                await send_frontend_request(websocket_manager, client_id, modify_message)
                 logger.info(f"modify_token_attribute: Sent attribute modification request to client {client_id} for token {token_id}, request_id: {request_id}")
                 
                 # Wait for response with timeout (15 seconds - Foundry operations can be slow)
@@ -1419,11 +1513,8 @@ class AIToolExecutor:
                 finally:
                     # Clean up pending request
                     logger.info(f"Cleaning up future for request {request_id}")
-                    if request_id in _pending_roll_requests:
-                        del _pending_roll_requests[request_id]
-                        logger.info(f"Removed future for request {request_id} from _pending_roll_requests")
-                    else:
-                        logger.warning(f"Future for request {request_id} not found in _pending_roll_requests during cleanup")
+                    if websocket_manager.rpc_registry.release(client_id, request_id):
+                        logger.info(f"Released unanswered request {request_id}")
             
             except Exception as inner_error:
                 logger.error(f"modify_token_attribute: Error during attribute modification for client {client_id}: {inner_error}")
@@ -1440,64 +1531,36 @@ class AIToolExecutor:
             }
 
 
-def handle_roll_result(request_id: str, results: Any) -> None:
+def handle_roll_result(client_id: str, request_id: str, results: Any) -> None:
     """
     Handle incoming roll result from frontend
     Called when backend receives roll_result message
     
     Args:
+        client_id: Client the result came from
         request_id: Request ID from original roll_dice call
         results: Roll results from frontend
     """
-    if request_id in _pending_roll_requests:
-        future = _pending_roll_requests[request_id]
-        
-        try:
-            if not future.done():
-                future.set_result(results)
-                logger.info(f"Result set successfully for request {request_id}")
-            else:
-                logger.debug(f"Future already done for request {request_id}")
-        except Exception as e:
-            logger.error(f"Error setting future result for request {request_id}: {e}")
-            # Try to set exception if result setting failed
-            if not future.done():
-                try:
-                    future.set_exception(e)
-                except Exception as e2:
-                    logger.error(f"Error setting future exception: {e2}")
-    else:
-        logger.warning(f"Received roll result for unknown request_id: {request_id}")
+    from ..system_services.service_factory import get_websocket_manager
+    
+    if get_websocket_manager().rpc_registry.resolve(client_id, request_id, results):
+        logger.info(f"Result set successfully for request {request_id}")
 
 
-def handle_combat_state_result(request_id: str, results: Any) -> None:
+def handle_combat_state_result(client_id: str, request_id: str, results: Any) -> None:
     """
     Handle incoming combat state result from frontend
     Called when backend receives combat_state message in response to encounter management request
     
     Args:
+        client_id: Client the result came from
         request_id: Request ID from original encounter management call (create/delete/get)
         results: Combat state results from frontend (can be None for simple acknowledgment)
     """
-    if request_id in _pending_roll_requests:
-        future = _pending_roll_requests[request_id]
-        
-        try:
-            if not future.done():
-                future.set_result(results)
-                logger.info(f"Combat state result set successfully for request {request_id}")
-            else:
-                logger.debug(f"Future already done for combat state request {request_id}")
-        except Exception as e:
-            logger.error(f"Error setting combat state future result for request {request_id}: {e}")
-            # Try to set exception if result setting failed
-            if not future.done():
-                try:
-                    future.set_exception(e)
-                except Exception as e2:
-                    logger.error(f"Error setting future exception for combat state: {e2}")
-    else:
-        logger.warning(f"Received combat state result for unknown request_id: {request_id}")
+    from ..system_services.service_factory import get_websocket_manager
+    
+    if get_websocket_manager().rpc_registry.resolve(client_id, request_id, results):
+        logger.info(f"Combat state result set successfully for request {request_id}")
 
 
 def get_ai_tool_executor() -> AIToolExecutor:
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Frontend Request Batching for The Gold Box
+Sends several frontend operations in a single batch_request WebSocket frame
+
+The frontend runs the operations concurrently through their normal handlers
+and sends each response frame as soon as its handler produces it, exactly like
+the standalone frame it replaces. Responses still resolve their requests
+through the RPC registry, so per-request correlation, timeouts and disconnect
+handling are unchanged. Operations that failed or are still unanswered when
+their handlers return are reported in one batch_result frame.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import contextvars
+import logging
+import uuid
+from typing import Dict, Any, List, Optional, Set
+
+from shared.core.message_protocol import MessageProtocol
+
+logger = logging.getLogger(__name__)
+
+# Coalescer for the tool step currently executing in this task context (if any)
+_current_coalescer: contextvars.ContextVar[Optional["FrontendRequestCoalescer"]] = contextvars.ContextVar(
+    'frontend_request_coalescer', default=None
+)
+
+def reject_unsent(websocket_manager, client_id: str, requests: List[Dict[str, Any]]) -> None:
+    """
+    Fail the waiting requests of frames that could not be sent
+    
+    Args:
+        websocket_manager: WebSocket connection manager
+        client_id: Client the frames were meant for
+        requests: Request frames that were not sent
+    """
+    rpc_registry = websocket_manager.rpc_registry
+    for request in requests:
+        if rpc_registry.is_pending(client_id, request['request_id']):
+            rpc_registry.reject(
+                client_id, request['request_id'],
+                Exception(f"{request['type']} request not sent: client {client_id} unavailable")
+            )
+
+def build_batch_request(requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a batch_request frame from individual request frames
+    
+    Args:
+        requests: Request frames, each with type, request_id and data
+    
+    Returns:
+        batch_request frame
+    """
+    return {
+        "type": MessageProtocol.TYPE_BATCH_REQUEST,
+        "request_id": str(uuid.uuid4()),
+        "data": {
+            "requests": [
+                {
+                    "type": request["type"],
+                    "request_id": request["request_id"],
+                    "data": request.get("data", {})
+                }
+                for request in requests
+            ]
+        }
+    }
+
+async def send_frontend_requests(websocket_manager, client_id: str, requests: List[Dict[str, Any]]) -> bool:
+    """
+    Send request frames to a client, as one batch_request frame when there are several
+    
+    Args:
+        websocket_manager: WebSocket connection manager
+        client_id: Client to send to
+        requests: Request frames, each with type, request_id and data
+    
+    Returns:
+        True if the frame was sent
+    """
+    if not requests:
+        return True
+    if len(requests) == 1:
+        return await websocket_manager.send_to_client(client_id, requests[0])
+    
+    logger.info(f"Sending {len(requests)} frontend requests to client {client_id} in one batch: "
+                f"{[request['type'] for request in requests]}")
+    return await websocket_manager.send_to_client(client_id, build_batch_request(requests))
+
+async def send_frontend_request(websocket_manager, client_id: str, message: Dict[str, Any]) -> bool:
+    """
+    Send a request frame, joining the current tool step's batch when one is open
+    
+    Args:
+        websocket_manager: WebSocket connection manager
+        client_id: Client to send to
+        message: Request frame with type, request_id and data
+    
+    Returns:
+        True if the frame was sent or queued for the batch
+    """
+    coalescer = _current_coalescer.get()
+    if coalescer is not None and coalescer.client_id == client_id:
+        coalescer.add(websocket_manager, message)
+        return True
+    sent = await websocket_manager.send_to_client(client_id, message)
+    if not sent:
+        reject_unsent(websocket_manager, client_id, [message])
+    return sent
+
+class FrontendRequestCoalescer:
+    """
+    Collects request frames issued during one event-loop pass into a single batch
+    
+    Concurrent tools started together each reach their send before yielding,
+    so a flush scheduled with call_soon runs after all of them have queued
+    their frames. If the batch cannot be sent, every request in it is
+    rejected through the RPC registry so its tool fails at once.
+    
+    Each tool keeps awaiting its own future with its own timeout: the
+    frontend runs batch items concurrently and answers each one as it
+    completes, so a slow roll dialog does not hold up a quick actor lookup
+    that shared its frame. execute_frontend_batch is the variant with one
+    timeout for callers that need all results together.
+    """
+    
+    def __init__(self, client_id: str):
+        """
+        Initialize coalescer
+        
+        Args:
+            client_id: Client whose requests are coalesced
+        """
+        self.client_id = client_id
+        self.frames_sent = 0
+        self.requests_sent = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._websocket_manager = None
+        self._flush_scheduled = False
+        self._send_tasks: Set[asyncio.Task] = set()
+    
+    def add(self, websocket_manager, message: Dict[str, Any]) -> None:
+        """Queue a request frame for the next flush"""
+        self._websocket_manager = websocket_manager
+        self._pending.append(message)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+    
+    def _flush(self) -> None:
+        """Send everything queued so far"""
+        self._flush_scheduled = False
+        requests, self._pending = self._pending, []
+        if not requests:
+            return
+        
+        self.frames_sent += 1
+        self.requests_sent += len(requests)
+        task = asyncio.ensure_future(self._send(self._websocket_manager, requests))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+    
+    async def _send(self, websocket_manager, requests: List[Dict[str, Any]]) -> None:
+        """Send a flushed batch, failing its requests if the send is refused"""
+        try:
+            sent = await send_frontend_requests(websocket_manager, self.client_id, requests)
+        except Exception as e:
+            logger.error(f"Failed to send frontend batch to client {self.client_id}: {e}")
+            sent = False
+        if not sent:
+            reject_unsent(websocket_manager, self.client_id, requests)
+    
+    def activate(self) -> contextvars.Token:
+        """Make this coalescer current for tasks created from the calling context"""
+        return _current_coalescer.set(self)
+    
+    @staticmethod
+    def deactivate(token: contextvars.Token) -> None:
+        """Restore the previous coalescer"""
+        _current_coalescer.reset(token)
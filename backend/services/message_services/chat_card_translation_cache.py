@@ -2,20 +2,55 @@
 Chat Card Translation Cache - Phase 2 Implementation
 Manages dynamic code mappings for chat cards with caching and lifecycle management
 
+Field codes are snapshotted to disk (compact JSON, tagged with cache_version)
+shortly after new codes are assigned, and every new cache instance
+warm-starts from the snapshot. Saves are debounced and written from a worker
+thread, so the event loop never blocks on the file. The same field keeps the same code across AI turns and restarts,
+so compact chat cards - and the prompts embedding them - stay byte-identical.
+
 License: CC-BY-NC-SA 4.0 (compatible with dependencies)
 """
 
+import asyncio
+import atexit
+import json
 import logging
+import os
+import threading
 import time
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 
 from shared.core.simple_attribute_mapper import get_attribute_mapper
 from .dynamic_chat_card_analyzer import CardFieldInfo
+from .compact_conversion_cache import invalidate_compact_conversion_cache
 
 logger = logging.getLogger(__name__)
 
+# Get absolute path to backend directory
+BACKEND_DIR = Path(__file__).parent.parent.parent.absolute()
+
+# Snapshot of learned field codes (empty disables persistence)
+DEFAULT_SNAPSHOT_FILE = os.environ.get('TRANSLATION_CACHE_FILE', 'shared/server_files/translation_cache.json')
+
+# Snapshot layout version; snapshots in another layout are ignored
+SNAPSHOT_FORMAT = 1
+
+# Seconds to wait after new codes before saving, so a burst of new cards is written once
+SNAPSHOT_SAVE_DELAY = float(os.environ.get('TRANSLATION_CACHE_SAVE_DELAY', '2.0'))
+
+# Serializes snapshot writes from the event loop, worker threads and exit handler
+_snapshot_write_lock = threading.Lock()
+
+def get_absolute_path(relative_path: str) -> Path:
+    """
+    Convert a relative path to an absolute path based on backend directory.
+    This ensures consistent file operations regardless of where script is called from.
+    """
+    return (BACKEND_DIR / relative_path).resolve()
+
 @dataclass
 class FieldMapping:
     """Represents a mapping between a field name and its generated code"""
@@ -43,9 +78,15 @@ class ChatCardTranslationCache:
     Handles caching lifecycle and collision resolution
     """
     
-    def __init__(self):
-        """Initialize translation cache"""
+    def __init__(self, snapshot_file: Optional[str] = DEFAULT_SNAPSHOT_FILE):
+        """
+        Initialize translation cache
+        
+        Args:
+            snapshot_file: Snapshot path relative to the backend directory (None or empty disables persistence)
+        """
         self.logger = logging.getLogger(__name__)
+        self.snapshot_path = get_absolute_path(snapshot_file) if snapshot_file else None
         
         # Card type specific mappings
         self.card_mappings: Dict[str, CardTypeMapping] = {}
@@ -61,6 +102,15 @@ class ChatCardTranslationCache:
         self.cache_created_at = time.time()
         self.cache_version = 1
         
+        # Snapshot state
+        self.dirty = False
+        self.warm_started = False
+        self.reused_codes = 0
+        self.snapshot_saves = 0
+        self._save_handle: Optional[asyncio.TimerHandle] = None
+        self._snapshot_seq = 0
+        self._written_seq = 0
+        
         self.logger.info("ChatCardTranslationCache initialized")
     
     def generate_codes(self, card_type: str, fields: Dict[str, CardFieldInfo]) -> Tuple[Dict[str, str], Dict[str, str]]:
@@ -88,6 +138,16 @@ class ChatCardTranslationCache:
         sorted_fields = sorted(fields.items(), key=lambda x: x[1].confidence, reverse=True)
         
         for field_name, field_info in sorted_fields:
+            known = card_mapping.field_mappings.get(field_name)
+            if known is not None:
+                # Keep the code already assigned (possibly in a previous run)
+                known.field_type = field_info.field_type
+                known.confidence = field_info.confidence
+                field_to_code[field_name] = known.code
+                code_to_field[known.code] = field_name
+                self.reused_codes += 1
+                continue
+            
             # Generate code for this field with context awareness
             code = self._generate_field_code(field_name, field_info, card_type)
             
@@ -107,11 +167,15 @@ class ChatCardTranslationCache:
                 
                 card_mapping.field_mappings[field_name] = field_mapping
                 card_mapping.reverse_mappings[code] = field_name
+                self.dirty = True
         
         # Update card metadata
         card_mapping.last_used = time.time()
         card_mapping.total_fields = len(card_mapping.field_mappings)
         
+        if self.dirty:
+            self.schedule_snapshot_save()
+        
         # self.logger.info(f"Generated {len(field_to_code)} codes for {card_type}")
         return field_to_code, code_to_field
     
@@ -223,13 +287,197 @@ class ChatCardTranslationCache:
                 if field_name in card_mapping.field_mappings:
                     card_mapping.field_mappings[field_name].usage_count += 1
     
+    def to_snapshot(self) -> Dict[str, Any]:
+        """
+        Build the compact snapshot of learned field codes
+        
+        Returns:
+            JSON-serializable dictionary; field mappings are stored as
+            [field_name, code, field_type, confidence] rows per card type
+        """
+        return {
+            'format': SNAPSHOT_FORMAT,
+            'cache_version': self.cache_version,
+            'saved_at': time.time(),
+            'card_types': {
+                card_type: [
+                    [fm.field_name, fm.code, fm.field_type, fm.confidence]
+                    for fm in card_mapping.field_mappings.values()
+                ]
+                for card_type, card_mapping in self.card_mappings.items()
+            },
+            'used_codes': dict(self.used_codes),
+            'attribute_mapper': self.attribute_mapper.get_code_mapping()
+        }
+    
+    def load_snapshot_data(self, snapshot: Dict[str, Any]) -> bool:
+        """
+        Replace the current mappings with a snapshot
+        
+        Args:
+            snapshot: Dictionary from to_snapshot()
+        
+        Returns:
+            True if loaded, False if the snapshot has another layout
+        """
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            return False
+        
+        self.card_mappings.clear()
+        for card_type, rows in snapshot.get('card_types', {}).items():
+            card_mapping = CardTypeMapping(card_type=card_type)
+            for field_name, code, field_type, confidence in rows:
+                card_mapping.field_mappings[field_name] = FieldMapping(
+                    field_name=field_name,
+                    code=code,
+                    field_type=field_type,
+                    original_name=field_name,
+                    confidence=confidence
+                )
+                card_mapping.reverse_mappings[code] = field_name
+            card_mapping.total_fields = len(card_mapping.field_mappings)
+            self.card_mappings[card_type] = card_mapping
+        
+        self.used_codes = dict(snapshot.get('used_codes', {}))
+        for code, attr_name in snapshot.get('attribute_mapper', {}).items():
+            self.attribute_mapper.attribute_mapping.setdefault(code, attr_name)
+            self.attribute_mapper.reverse_mapping.setdefault(attr_name, code)
+        
+        # Same codes as when saved, so output built under this version is still valid
+        self.cache_version = snapshot.get('cache_version', self.cache_version)
+        self.dirty = False
+        self.warm_started = True
+        return True
+    
+    def load_snapshot(self) -> bool:
+        """
+        Warm-start from the snapshot file
+        
+        Returns:
+            True if a snapshot was loaded
+        """
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                loaded = self.load_snapshot_data(json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.warning(f"Ignoring unreadable translation cache snapshot {self.snapshot_path}: {e}")
+            return False
+        
+        if not loaded:
+            self.logger.info(f"Ignoring translation cache snapshot in another format: {self.snapshot_path}")
+            return False
+        
+        total_mappings = sum(len(cm.field_mappings) for cm in self.card_mappings.values())
+        self.logger.info(f"Translation cache warm-started with {total_mappings} field codes "
+                         f"for {len(self.card_mappings)} card types (version {self.cache_version})")
+        return True
+    
+    def schedule_snapshot_save(self) -> None:
+        """
+        Save the snapshot after SNAPSHOT_SAVE_DELAY seconds
+        
+        Further changes within the delay are written with the same save. The
+        snapshot is taken on the event loop and written by a worker thread.
+        Without a running event loop the snapshot is written immediately.
+        """
+        if self.snapshot_path is None or self._save_handle is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_snapshot()
+            return
+        
+        self._save_handle = loop.call_later(SNAPSHOT_SAVE_DELAY, self._save_in_background, loop)
+    
+    def _save_in_background(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Take the snapshot and hand the write to a worker thread"""
+        self._save_handle = None
+        if not self.dirty:
+            return
+        
+        seq, snapshot = self._take_snapshot()
+        future = loop.run_in_executor(None, self._write_snapshot, seq, snapshot)
+        future.add_done_callback(self._on_background_write)
+    
+    def _on_background_write(self, future: asyncio.Future) -> None:
+        """Keep the mappings dirty after a failed background write, so the next save retries"""
+        if future.cancelled() or future.exception() is not None or not future.result():
+            self.dirty = True
+    
+    def _take_snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """Capture the current mappings for a write"""
+        self._snapshot_seq += 1
+        self.dirty = False
+        return self._snapshot_seq, self.to_snapshot()
+    
+    def _write_snapshot(self, seq: int, snapshot: Dict[str, Any]) -> bool:
+        """
+        Write a captured snapshot unless a newer one was already written
+        
+        The file is replaced atomically, so a crash never leaves a partial snapshot.
+        
+        Args:
+            seq: Capture sequence number from _take_snapshot()
+            snapshot: Captured snapshot
+        
+        Returns:
+            True if the file holds this snapshot or a newer one
+        """
+        temp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with _snapshot_write_lock:
+            if seq <= self._written_seq:
+                return True
+            try:
+                self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, separators=(',', ':'))
+                os.replace(temp_path, self.snapshot_path)
+            except (OSError, TypeError, ValueError) as e:
+                self.logger.warning(f"Failed to save translation cache snapshot: {e}")
+                return False
+            
+            self._written_seq = seq
+            self.snapshot_saves += 1
+        return True
+    
+    def save_snapshot(self) -> bool:
+        """
+        Write the snapshot file now if mappings changed since the last save
+        
+        Used at AI turn reset and at exit; a pending debounced save is cancelled.
+        
+        Returns:
+            True if written
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        
+        if self.snapshot_path is None or not self.dirty:
+            return False
+        
+        seq, snapshot = self._take_snapshot()
+        if not self._write_snapshot(seq, snapshot):
+            self.dirty = True
+            return False
+        return True
+    
     def clear_cache(self):
-        """Clear all cached mappings"""
+        """Clear all cached mappings (the snapshot file is left as is)"""
         self.card_mappings.clear()
         self.used_codes.clear()
         self.collision_history.clear()
         self.cache_created_at = time.time()
         self.cache_version += 1
+        self.dirty = False
+        
+        # Compact conversions embed codes from these mappings - drop them too
+        invalidate_compact_conversion_cache(f"translation cache version {self.cache_version}")
         
         self.logger.info("Translation cache cleared")
     
@@ -254,6 +502,10 @@ class ChatCardTranslationCache:
             'total_mappings': total_mappings,
             'total_usages': total_usages,
             'collision_count': len(self.collision_history),
+            'warm_started': self.warm_started,
+            'reused_codes': self.reused_codes,
+            'snapshot_saves': self.snapshot_saves,
+            'snapshot_file': str(self.snapshot_path) if self.snapshot_path else None,
             'card_type_details': {
                 ct: {
                     'field_count': len(cm.field_mappings),
@@ -516,13 +768,21 @@ class ChatCardTranslationCache:
 # Global cache instance for current AI turn
 _current_cache: Optional[ChatCardTranslationCache] = None
 
+def _save_current_cache():
+    """Write codes still waiting for a debounced save (registered with atexit)"""
+    if _current_cache:
+        _current_cache.save_snapshot()
+
 def get_current_cache() -> ChatCardTranslationCache:
-    """Get current translation cache instance"""
+    """Get current translation cache instance (warm-started from the snapshot)"""
     global _current_cache
     if _current_cache is None:
         _current_cache = ChatCardTranslationCache()
+        _current_cache.load_snapshot()
     return _current_cache
 
+atexit.register(_save_current_cache)
+
 def clear_current_cache():
     """Clear current translation cache"""
     global _current_cache
@@ -531,9 +791,18 @@ def clear_current_cache():
     _current_cache = None
 
 def reset_cache():
-    """Reset cache for new AI turn"""
+    """Reset cache for new AI turn (learned field codes carry over through the snapshot)"""
+    stale_version = None
+    if _current_cache:
+        _current_cache.save_snapshot()
+        if _current_cache.dirty:
+            # Snapshot could not be written; reloaded codes may differ from the ones in use
+            stale_version = _current_cache.cache_version
     clear_current_cache()
-    return get_current_cache()
+    cache = get_current_cache()
+    if stale_version is not None:
+        cache.cache_version = max(cache.cache_version, stale_version) + 1
+    return cache
 
 def is_cache_active() -> bool:
     """Check if cache is currently active"""
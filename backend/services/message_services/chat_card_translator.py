@@ -5,6 +5,7 @@ Handles bidirectional translation of chat cards between HTML and compact JSON
 License: CC-BY-NC-SA 4.0 (compatible with dependencies)
 """
 
+import bisect
 import logging
 import json
 import re
@@ -13,7 +14,7 @@ from collections import defaultdict
 from bs4 import BeautifulSoup, Tag
 
 from services.message_services.chat_card_translation_cache import ChatCardTranslationCache, get_current_cache
-from services.message_services.dynamic_chat_card_analyzer import CardFieldInfo, analyze_chat_card
+from services.message_services.dynamic_chat_card_analyzer import CardDomScan, CardFieldInfo, analyze_chat_card
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +106,11 @@ class ChatCardTranslator:
         """
         Detect duplicate values across cards and replace with abbreviations
         
+        Values are interned in one pass: each field value is hashed once and
+        counted against the first card field it appeared in. Abbreviations are
+        numbered in first-occurrence order, and only cards that contain an
+        abbreviated value are copied.
+        
         Args:
             message_data: List of compact card data
             
@@ -114,66 +120,52 @@ class ChatCardTranslator:
         if not message_data:
             return message_data, {}
         
-        # Count occurrences of each value across all cards
-        value_counts = defaultdict(int)
-        value_locations = []  # Track where each value appears
+        # value_key -> [first occurrence of the value, occurrence count], in first-occurrence order
+        interned: Dict[Any, List[Any]] = {}
+        # Per card: value keys of its fields in field order (None for cards without fields)
+        card_keys: List[Optional[List[Any]]] = []
         
-        for card_idx, card in enumerate(message_data):
+        for card in message_data:
             if 'f' not in card or not isinstance(card['f'], dict):
+                card_keys.append(None)
                 continue
-                
-            for code, value in card['f'].items():
-                # Convert value to hashable form for counting
+            
+            keys = []
+            for value in card['f'].values():
+                # Convert value to hashable form once per field
                 value_key = self._make_value_hashable(value)
-                value_counts[value_key] += 1
-                value_locations.append((card_idx, code, value_key, value))
-        
-        # Find values that appear more than once
-        duplicate_values = {k: v for k, v in value_counts.items() if v > 1}
-        
-        if not duplicate_values:
-            return message_data, {}
+                entry = interned.get(value_key)
+                if entry is None:
+                    interned[value_key] = [value, 1]
+                else:
+                    entry[1] += 1
+                keys.append(value_key)
+            card_keys.append(keys)
         
-        # Assign abbreviations to duplicate values
+        # Assign abbreviations to values that appear more than once
         value_dict = {}
-        abbreviation_counter = 1
-        
-        for value_key, count in duplicate_values.items():
-            if count > 1:
-                abbreviation = f"@v{abbreviation_counter}"
-                # Find the actual value for this key
-                for _, _, _, actual_value in value_locations:
-                    if self._make_value_hashable(actual_value) == value_key:
-                        value_dict[abbreviation] = actual_value
-                        break
-                abbreviation_counter += 1
-        
-        # Create reverse lookup: value_key -> abbreviation
         value_to_abbreviation = {}
-        for abbreviation, actual_value in value_dict.items():
-            value_key = self._make_value_hashable(actual_value)
-            value_to_abbreviation[value_key] = abbreviation
+        for value_key, (actual_value, count) in interned.items():
+            if count > 1:
+                abbreviation = f"@v{len(value_dict) + 1}"
+                value_dict[abbreviation] = actual_value
+                value_to_abbreviation[value_key] = abbreviation
+        
+        if not value_dict:
+            return message_data, {}
         
         # Update cards with abbreviations
         updated_cards = []
-        for card in message_data:
-            updated_card = card.copy()
-            
-            if 'f' in updated_card and isinstance(updated_card['f'], dict):
-                updated_fields = {}
-                
-                for code, value in updated_card['f'].items():
-                    value_key = self._make_value_hashable(value)
-                    
-                    if value_key in value_to_abbreviation:
-                        # Replace with abbreviation
-                        updated_fields[code] = value_to_abbreviation[value_key]
-                    else:
-                        # Keep original value
-                        updated_fields[code] = value
-                
-                updated_card['f'] = updated_fields
+        for card, keys in zip(message_data, card_keys):
+            if keys is None or not any(value_key in value_to_abbreviation for value_key in keys):
+                updated_cards.append(card)
+                continue
             
+            updated_card = card.copy()
+            updated_card['f'] = {
+                code: value_to_abbreviation.get(value_key, value)
+                for (code, value), value_key in zip(card['f'].items(), keys)
+            }
             updated_cards.append(updated_card)
         
         duplicates_found = len(value_dict)
@@ -185,6 +177,10 @@ class ChatCardTranslator:
         """
         Detect and remove redundant fields within each card (90% containment threshold)
         
+        A field can only be 90%+ contained in a field whose cleaned text is at
+        least as long and at most 1/0.9 times as long, so each field is only
+        compared against that length window of a length-sorted candidate list.
+        
         Args:
             message_data: List of compact card data
             
@@ -194,6 +190,7 @@ class ChatCardTranslator:
         if not message_data:
             return message_data
         
+        threshold = 0.9
         processed_cards = []
         
         for card in message_data:
@@ -202,24 +199,32 @@ class ChatCardTranslator:
                 continue
             
             fields = card['f']
+            codes = list(fields)
+            
+            # Text candidates as (cleaned length, field position), sorted by length;
+            # only strings can be contained (see _is_contained)
+            candidates = sorted(
+                (len(value.strip().lower()), position)
+                for position, value in enumerate(fields.values())
+                if isinstance(value, str) and self._is_redundancy_candidate(value)
+            )
+            lengths = [length for length, _ in candidates]
             redundant_codes = set()
             
-            # Compare each field against every other field within same card
-            for code1, value1 in fields.items():
-                # Skip non-text fields, numbers, booleans
-                if not self._is_redundancy_candidate(value1):
-                    continue
-                    
-                for code2, value2 in fields.items():
-                    if code1 == code2:
-                        continue
-                    
-                    # Skip non-text fields for comparison
-                    if not self._is_redundancy_candidate(value2):
-                        continue
+            # Compare each field against the fields in its length window, in field order
+            for length1, position1 in sorted(candidates, key=lambda candidate: candidate[1]):
+                code1 = codes[position1]
+                value1 = fields[code1]
+                window = candidates[bisect.bisect_left(lengths, length1):
+                                    bisect.bisect_right(lengths, length1 / threshold + 1)]
+                
+                # The first containing field in field order wins, as in a field-order scan
+                for position2 in sorted(position for _, position in window if position != position1):
+                    code2 = codes[position2]
+                    value2 = fields[code2]
                     
                     # Check if value1 is 90%+ contained in value2
-                    if self._is_contained(value1, value2, 0.9):
+                    if self._is_contained(value1, value2, threshold):
                         # Special case: if both fields are 100% identical, prefer the longer field name
                         if (len(str(value1)) == len(str(value2)) and 
                             len(str(code1)) != len(str(code2))):
@@ -236,6 +241,10 @@ class ChatCardTranslator:
                             self.logger.debug(f"Field '{code1}' is 90%+ contained in '{code2}', marked for removal")
                             break
             
+            if not redundant_codes:
+                processed_cards.append(card)
+                continue
+            
             # Remove redundant fields, keeping preferred one
             cleaned_fields = {}
             for code, value in fields.items():
@@ -369,13 +378,15 @@ class ChatCardTranslator:
             # Convert other objects to string
             return str(value)
     
-    def html_to_compact(self, html_content: str, card_type: Optional[str] = None) -> Dict[str, Any]:
+    def html_to_compact(self, html_content: str, card_type: Optional[str] = None,
+                        scan: Optional[CardDomScan] = None) -> Dict[str, Any]:
         """
         Convert HTML chat card to compact JSON format
         
         Args:
             html_content: Raw HTML from Foundry chat card
             card_type: Optional card type (auto-detected if None)
+            scan: Optional DOM scan from an earlier parse of the same HTML
             
         Returns:
             Compact JSON representation
@@ -384,7 +395,29 @@ class ChatCardTranslator:
             self.logger.debug(f"Converting HTML to compact format")
             
             # Analyze card structure
-            analysis = analyze_chat_card(html_content)
+            analysis = analyze_chat_card(html_content, scan)
+        except Exception as e:
+            self.logger.error(f"Failed to convert HTML to compact format: {e}")
+            raise ValueError(f"HTML to compact conversion failed: {e}")
+        
+        return self.compact_from_analysis(analysis, card_type)
+    
+    def compact_from_analysis(self, analysis: Dict[str, Any], card_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the compact JSON of a chat card from its structure analysis
+        
+        Analysis (parsing and field discovery) has no side effects and may run
+        in another process; this step assigns field codes from the translation
+        cache and must run where the cache lives.
+        
+        Args:
+            analysis: Result of analyze_chat_card()
+            card_type: Optional card type (detected type if None)
+            
+        Returns:
+            Compact JSON representation
+        """
+        try:
             detected_card_type = analysis['card_type']
             fields = analysis['fields']
             
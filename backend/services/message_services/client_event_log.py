@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Client Event Log for The Gold Box
+Everything one WebSocket client has sent, in a single per-client record
+
+Chat messages and dice rolls are appended to the client's item store; combat
+encounters, the game delta and the world state are kept as their latest
+snapshot. Every event is stamped with a version from one process-wide
+counter, so readers can tell whether a view changed since they last looked
+without comparing payloads, and dropping a client is a single dictionary pop.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+from typing import Dict, Any, Optional
+
+from .client_item_store import ClientItemStore
+
+# Typed views of the log
+VIEW_CHAT = 'chat'
+VIEW_ROLLS = 'rolls'
+VIEW_COMBAT = 'combat'
+VIEW_GAME_DELTA = 'game_delta'
+VIEW_WORLD_STATE = 'world_state'
+VIEWS = (VIEW_CHAT, VIEW_ROLLS, VIEW_COMBAT, VIEW_GAME_DELTA, VIEW_WORLD_STATE)
+
+class ClientEventLog:
+    """
+    Chat, rolls, combat, game delta and world state of one client
+    
+    The collector owns the logs and does validation; this class only holds
+    the views and their versions.
+    """
+    
+    def __init__(self, max_messages: int, max_rolls: int):
+        """
+        Initialize event log
+        
+        Args:
+            max_messages: Capacity of the chat message buffer
+            max_rolls: Capacity of the dice roll buffer
+        """
+        self.items = ClientItemStore(max_messages, max_rolls)
+        # encounter_id -> latest combat state
+        self.combat_states: Dict[str, Dict[str, Any]] = {}
+        self.game_delta: Optional[Dict[str, Any]] = None
+        self.world_state: Optional[Dict[str, Any]] = None
+        
+        # Version of the last event per view, and event counts per view
+        self.versions: Dict[str, int] = {}
+        self.event_counts: Dict[str, int] = dict.fromkeys(VIEWS, 0)
+    
+    def record(self, view: str, version: int) -> None:
+        """
+        Stamp an event on a view
+        
+        Args:
+            view: One of VIEWS
+            version: Next value of the collector's process-wide counter
+        """
+        self.versions[view] = version
+        self.event_counts[view] += 1
+    
+    def version(self, view: str) -> int:
+        """Version of the last event on a view, or 0 if the view is empty"""
+        return self.versions.get(view, 0)
+    
+    def forget(self, view: str) -> None:
+        """Mark a view as cleared so its version reads as 0 again"""
+        self.versions.pop(view, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get event log statistics
+        
+        Returns:
+            Dictionary with view sizes, event counts and versions
+        """
+        return {
+            'messages': len(self.items.messages),
+            'rolls': len(self.items.rolls),
+            'encounters': len(self.combat_states),
+            'has_game_delta': self.game_delta is not None,
+            'has_world_state': self.world_state is not None,
+            'event_counts': dict(self.event_counts),
+            'versions': dict(self.versions)
+        }
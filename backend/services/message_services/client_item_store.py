@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Client Item Store for The Gold Box
+Fixed-capacity chat message and dice roll buffers with a merged timestamp index
+
+Messages and rolls are kept in separate ring buffers so each has its own
+capacity. Every stored item is also entered in one timestamp-ordered index on
+insert, so reading the last N items or the items newer than a timestamp is a
+bisect plus a slice instead of a concatenate-filter-sort of both buffers.
+
+Timestamps are normalized to integer milliseconds once, when the item is
+stored. Delta reads for a session keep a cursor (watermark and index position)
+that is adjusted on insert and eviction, so repeated reads skip the bisect.
+
+Ingestion is idempotent: every stored item carries an ingest key (its Foundry
+message ID, or a hash of its content when it has none) and an item whose key
+is already buffered is rejected with a set lookup and counted as redundant.
+Keys leave the set together with their evicted items.
+
+Compact JSON produced by the background conversion stage is kept beside each
+buffered record, tagged with the translation cache version it was built under.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import bisect
+import hashlib
+import itertools
+import json
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Tuple, Deque, Optional
+
+# Index tie-breakers: at equal timestamps messages sort before rolls, then by arrival
+KIND_MESSAGE = 0
+KIND_ROLL = 1
+
+# Never returned by reads (combat context only comes from the get_encounter tool)
+EXCLUDED_TYPES = frozenset({'combat_context'})
+
+# Delta cursors kept per client (one per AI session reading this client's items)
+MAX_CURSORS = 16
+
+# Fields added by the backend on ingest; excluded from content hashes
+INGEST_FIELDS = frozenset({'client_id'})
+
+# (timestamp in ms, kind, arrival sequence)
+IndexKey = Tuple[int, int, int]
+
+def ingest_key(item: Dict[str, Any], is_roll: bool) -> Optional[str]:
+    """
+    Identity of a message or roll for duplicate detection
+    
+    Messages and rolls have separate key spaces, since one Foundry message
+    containing a roll is sent both as a chat message and as a dice roll.
+    
+    Args:
+        item: Message or roll data as received (before the backend adds fields)
+        is_roll: Key the item as a dice roll
+    
+    Returns:
+        Key from the Foundry message ID, else a content hash; None when the
+        item has neither an ID nor a timestamp (identical repeats may be real)
+    """
+    prefix = 'roll' if is_roll else 'message'
+    foundry_id = item.get('_id') or item.get('id')
+    if foundry_id:
+        return f"{prefix}:id:{foundry_id}"
+    
+    if item.get('timestamp') is None and item.get('ts') is None:
+        return None
+    payload = json.dumps(
+        {field: value for field, value in item.items() if field not in INGEST_FIELDS},
+        sort_keys=True, separators=(',', ':'), default=str
+    )
+    return f"{prefix}:sha256:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+def is_rendered_message(item: Dict[str, Any]) -> bool:
+    """
+    Check whether a message carries the rendered chat message element
+    
+    Messages collected from the chat log (chat_request) are the whole
+    <li class="chat-message"> element, header and sender included; live
+    chat_message frames only carry the inner message content.
+    
+    Args:
+        item: Message data (may be None)
+    
+    Returns:
+        True if the content is a rendered chat message element
+    """
+    content = item.get('content') if item else None
+    if not isinstance(content, str):
+        return False
+    content = content.lstrip()
+    first_tag = content[:content.find('>') + 1]
+    return first_tag.startswith('<li') and 'chat-message' in first_tag
+
+class ClientItemStore:
+    """
+    Chat messages and dice rolls of one client
+    
+    Capacity is enforced per kind; when a buffer is full the oldest item of
+    that kind is evicted from both the buffer and the index.
+    """
+    
+    def __init__(self, max_messages: int, max_rolls: int):
+        """
+        Initialize store
+        
+        Args:
+            max_messages: Capacity of the message buffer
+            max_rolls: Capacity of the roll buffer
+        """
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=max_messages)
+        self.rolls: Deque[Dict[str, Any]] = deque(maxlen=max_rolls)
+        # (index key, ingest key) per buffer slot, parallel to messages / rolls
+        self._message_keys: Deque[Tuple[IndexKey, Optional[str]]] = deque()
+        self._roll_keys: Deque[Tuple[IndexKey, Optional[str]]] = deque()
+        # Ingest key -> buffered item, for duplicate rejection and replacement
+        self._ingest_items: Dict[str, Dict[str, Any]] = {}
+        # id(item) -> (translation cache version, compact JSON or None) per buffered item;
+        # None until converted. Entries leave with their items, so ids are never reused while present
+        self._compact: Dict[int, Optional[Tuple[int, Optional[Dict[str, Any]]]]] = {}
+        # Merged index: sorted keys and the items they belong to
+        self._index_keys: List[IndexKey] = []
+        self._index_items: List[Dict[str, Any]] = []
+        self._sequence = itertools.count()
+        # cursor_id -> [watermark, index position of the first item newer than it]
+        self._cursors: "OrderedDict[str, List[int]]" = OrderedDict()
+        
+        # Ingest statistics
+        self.stored = 0
+        self.replaced = 0
+        self.duplicates = [0, 0]  # Per kind: messages, rolls
+        self.duplicate_content_chars = 0
+    
+    def is_duplicate(self, key: Optional[str], item: Dict[str, Any], is_roll: bool) -> bool:
+        """
+        Check whether an item with this ingest key is already buffered, counting it if so
+        
+        Args:
+            key: Ingest key from ingest_key() (None is never a duplicate)
+            item: Incoming item, for the redundant traffic counters
+            is_roll: Count the item as a dice roll
+        
+        Returns:
+            True if the item is a duplicate and should not be stored
+        """
+        if key is None or key not in self._ingest_items:
+            return False
+        
+        self.duplicates[KIND_ROLL if is_roll else KIND_MESSAGE] += 1
+        content = item.get('content')
+        if isinstance(content, str):
+            self.duplicate_content_chars += len(content)
+        return True
+    
+    def add_message(self, message: Dict[str, Any], timestamp_ms: int, key: Optional[str] = None) -> None:
+        """Store a chat message with its normalized timestamp and ingest key, evicting the oldest one when full"""
+        self._add(message, timestamp_ms, key, KIND_MESSAGE, self.messages, self._message_keys)
+    
+    def add_roll(self, roll_data: Dict[str, Any], timestamp_ms: int, key: Optional[str] = None) -> None:
+        """Store a dice roll with its normalized timestamp and ingest key, evicting the oldest one when full"""
+        self._add(roll_data, timestamp_ms, key, KIND_ROLL, self.rolls, self._roll_keys)
+    
+    def _add(self, item: Dict[str, Any], timestamp_ms: int, ingest: Optional[str], kind: int,
+             buffer: Deque, keys: Deque) -> None:
+        """Append to a buffer and the index"""
+        if buffer.maxlen == 0:
+            return
+        if len(buffer) == buffer.maxlen:
+            self._compact.pop(id(buffer.popleft()), None)
+            evicted_key, evicted_ingest = keys.popleft()
+            self._ingest_items.pop(evicted_ingest, None)
+            self._unindex(evicted_key)
+        
+        key = (timestamp_ms, kind, next(self._sequence))
+        buffer.append(item)
+        keys.append((key, ingest))
+        self._compact[id(item)] = None
+        if ingest is not None:
+            self._ingest_items[ingest] = item
+        self.stored += 1
+        
+        if item.get('type') not in EXCLUDED_TYPES:
+            position = bisect.bisect_right(self._index_keys, key)
+            self._index_keys.insert(position, key)
+            self._index_items.insert(position, item)
+            for cursor in self._cursors.values():
+                if timestamp_ms <= cursor[0]:
+                    cursor[1] += 1  # Inserted before the cursor
+    
+    def get_item(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Buffered item with this ingest key, or None"""
+        return self._ingest_items.get(key) if key is not None else None
+    
+    def replace_message(self, key: Optional[str], message: Dict[str, Any]) -> bool:
+        """
+        Swap a buffered message for another copy of the same message
+        
+        The replacement keeps the original's place in the buffer and the
+        index (and its timestamp), so delta cursors are unaffected; its
+        compact JSON is converted again.
+        
+        Args:
+            key: Ingest key of the buffered message
+            message: New copy
+        
+        Returns:
+            True if replaced, False if no buffered message has this key
+        """
+        old = self.get_item(key)
+        if old is None:
+            return False
+        
+        # Duplicates usually arrive shortly after the original, so search from the newest
+        for position in range(len(self.messages) - 1, -1, -1):
+            if self.messages[position] is old:
+                break
+        else:
+            return False
+        
+        if 'timestamp' in old:
+            message['timestamp'] = old['timestamp']
+        self.messages[position] = message
+        self._ingest_items[key] = message
+        self._compact.pop(id(old), None)
+        self._compact[id(message)] = None
+        
+        index_key = self._message_keys[position][0]
+        index_position = bisect.bisect_left(self._index_keys, index_key)
+        if index_position < len(self._index_keys) and self._index_keys[index_position] == index_key:
+            self._index_items[index_position] = message
+        self.replaced += 1
+        return True
+    
+    def _unindex(self, key: IndexKey) -> None:
+        """Remove an evicted item from the index (no-op for excluded items)"""
+        position = bisect.bisect_left(self._index_keys, key)
+        if position < len(self._index_keys) and self._index_keys[position] == key:
+            del self._index_keys[position]
+            del self._index_items[position]
+            for cursor in self._cursors.values():
+                if position < cursor[1]:
+                    cursor[1] -= 1
+    
+    def needs_compact(self, item: Dict[str, Any]) -> bool:
+        """Check whether a buffered item has no compact JSON yet"""
+        return id(item) in self._compact and self._compact[id(item)] is None
+    
+    def set_compact(self, item: Dict[str, Any], version: int, compact: Optional[Dict[str, Any]]) -> bool:
+        """
+        Attach compact JSON to a buffered item
+        
+        Args:
+            item: Stored item
+            version: Translation cache version the conversion used
+            compact: Compact JSON (None for items without content)
+        
+        Returns:
+            True if attached, False if the item is no longer buffered
+        """
+        if id(item) not in self._compact:
+            return False
+        self._compact[id(item)] = (version, compact)
+        return True
+    
+    def get_compact(self, item: Dict[str, Any], version: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Compact JSON attached to a buffered item
+        
+        Args:
+            item: Stored item
+            version: Current translation cache version
+        
+        Returns:
+            (found, compact); found is False when missing or built under another version
+        """
+        entry = self._compact.get(id(item))
+        if entry is None or entry[0] != version:
+            return False, None
+        return True, entry[1]
+    
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        """
+        Get ingest statistics
+        
+        Returns:
+            Dictionary with stored and redundant item counts
+        """
+        duplicates = sum(self.duplicates)
+        received = self.stored + duplicates
+        return {
+            'stored': self.stored,
+            'replaced': self.replaced,
+            'duplicate_messages': self.duplicates[KIND_MESSAGE],
+            'duplicate_rolls': self.duplicates[KIND_ROLL],
+            'duplicate_content_chars': self.duplicate_content_chars,
+            'redundant_ratio': round(duplicates / received, 3) if received else 0.0,
+            'tracked_keys': len(self._ingest_items)
+        }
+    
+    def __len__(self) -> int:
+        """Number of indexed (readable) items"""
+        return len(self._index_items)
+    
+    def all_items(self) -> List[Dict[str, Any]]:
+        """All readable items, oldest first"""
+        return list(self._index_items)
+    
+    def last(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Most recent items
+        
+        Args:
+            count: Maximum number of items
+        
+        Returns:
+            Up to count items, oldest first
+        """
+        if count <= 0:
+            return []
+        return self._index_items[-count:]
+    
+    def last_messages(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Most recent chat messages, skipping rolls
+        
+        Args:
+            count: Maximum number of messages
+        
+        Returns:
+            Up to count messages, oldest first
+        """
+        if count <= 0:
+            return []
+        selected = []
+        for position in range(len(self._index_keys) - 1, -1, -1):
+            if self._index_keys[position][1] == KIND_MESSAGE:
+                selected.append(self._index_items[position])
+                if len(selected) == count:
+                    break
+        selected.reverse()
+        return selected
+    
+    def newest_timestamp(self) -> Optional[int]:
+        """Timestamp (ms) of the newest readable item, or None when empty"""
+        return self._index_keys[-1][0] if self._index_keys else None
+    
+    def newer_than(self, timestamp_ms: int, cursor_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Items with a timestamp strictly greater than the given one
+        
+        Args:
+            timestamp_ms: Exclusive lower bound in milliseconds
+            cursor_id: Reader to keep a cursor for (e.g. the AI session ID)
+        
+        Returns:
+            Matching items, oldest first
+        """
+        cursor = self._cursors.get(cursor_id) if cursor_id is not None else None
+        if cursor is not None and cursor[0] == timestamp_ms:
+            self._cursors.move_to_end(cursor_id)
+            return self._index_items[cursor[1]:]
+        
+        position = bisect.bisect_right(self._index_keys, (timestamp_ms, KIND_ROLL + 1, 0))
+        if cursor_id is not None:
+            self._cursors[cursor_id] = [timestamp_ms, position]
+            self._cursors.move_to_end(cursor_id)
+            while len(self._cursors) > MAX_CURSORS:
+                self._cursors.popitem(last=False)
+        return self._index_items[position:]
@@ -0,0 +1,193 @@
+"""
+Compact Conversion Cache - content-addressed cache for HTML → compact JSON
+Avoids re-converting the same Foundry chat messages on every AI turn
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import copy
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Defaults sized for the collector window (last 100 messages per client) across
+# a handful of connected clients
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 1800.0
+
+# Whitespace between tags does not change the extracted content
+_INTER_TAG_WHITESPACE = re.compile(r'>\s+<')
+
+class CompactConversionCache:
+    """
+    LRU/TTL cache of compact JSON conversions keyed by normalized HTML hash
+    
+    Keys also include the chat card translation cache version, because chat
+    card field codes depend on the mappings held there. Entries are copied on
+    the way in and out so callers may mutate the returned dict freely.
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Initialize compact conversion cache
+        
+        Args:
+            max_entries: Maximum number of cached conversions (LRU eviction beyond this)
+            ttl_seconds: Entry lifetime in seconds (0 disables expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        
+        # key -> (stored_at, compact_dict), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        
+        logger.info(f"CompactConversionCache initialized (max_entries={max_entries}, ttl={ttl_seconds}s)")
+    
+    @staticmethod
+    def normalize_html(html_content: str) -> str:
+        """
+        Normalize HTML so formatting-only differences share a cache entry
+        
+        Args:
+            html_content: Raw HTML from Foundry
+        
+        Returns:
+            Normalized HTML string
+        """
+        normalized = html_content.replace('\r\n', '\n').strip()
+        return _INTER_TAG_WHITESPACE.sub('><', normalized)
+    
+    def make_key(self, html_content: str, version: int) -> str:
+        """
+        Build the content-addressed key for an HTML message
+        
+        Args:
+            html_content: Raw HTML from Foundry
+            version: Chat card translation cache version
+        
+        Returns:
+            Cache key string
+        """
+        digest = hashlib.sha256(self.normalize_html(html_content).encode('utf-8')).hexdigest()
+        return f"{version}:{digest}"
+    
+    def get(self, html_content: str, version: int) -> Optional[Dict[str, Any]]:
+        """
+        Look up a previous conversion
+        
+        Args:
+            html_content: Raw HTML from Foundry
+            version: Chat card translation cache version
+        
+        Returns:
+            Copy of the cached compact dict, or None on miss
+        """
+        key = self.make_key(html_content, version)
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            stored_at, compact = entry
+            if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        return copy.deepcopy(compact)
+    
+    def put(self, html_content: str, version: int, compact: Dict[str, Any]):
+        """
+        Store a conversion result
+        
+        Args:
+            html_content: Raw HTML from Foundry
+            version: Chat card translation cache version
+            compact: Compact JSON produced for html_content
+        """
+        if self.max_entries <= 0:
+            return
+        
+        key = self.make_key(html_content, version)
+        stored = copy.deepcopy(compact)
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, reason: str = ''):
+        """
+        Drop all cached conversions
+        
+        Args:
+            reason: Optional reason for logging
+        """
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self.invalidations += 1
+        
+        if dropped:
+            logger.debug(f"Compact conversion cache invalidated ({dropped} entries){': ' + reason if reason else ''}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+        
+        Returns:
+            Dictionary with cache statistics
+        """
+        with self._lock:
+            size = len(self._entries)
+        
+        lookups = self.hits + self.misses
+        return {
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations
+        }
+
+# Global cache instance shared by all message conversion paths
+_compact_cache: Optional[CompactConversionCache] = None
+
+def get_compact_conversion_cache() -> CompactConversionCache:
+    """Get the global compact conversion cache instance"""
+    global _compact_cache
+    if _compact_cache is None:
+        _compact_cache = CompactConversionCache()
+    return _compact_cache
+
+def invalidate_compact_conversion_cache(reason: str = ''):
+    """Invalidate the global compact conversion cache if it exists"""
+    if _compact_cache is not None:
+        _compact_cache.invalidate(reason)
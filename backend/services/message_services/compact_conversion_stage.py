@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Compact Conversion Stage for The Gold Box
+Converts stored chat messages to compact JSON in the background, as they arrive
+
+Every message stored by the WebSocket collector is queued here. A worker task
+converts queued messages in batches, with HTML parsing in the HTML parse pool,
+and keeps each result next to the raw record in the client's item store, tagged
+with the translation cache version it was produced under. An AI turn then reads
+precomputed records; readers first prepare() their window, which converts any
+message that arrived too recently or was converted under an older version.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import copy
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple, List
+
+from .client_item_store import ClientItemStore
+
+logger = logging.getLogger(__name__)
+
+# Messages waiting for conversion; beyond this the oldest are left for lazy conversion
+DEFAULT_MAX_QUEUE_SIZE = int(os.environ.get('COMPACT_PRECOMPUTE_QUEUE_SIZE', 1000))
+
+# Messages the worker converts per batch
+DEFAULT_BATCH_SIZE = int(os.environ.get('COMPACT_PRECOMPUTE_BATCH_SIZE', 32))
+
+def convert_message_to_compact(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a stored raw HTML message to compact JSON
+    
+    Args:
+        message: Stored message with HTML content and optional timestamp
+    
+    Returns:
+        Compact JSON dictionary, or None for messages without content
+    
+    Raises:
+        ValueError: If conversion fails
+    """
+    # Import unified processor at function level to avoid circular import issues
+    from shared.core.unified_message_processor import get_unified_processor
+    
+    if not _has_content(message):
+        return None
+    
+    # Use unified processor for all HTML parsing - no duplicate logic
+    return _apply_timestamp(message, get_unified_processor().html_to_compact_json(message["content"]))
+
+def _has_content(message: Dict[str, Any]) -> bool:
+    """Check whether a message has content to convert (empty messages are skipped)"""
+    content = message.get("content", "")
+    return bool(content and content.strip())
+
+def _apply_timestamp(message: Dict[str, Any], parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Give converted compact JSON the message's own timestamp"""
+    original_timestamp = message.get("timestamp")
+    
+    # Override with original timestamp if provided, otherwise use current time
+    if 'ts' in parsed:
+        if original_timestamp is not None:
+            parsed['ts'] = original_timestamp
+    else:
+        # Generate timestamp from message if not provided
+        parsed['ts'] = int(time.time() * 1000)
+    
+    return parsed
+
+def _translation_cache_version() -> int:
+    """Translation cache version compact chat card output currently depends on"""
+    from shared.core.unified_message_processor import get_unified_processor
+    return get_unified_processor().translation_cache_version()
+
+class CompactConversionStage:
+    """
+    Background HTML → compact JSON conversion of stored messages
+    
+    The worker hands HTML parsing to the HTML parse pool and only assigns
+    field codes on the event loop, so conversions fill idle time without
+    stalling WebSocket handling.
+    """
+    
+    def __init__(self, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Initialize conversion stage
+        
+        Args:
+            max_queue_size: Maximum number of messages waiting for conversion
+            batch_size: Messages converted per worker batch
+        """
+        self.max_queue_size = max(1, max_queue_size)
+        self.batch_size = max(1, batch_size)
+        self._queue: Deque[Tuple[ClientItemStore, Dict[str, Any]]] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        
+        # Statistics
+        self.submitted = 0
+        self.precomputed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.read_precomputed = 0
+        self.read_converted = 0
+    
+    def submit(self, store: ClientItemStore, item: Dict[str, Any]) -> bool:
+        """
+        Queue a freshly stored message for conversion
+        
+        Args:
+            store: Item store holding the message
+            item: Stored message
+        
+        Returns:
+            True if queued (False without a running event loop)
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # Converted on first read instead
+        
+        if len(self._queue) >= self.max_queue_size:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append((store, item))
+        self.submitted += 1
+        
+        if self._worker is None or self._worker.done():
+            self._ready = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+        self._ready.set()
+        return True
+    
+    async def _run(self) -> None:
+        """Worker task: convert queued messages in batches"""
+        while True:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                store, item = self._queue.popleft()
+                if store.needs_compact(item):
+                    batch.append((store, item))
+            
+            try:
+                self.precomputed += await self._convert(batch)
+            except Exception as e:
+                logger.error(f"Background compact conversion batch failed: {e}")
+            await asyncio.sleep(0)
+    
+    async def _convert(self, pairs: List[Tuple[ClientItemStore, Dict[str, Any]]]) -> int:
+        """
+        Convert messages and attach the results to their records
+        
+        Failed conversions are left unattached; the reader converts them
+        again and reports the error in its own context.
+        
+        Returns:
+            Number of records that received compact JSON
+        """
+        from shared.core.unified_message_processor import get_unified_processor
+        
+        if not pairs:
+            return 0
+        
+        version = _translation_cache_version()
+        attached = 0
+        with_content = []
+        for store, item in pairs:
+            if _has_content(item):
+                with_content.append((store, item))
+            else:
+                attached += store.set_compact(item, version, None)
+        
+        if with_content:
+            results = await get_unified_processor().html_to_compact_json_many(
+                [item["content"] for _, item in with_content]
+            )
+            for (store, item), parsed in zip(with_content, results):
+                if isinstance(parsed, Exception):
+                    self.failed += 1
+                    logger.debug(f"Background compact conversion failed: {parsed}")
+                    continue
+                attached += store.set_compact(item, version, _apply_timestamp(item, parsed))
+        
+        return attached
+    
+    async def prepare(self, store: Optional[ClientItemStore], items: List[Dict[str, Any]]) -> int:
+        """
+        Convert the messages of a read window that have no current compact JSON yet
+        
+        Call before compact_message() on a window so leftover parsing happens
+        in the HTML parse pool instead of on the event loop.
+        
+        Args:
+            store: Item store holding the messages (None does nothing)
+            items: Stored messages about to be read
+        
+        Returns:
+            Number of messages converted
+        """
+        if store is None:
+            return 0
+        version = _translation_cache_version()
+        missing = [(store, item) for item in items if not store.get_compact(item, version)[0]]
+        return await self._convert(missing)
+    
+    def compact_message(self, store: Optional[ClientItemStore], item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Compact JSON for a stored message, precomputed when available
+        
+        Args:
+            store: Item store holding the message (None converts without storing)
+            item: Stored message
+        
+        Returns:
+            Compact JSON dictionary the caller may modify, or None for messages without content
+        
+        Raises:
+            ValueError: If conversion fails
+        """
+        version = _translation_cache_version()
+        if store is not None:
+            found, compact = store.get_compact(item, version)
+            if found:
+                self.read_precomputed += 1
+                return copy.deepcopy(compact)
+        
+        compact = convert_message_to_compact(item)
+        self.read_converted += 1
+        if store is not None:
+            store.set_compact(item, version, compact)
+        return copy.deepcopy(compact)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get conversion stage statistics
+        
+        Returns:
+            Dictionary with queue depth and conversion counters
+        """
+        reads = self.read_precomputed + self.read_converted
+        return {
+            'queued': len(self._queue),
+            'max_queue_size': self.max_queue_size,
+            'batch_size': self.batch_size,
+            'submitted': self.submitted,
+            'precomputed': self.precomputed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'read_precomputed': self.read_precomputed,
+            'read_converted': self.read_converted,
+            'precomputed_read_rate': round(self.read_precomputed / reads, 4) if reads else 0.0
+        }
+
+# Global stage shared by the collector and the AI turn
+_conversion_stage: Optional[CompactConversionStage] = None
+
+def get_compact_conversion_stage() -> CompactConversionStage:
+    """Get the global compact conversion stage instance"""
+    global _conversion_stage
+    if _conversion_stage is None:
+        _conversion_stage = CompactConversionStage()
+    return _conversion_stage
@@ -145,14 +145,10 @@ class ContextProcessor:
         """
         
         try:
-            # Import message collector to get unified chat and dice context
-            from .message_collector import get_combined_client_messages
+            # Chat view of the client's event log (rolls excluded for this context)
+            from .websocket_message_collector import get_client_chat_messages
             
-            # Get combined messages using unified collector
-            all_messages = get_combined_client_messages(client_id, count)
-            
-            # Extract only chat messages (exclude rolls for this context)
-            chat_messages = [msg for msg in all_messages if msg.get('_source') != 'roll']
+            chat_messages = get_client_chat_messages(client_id, count)
             
             self.logger.info(f"Collected {len(chat_messages)} chat messages for client {client_id}")
             return chat_messages
@@ -7,12 +7,38 @@ License: CC-BY-NC-SA 4.0 (compatible with dependencies)
 
 import logging
 import re
-from typing import Dict, List, Any, Optional, Tuple
-from bs4 import BeautifulSoup, Tag
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Set, Tuple
+from bs4 import BeautifulSoup, NavigableString, Tag
+from dataclasses import dataclass, field
 
 logger = logging.getLogger(__name__)
 
+# Prefer lxml when it is installed - it parses several times faster than the
+# pure-Python html.parser backend and produces an equivalent tree for card HTML
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Class-name -> field-pattern match results are memoized; class names repeat
+# across nearly every card, so this bound is rarely approached
+_CLASS_MATCH_CACHE_LIMIT = 4096
+
+HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+
+def parse_html(html_content: str) -> BeautifulSoup:
+    """
+    Parse HTML once with the fastest available parser
+    
+    Args:
+        html_content: Raw HTML from Foundry
+        
+    Returns:
+        BeautifulSoup document
+    """
+    return BeautifulSoup(html_content, HTML_PARSER)
+
 @dataclass
 class CardFieldInfo:
     """Information about a discovered card field"""
@@ -24,6 +50,35 @@ class CardFieldInfo:
     html_path: str  # CSS selector path to the element
     confidence: float  # 0.0 to 1.0, how confident we are about this field
 
+@dataclass
+class CardDomScan:
+    """
+    Index of a parsed message built in a single DOM traversal
+    
+    Holds everything classification and field extraction need, so neither has
+    to re-parse the HTML or walk the tree again with its own selectors.
+    """
+    soup: BeautifulSoup
+    source: str = ''
+    class_names: Set[str] = field(default_factory=set)  # lower-cased class tokens
+    chat_card: Optional[Tag] = None  # first .chat-card element
+    metadata_card: Optional[Tag] = None  # first element with a class containing 'card'
+    heading: Optional[Tag] = None  # first h1-h6 element
+    data_elements: List[Tag] = field(default_factory=list)
+    class_matches: List[Tuple[Tag, str]] = field(default_factory=list)
+    definition_terms: List[Tag] = field(default_factory=list)
+    tables: List[Tag] = field(default_factory=list)
+    strings: List[NavigableString] = field(default_factory=list)
+    pill_labels: List[Tag] = field(default_factory=list)
+    roll_groups: List[Tag] = field(default_factory=list)
+    effects: List[Tag] = field(default_factory=list)
+    enchantments: List[Tag] = field(default_factory=list)
+    
+    def has_class_containing(self, fragment: str) -> bool:
+        """Check whether any class token contains the given fragment"""
+        fragment = fragment.lower()
+        return any(fragment in class_name for class_name in self.class_names)
+
 class DynamicChatCardAnalyzer:
     """
     Dynamically analyzes chat card HTML to discover all fields
@@ -84,29 +139,35 @@ class DynamicChatCardAnalyzer:
             'p',         # Paragraphs
         ]
         
+        # Memoized class-name pattern matches (see _class_matches_field_pattern)
+        self._class_match_cache: Dict[str, bool] = {}
+        
         self.logger.info("DynamicChatCardAnalyzer initialized")
     
-    def analyze_card_structure(self, html_content: str) -> Dict[str, Any]:
+    def analyze_card_structure(self, html_content: str, scan: Optional[CardDomScan] = None) -> Dict[str, Any]:
         """
         Main entry point - analyze complete card structure
         
         Args:
             html_content: Raw HTML from Foundry chat card
+            scan: Optional pre-built DOM scan (skips parsing when provided)
             
         Returns:
             Dictionary with card analysis results
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            if scan is None:
+                scan = self.scan(parse_html(html_content), html_content)
+            soup = scan.soup
             
             # Classify card type using universal method
-            card_type = self.classify_card_type_universal(soup)
+            card_type = self.classify_card_type_universal(soup, scan)
             
             # Extract all fields
-            fields = self.extract_all_fields(soup)
+            fields = self.extract_all_fields(soup, scan)
             
             # Extract metadata
-            metadata = self._extract_metadata(soup)
+            metadata = self._extract_metadata(scan)
             
             # Build result
             result = {
@@ -124,44 +185,129 @@ class DynamicChatCardAnalyzer:
             self.logger.error(f"Card structure analysis failed: {e}")
             raise ValueError(f"Failed to analyze card structure: {e}")
     
-    def extract_all_fields(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def scan(self, soup: BeautifulSoup, source: str = '') -> CardDomScan:
+        """
+        Walk the document once and index every node the analysis cares about
+        
+        Args:
+            soup: Parsed document
+            source: Raw HTML the document was parsed from
+            
+        Returns:
+            CardDomScan with class names and field candidates in document order
+        """
+        scan = CardDomScan(soup=soup, source=source)
+        
+        for node in soup.descendants:
+            if not isinstance(node, Tag):
+                if isinstance(node, NavigableString):
+                    scan.strings.append(node)
+                continue
+            
+            name = node.name
+            attrs = node.attrs
+            classes = attrs.get('class') or []
+            
+            if 'data' in attrs:
+                scan.data_elements.append(node)
+            if name == 'dt':
+                scan.definition_terms.append(node)
+            elif name == 'table':
+                scan.tables.append(node)
+            elif name == 'enchantment-application':
+                scan.enchantments.append(node)
+            elif scan.heading is None and name in HEADING_TAGS:
+                scan.heading = node
+            
+            if not classes:
+                continue
+            
+            for class_name in classes:
+                class_lower = class_name.lower()
+                scan.class_names.add(class_lower)
+                if scan.metadata_card is None and 'card' in class_lower:
+                    scan.metadata_card = node
+                if self._class_matches_field_pattern(class_name):
+                    scan.class_matches.append((node, class_name))
+            
+            if scan.chat_card is None and 'chat-card' in classes:
+                scan.chat_card = node
+            if 'label' in classes and self._is_footer_pill_label(node):
+                scan.pill_labels.append(node)
+            if 'roll-link-group' in classes and 'data-formulas' in attrs:
+                scan.roll_groups.append(node)
+            if 'effect' in classes:
+                scan.effects.append(node)
+        
+        return scan
+    
+    def _class_matches_field_pattern(self, class_name: str) -> bool:
+        """Check a class name against the field patterns, memoized per name"""
+        matched = self._class_match_cache.get(class_name)
+        if matched is None:
+            matched = any(pattern.match(class_name) for pattern in self.compiled_patterns)
+            if len(self._class_match_cache) >= _CLASS_MATCH_CACHE_LIMIT:
+                self._class_match_cache.clear()
+            self._class_match_cache[class_name] = matched
+        return matched
+    
+    def _is_footer_pill_label(self, element: Tag) -> bool:
+        """Equivalent of the '.card-footer .pill .label' selector for one element"""
+        in_pill = False
+        for parent in element.parents:
+            parent_classes = parent.get('class') or []
+            if not in_pill:
+                in_pill = 'pill' in parent_classes
+            elif 'card-footer' in parent_classes:
+                return True
+        return False
+    
+    def extract_all_fields(self, soup: BeautifulSoup, scan: Optional[CardDomScan] = None) -> Dict[str, CardFieldInfo]:
         """
         Extract all discoverable fields from the card
         
         Args:
             soup: BeautifulSoup object of the card
+            scan: Optional pre-built DOM scan of soup
             
         Returns:
             Dictionary mapping field names to CardFieldInfo objects
         """
+        if scan is None:
+            scan = self.scan(soup)
+        
         fields = {}
         
+        # Table fields feed both the semantic and table passes; build them once
+        table_fields = self._extract_from_tables(scan)
+        
         # Method 1: Extract from data attributes (highest confidence)
-        fields.update(self._extract_from_data_attributes(soup))
+        fields.update(self._extract_from_data_attributes(scan))
         
         # Method 2: Extract from CSS class patterns
-        fields.update(self._extract_from_css_classes(soup))
+        fields.update(self._extract_from_css_classes(scan))
         
         # Method 3: Extract from semantic HTML structure
-        fields.update(self._extract_from_semantic_structure(soup))
+        fields.update(self._extract_from_semantic_structure(scan))
+        fields.update(table_fields)
         
         # Method 4: Extract from text patterns and pairs
-        fields.update(self._extract_from_text_patterns(soup))
+        fields.update(self._extract_from_text_patterns(scan))
         
         # Method 5: Extract from table structures
-        fields.update(self._extract_from_tables(soup))
+        fields.update(table_fields)
         
         # Method 6: Extract from card footer pills (NEW)
-        fields.update(self._extract_pill_fields(soup))
+        fields.update(self._extract_pill_fields(scan))
         
         # Method 7: Extract from roll data (NEW)
-        fields.update(self._extract_roll_data(soup))
+        fields.update(self._extract_roll_data(scan))
         
         # Method 8: Extract from effect data (NEW)
-        fields.update(self._extract_effect_data(soup))
+        fields.update(self._extract_effect_data(scan))
         
         # Method 9: Extract from enchantment data (NEW)
-        fields.update(self._extract_enchantment_data(soup))
+        fields.update(self._extract_enchantment_data(scan))
         
         # Remove duplicates and merge field information
         merged_fields = self._merge_duplicate_fields(fields)
@@ -169,36 +315,36 @@ class DynamicChatCardAnalyzer:
         # self.logger.info(f"Extracted {len(merged_fields)} unique fields from chat card")
         return merged_fields
     
-    def classify_card_type_universal(self, soup: BeautifulSoup) -> str:
+    def classify_card_type_universal(self, soup: BeautifulSoup, scan: Optional[CardDomScan] = None) -> str:
         """
         Classify type of chat card using universal, game-agnostic logic
         
         Args:
             soup: BeautifulSoup object of the card
+            scan: Optional pre-built DOM scan of soup
             
         Returns:
             String representing card type
         """
+        card_elem = scan.chat_card if scan is not None else soup.select_one('.chat-card')
+        if not card_elem:
+            return 'generic-card'
+        
         # Primary: CSS class patterns
-        card_type = self._extract_type_from_classes(soup)
+        card_type = self._extract_type_from_classes(card_elem)
         
         # Secondary: Data attributes
         if not card_type:
-            card_type = self._extract_type_from_data_attributes(soup)
+            card_type = self._extract_type_from_data_attributes(card_elem)
         
         # Tertiary: Structural patterns
         if not card_type:
-            card_type = self._infer_type_from_structure(soup)
+            card_type = self._infer_type_from_structure(card_elem)
         
         return card_type or 'generic-card'
     
-    def _extract_type_from_classes(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_type_from_classes(self, card_elem: Tag) -> Optional[str]:
         """Extract card type from CSS classes"""
-        # Look for the main chat card element
-        card_elem = soup.select_one('.chat-card')
-        if not card_elem:
-            return None
-        
         # Extract card type from CSS classes
         classes = card_elem.get('class', [])
         
@@ -223,16 +369,12 @@ class DynamicChatCardAnalyzer:
         
         # If no specific type found, check for generic chat-card and infer
         if 'chat-card' in ' '.join(classes).lower():
-            return self._infer_generic_type(soup)
+            return self._infer_generic_type(card_elem)
         
         return None
     
-    def _extract_type_from_data_attributes(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_type_from_data_attributes(self, card_elem: Tag) -> Optional[str]:
         """Extract card type from data attributes"""
-        card_elem = soup.select_one('.chat-card')
-        if not card_elem:
-            return None
-        
         # Check for data attributes that indicate type
         for attr_name in card_elem.attrs:
             if attr_name.startswith('data-'):
@@ -246,13 +388,8 @@ class DynamicChatCardAnalyzer:
         
         return None
     
-    def _infer_type_from_structure(self, soup: BeautifulSoup) -> Optional[str]:
+    def _infer_type_from_structure(self, card_content: Tag) -> Optional[str]:
         """Infer card type from structural patterns"""
-        # Look for structural indicators
-        card_content = soup.select_one('.chat-card')
-        if not card_content:
-            return None
-        
         # Check for buttons to infer type
         buttons = card_content.select('.card-buttons button[data-action]')
         if buttons:
@@ -281,13 +418,8 @@ class DynamicChatCardAnalyzer:
         
         return None
     
-    def _infer_generic_type(self, soup: BeautifulSoup) -> str:
+    def _infer_generic_type(self, card_content: Tag) -> str:
         """Infer type from generic chat card structure"""
-        # Look for key structural elements
-        card_content = soup.select_one('.chat-card')
-        if not card_content:
-            return 'generic-card'
-        
         # Check for title and subtitle
         title_elem = card_content.select_one('.title')
         subtitle_elem = card_content.select_one('.subtitle')
@@ -325,12 +457,12 @@ class DynamicChatCardAnalyzer:
         
         return 'generic-card'
     
-    def _extract_pill_fields(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_pill_fields(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract fields from card footer pills"""
         fields = {}
         
-        # Find all pills in card footer
-        pills = soup.select('.card-footer .pill .label')
+        # Pills in card footer ('.card-footer .pill .label')
+        pills = scan.pill_labels
         
         for i, pill in enumerate(pills):
             pill_text = self._clean_extracted_text(pill.get_text(strip=True))
@@ -348,12 +480,12 @@ class DynamicChatCardAnalyzer:
         
         return fields
     
-    def _extract_roll_data(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_roll_data(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract roll data from roll-link-groups"""
         fields = {}
         
-        # Find all roll groups with formulas
-        roll_groups = soup.select('.roll-link-group[data-formulas]')
+        # Roll groups with formulas ('.roll-link-group[data-formulas]')
+        roll_groups = scan.roll_groups
         
         for i, group in enumerate(roll_groups):
             formula = group.get('data-formulas', '')
@@ -383,12 +515,12 @@ class DynamicChatCardAnalyzer:
         
         return fields
     
-    def _extract_effect_data(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_effect_data(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract effect data from effect applications"""
         fields = {}
         
-        # Find all effect elements
-        effects = soup.select('.effect')
+        # Effect elements ('.effect')
+        effects = scan.effects
         
         for i, effect in enumerate(effects):
             name_elem = effect.select_one('.title')
@@ -419,12 +551,12 @@ class DynamicChatCardAnalyzer:
         
         return fields
     
-    def _extract_enchantment_data(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_enchantment_data(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract enchantment data from enchantment applications"""
         fields = {}
         
-        # Find enchantment applications
-        enchantments = soup.select('enchantment-application')
+        # Enchantment applications
+        enchantments = scan.enchantments
         
         for i, enchantment in enumerate(enchantments):
             preview_elem = enchantment.select_one('.preview')
@@ -481,12 +613,12 @@ class DynamicChatCardAnalyzer:
         unique_patterns = list(dict.fromkeys(patterns))
         return unique_patterns
     
-    def _extract_from_data_attributes(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_from_data_attributes(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract fields from HTML5 data attributes"""
         fields = {}
         
-        # Find all elements with data attributes
-        elements_with_data = soup.find_all(attrs={'data': True})
+        # Elements with data attributes
+        elements_with_data = scan.data_elements
         
         for element in elements_with_data:
             for attr_name, attr_value in element.attrs.items():
@@ -511,47 +643,43 @@ class DynamicChatCardAnalyzer:
         
         return fields
     
-    def _extract_from_css_classes(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_from_css_classes(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract fields from CSS class patterns"""
         fields = {}
         
-        # Find elements matching our field patterns
-        for element in soup.find_all():
-            classes = element.get('class', [])
+        # Elements whose classes matched our field patterns during the scan
+        for element, class_name in scan.class_matches:
+            field_name = self._clean_field_name(class_name)
             
-            for class_name in classes:
-                # Check if this class matches our field patterns
-                for pattern in self.compiled_patterns:
-                    if pattern.match(class_name):
-                        field_name = self._clean_field_name(class_name)
-                        field_value = self._extract_element_value(element)
-                        
-                        # Apply text cleaning to the field value if it's a string
-                        if isinstance(field_value, str):
-                            field_value = self._clean_extracted_text(field_value)
-                        
-                        if field_name and field_value is not None:
-                            # Only add if we don't already have this field
-                            if field_name not in fields:
-                                fields[field_name] = CardFieldInfo(
-                                    name=field_name,
-                                    value=field_value,
-                                    field_type=self._determine_field_type(field_value),
-                                    css_class=class_name,
-                                    data_attributes={},
-                                    html_path=self._generate_css_path(element),
-                                    confidence=0.7  # Medium confidence for CSS classes
-                                )
-                            break
+            # Only add if we don't already have this field
+            if not field_name or field_name in fields:
+                continue
+            
+            field_value = self._extract_element_value(element)
+            
+            # Apply text cleaning to the field value if it's a string
+            if isinstance(field_value, str):
+                field_value = self._clean_extracted_text(field_value)
+            
+            if field_value is not None:
+                fields[field_name] = CardFieldInfo(
+                    name=field_name,
+                    value=field_value,
+                    field_type=self._determine_field_type(field_value),
+                    css_class=class_name,
+                    data_attributes={},
+                    html_path=self._generate_css_path(element),
+                    confidence=0.7  # Medium confidence for CSS classes
+                )
         
         return fields
     
-    def _extract_from_semantic_structure(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
-        """Extract fields from semantic HTML structure"""
+    def _extract_from_semantic_structure(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
+        """Extract fields from semantic HTML structure (definition lists; tables are handled separately)"""
         fields = {}
         
         # Look for definition lists (dt/dd pairs)
-        dt_elements = soup.find_all('dt')
+        dt_elements = scan.definition_terms
         for dt in dt_elements:
             dt_text = self._clean_extracted_text(dt.get_text(strip=True))
             dd = dt.find_next_sibling('dd')
@@ -575,20 +703,14 @@ class DynamicChatCardAnalyzer:
                         confidence=0.8  # High confidence for semantic pairs
                     )
         
-        # Look for table structures
-        tables = soup.find_all('table')
-        for i, table in enumerate(tables):
-            table_fields = self._extract_table_fields(table, f"table_{i}")
-            fields.update(table_fields)
-        
         return fields
     
-    def _extract_from_text_patterns(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_from_text_patterns(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract fields from text patterns (colon-separated pairs)"""
         fields = {}
         
         # Look for text patterns like "Name: Value", "Damage: 1d6", etc.
-        text_elements = soup.find_all(string=True)
+        text_elements = scan.strings
         
         for text in text_elements:
             text_str = text.strip()
@@ -613,11 +735,11 @@ class DynamicChatCardAnalyzer:
         
         return fields
     
-    def _extract_from_tables(self, soup: BeautifulSoup) -> Dict[str, CardFieldInfo]:
+    def _extract_from_tables(self, scan: CardDomScan) -> Dict[str, CardFieldInfo]:
         """Extract fields from table structures"""
         fields = {}
         
-        tables = soup.find_all('table')
+        tables = scan.tables
         for i, table in enumerate(tables):
             table_fields = self._extract_table_fields(table, f"table_{i}")
             fields.update(table_fields)
@@ -694,17 +816,17 @@ class DynamicChatCardAnalyzer:
         
         return merged
     
-    def _extract_metadata(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _extract_metadata(self, scan: CardDomScan) -> Dict[str, Any]:
         """Extract metadata about the card"""
         metadata = {}
         
         # Extract title/header
-        title_elem = soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+        title_elem = scan.heading
         if title_elem:
             metadata['title'] = title_elem.get_text(strip=True)
         
         # Extract card classes
-        card_elem = soup.find(class_=lambda x: x and 'card' in str(x).lower())
+        card_elem = scan.metadata_card
         if card_elem:
             metadata['card_classes'] = card_elem.get('class', [])
         
@@ -915,14 +1037,28 @@ def get_dynamic_analyzer() -> DynamicChatCardAnalyzer:
     """Get the global dynamic analyzer instance"""
     return _dynamic_analyzer
 
-def analyze_chat_card(html_content: str) -> Dict[str, Any]:
+def scan_html(soup: BeautifulSoup, source: str = '') -> CardDomScan:
+    """
+    Convenience function to index a parsed document in one traversal
+    
+    Args:
+        soup: Parsed document (see parse_html)
+        source: Raw HTML the document was parsed from
+        
+    Returns:
+        CardDomScan shared by classification and field extraction
+    """
+    return _dynamic_analyzer.scan(soup, source)
+
+def analyze_chat_card(html_content: str, scan: Optional[CardDomScan] = None) -> Dict[str, Any]:
     """
     Convenience function to analyze a chat card
     
     Args:
         html_content: Raw HTML from Foundry chat card
+        scan: Optional pre-built DOM scan, avoids re-parsing html_content
         
     Returns:
         Dictionary with card analysis results
     """
-    return _dynamic_analyzer.analyze_card_structure(html_content)
+    return _dynamic_analyzer.analyze_card_structure(html_content, scan)
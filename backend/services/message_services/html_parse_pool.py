@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+HTML Parse Pool for The Gold Box
+Runs BeautifulSoup parsing and chat card analysis in worker processes
+
+Parsing a burst of rich chat cards on the event loop stalls every WebSocket
+client, including ping/pong and roll results. The pool analyzes HTML in a
+ProcessPoolExecutor, several payloads per task, and returns plain analysis
+data; everything that touches shared state (translation cache codes, caches)
+stays in the server process. Tiny payloads are analyzed inline, where the
+round trip would cost more than the parse.
+
+Workers are forked: the spawn and forkserver start methods re-import the
+server's main script in every worker, and server.py runs the whole startup at
+import. Forking a process that runs other threads can copy a held lock into
+the child, so the pool is only started while the calling thread is the only
+one (startup creates it before any other service). Without fork, or once
+threads are running, message HTML is analyzed inline.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable from the environment (pool size 0 analyzes everything inline)
+DEFAULT_POOL_SIZE = int(os.environ.get('HTML_PARSE_POOL_SIZE', min(4, os.cpu_count() or 1)))
+DEFAULT_INLINE_MAX_CHARS = int(os.environ.get('HTML_PARSE_INLINE_MAX_CHARS', 2048))
+DEFAULT_BATCH_SIZE = int(os.environ.get('HTML_PARSE_BATCH_SIZE', 8))
+
+# Parsed once per worker at startup so imports and parser caches are warm
+_WARMUP_HTML = (
+    '<li class="chat-message"><div class="message-content"><div class="chat-card item-card">'
+    '<header class="card-header"><h3 class="item-name">Warmup</h3></header>'
+    '<div class="card-content"><span class="property">1</span></div></div></div></li>'
+)
+
+def _analyze(html_content: str) -> Tuple[bool, Any]:
+    """Analyze one payload; returns (True, analysis) or (False, error message)"""
+    from shared.core.unified_message_processor import analyze_message_html
+    try:
+        return True, analyze_message_html(html_content)
+    except Exception as e:
+        # Exceptions are reported as text; not every exception pickles
+        return False, str(e)
+
+def _analyze_batch(html_contents: List[str]) -> List[Tuple[bool, Any]]:
+    """Worker task: analyze several payloads"""
+    return [_analyze(html_content) for html_content in html_contents]
+
+def _warm_worker() -> None:
+    """Worker initializer: import the analysis stack and parse a sample card"""
+    logging.getLogger().setLevel(logging.WARNING)
+    _analyze(_WARMUP_HTML)
+
+def _ready() -> bool:
+    """No-op task used to start every worker ahead of the first real batch"""
+    return True
+
+class HtmlParsePool:
+    """
+    Process pool for message HTML analysis
+    
+    A broken pool (e.g. a worker killed by the OS) is discarded and the
+    affected payloads are analyzed inline; the next batch starts a new pool
+    if that is still safe (see module docstring), otherwise parsing stays inline.
+    """
+    
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        inline_max_chars: int = DEFAULT_INLINE_MAX_CHARS,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ):
+        """
+        Initialize parse pool
+        
+        Args:
+            pool_size: Number of worker processes (0 analyzes everything inline)
+            inline_max_chars: Payloads up to this length are analyzed inline
+            batch_size: Payloads sent to a worker per task
+        """
+        self.pool_size = max(0, pool_size)
+        self.inline_max_chars = inline_max_chars
+        self.batch_size = max(1, batch_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._started = False
+        self.unavailable_reason: Optional[str] = None
+        
+        # Statistics
+        self.pooled = 0
+        self.inline = 0
+        self.fallbacks = 0
+        self.failures = 0
+        self.batches = 0
+        self.restarts = 0
+    
+    def start(self, wait: bool = True) -> bool:
+        """
+        Start and pre-warm the worker processes
+        
+        Args:
+            wait: Block until every worker is warm (False when called from the event loop)
+        
+        Returns:
+            True if the pool is running
+        """
+        if self.pool_size == 0 or self.unavailable_reason:
+            return False
+        if self._executor is not None:
+            return True
+        
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            return self._unavailable("fork start method not supported")
+        if threading.active_count() > 1:
+            return self._unavailable(f"{threading.active_count() - 1} other threads running")
+        
+        try:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_warm_worker
+            )
+            # One task per worker makes the executor start all of them now
+            warmups = [self._executor.submit(_ready) for _ in range(self.pool_size)]
+            if wait:
+                for future in warmups:
+                    future.result()
+            if self._started:
+                self.restarts += 1
+            self._started = True
+            logger.info(f"HTML parse pool started with {self.pool_size} workers")
+            return True
+        except Exception as e:
+            logger.warning(f"HTML parse pool unavailable, parsing inline: {e}")
+            self._discard()
+            return False
+    
+    def _unavailable(self, reason: str) -> bool:
+        """Stop using the pool for the rest of the process"""
+        self.unavailable_reason = reason
+        logger.warning(f"HTML parse pool not started ({reason}), parsing inline")
+        return False
+    
+    def _discard(self) -> None:
+        """Drop the executor without waiting for its workers"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _to_result(self, outcome: Tuple[bool, Any]) -> Any:
+        """Analysis, or a ValueError for a failed payload"""
+        ok, value = outcome
+        if ok:
+            return value
+        self.failures += 1
+        return ValueError(value)
+    
+    async def analyze_many(self, html_contents: List[str]) -> List[Any]:
+        """
+        Analyze message HTML off the event loop
+        
+        Args:
+            html_contents: HTML payloads
+        
+        Returns:
+            Analysis dictionary (see UnifiedMessageProcessor.analyze_html), or
+            the ValueError its analysis raised, per payload
+        """
+        results: List[Any] = [None] * len(html_contents)
+        if self._executor is None and self.pool_size:
+            self.start(wait=False)
+        
+        offloaded = [index for index, html_content in enumerate(html_contents)
+                     if self._executor is not None and len(html_content) > self.inline_max_chars]
+        offloaded_set = set(offloaded)
+        chunks = [offloaded[start:start + self.batch_size] for start in range(0, len(offloaded), self.batch_size)]
+        
+        loop = asyncio.get_running_loop()
+        try:
+            futures = [
+                loop.run_in_executor(self._executor, _analyze_batch, [html_contents[index] for index in chunk])
+                for chunk in chunks
+            ]
+        except BrokenProcessPool as e:
+            # Pool broke after the previous batch; analyze everything inline
+            logger.warning(f"HTML parse pool broken, parsing {len(offloaded)} payloads inline: {e}")
+            self._discard()
+            chunks, futures, offloaded_set = [], [], set()
+        self.batches += len(futures)
+        
+        # Tiny payloads are analyzed here while the workers run
+        for index, html_content in enumerate(html_contents):
+            if index not in offloaded_set:
+                results[index] = self._to_result(_analyze(html_content))
+                self.inline += 1
+        
+        for chunk, outcome in zip(chunks, await asyncio.gather(*futures, return_exceptions=True)):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                logger.warning(f"HTML parse pool batch failed, parsing {len(chunk)} payloads inline: {outcome}")
+                if isinstance(outcome, BrokenProcessPool):
+                    self._discard()
+                self.fallbacks += len(chunk)
+                outcome = [_analyze(html_contents[index]) for index in chunk]
+            else:
+                self.pooled += len(chunk)
+            
+            for index, item in zip(chunk, outcome):
+                results[index] = self._to_result(item)
+        
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics
+        
+        Returns:
+            Dictionary with pool configuration and payload counters
+        """
+        return {
+            'running': self._executor is not None,
+            'unavailable_reason': self.unavailable_reason,
+            'pool_size': self.pool_size,
+            'inline_max_chars': self.inline_max_chars,
+            'batch_size': self.batch_size,
+            'pooled': self.pooled,
+            'inline': self.inline,
+            'fallbacks': self.fallbacks,
+            'failures': self.failures,
+            'batches': self.batches,
+            'restarts': self.restarts
+        }
+
+# Global pool shared by every conversion path
+_html_parse_pool: Optional[HtmlParsePool] = None
+
+def get_html_parse_pool() -> HtmlParsePool:
+    """Get the global HTML parse pool instance"""
+    global _html_parse_pool
+    if _html_parse_pool is None:
+        _html_parse_pool = HtmlParsePool()
+    return _html_parse_pool
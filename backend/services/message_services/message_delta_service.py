@@ -18,6 +18,41 @@ from typing import Dict, Any, List, Optional
 
 logger = logging.getLogger(__name__)
 
+def normalize_timestamp_ms(timestamp) -> Optional[int]:
+    """
+    Normalize timestamp to integer milliseconds since Unix epoch
+    
+    Args:
+        timestamp: Timestamp in various formats (microseconds, milliseconds, seconds)
+        
+    Returns:
+        Normalized timestamp in milliseconds or None if invalid
+    """
+    try:
+        # Convert to int if it's a string
+        if isinstance(timestamp, str):
+            timestamp = int(timestamp)
+        
+        # Check if timestamp is in microseconds (very large number, > 10^15)
+        # Unix timestamps in microseconds would be > 10^15 (year 1970+)
+        if timestamp > 10**15:  # 1 quadrillion = year 1970 in microseconds
+            # Convert from microseconds to milliseconds
+            return int(timestamp // 1000)
+        
+        # Check if timestamp is in seconds (reasonable range for seconds, < 10^12)
+        # Unix timestamps in seconds would be around 10^9 (year 2001+) to 10^11 (year 5138)
+        elif timestamp < 10**12:  # 1 trillion = year 2001 in milliseconds
+            # Convert from seconds to milliseconds
+            return int(timestamp * 1000)
+        
+        # Assume timestamp is already in milliseconds
+        else:
+            return int(timestamp)
+            
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Failed to normalize timestamp {timestamp}: {e}")
+        return None
+
 class MessageDeltaService:
     """
     Service for applying message delta filtering to AI contexts
@@ -143,6 +178,40 @@ class MessageDeltaService:
 
         return new_messages
     
+    def get_delta_watermark(self, session_id: str, newest_timestamp: Optional[int]) -> Optional[int]:
+        """
+        Get the session's delta watermark for filtering already-ordered items
+        
+        Same rules as apply_message_delta, for callers that keep their items
+        sorted by normalized timestamp and select the newer ones themselves.
+        
+        Args:
+            session_id: Session identifier for timestamp tracking
+            newest_timestamp: Newest item timestamp in ms, saved when the session has no watermark yet
+            
+        Returns:
+            Watermark in ms (items strictly newer are new), or None if every item is new
+        """
+        # Ensure auto-cleanup happens
+        self.ai_session_manager.auto_cleanup()
+        
+        last_timestamp = self.ai_session_manager.get_session_timestamp(session_id)
+        
+        if last_timestamp is None:
+            # New session - every item is new; save newest timestamp
+            if newest_timestamp is not None:
+                if not self.ai_session_manager.update_session_timestamp(session_id, newest_timestamp):
+                    logger.warning(f"Failed to save timestamp for new session {session_id}")
+            else:
+                logger.warning(f"No valid timestamps found in messages for new session {session_id}")
+            return None
+        
+        watermark = normalize_timestamp_ms(last_timestamp)
+        if watermark is None:
+            # Unusable stored timestamp - apply_message_delta treats nothing as newer
+            return float('inf')
+        return watermark
+    
     def get_delta_stats(self, session_id: str, original_messages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Get statistics about delta filtering for debugging/monitoring
@@ -253,44 +322,8 @@ class MessageDeltaService:
         return max(normalized_timestamps)
     
     def _normalize_timestamp(self, timestamp) -> Optional[int]:
-        """
-        Normalize timestamp to milliseconds since Unix epoch
-        
-        Args:
-            timestamp: Timestamp in various formats (microseconds, milliseconds, seconds)
-            
-        Returns:
-            Normalized timestamp in milliseconds or None if invalid
-        """
-        try:
-            # Convert to int if it's a string
-            if isinstance(timestamp, str):
-                timestamp = int(timestamp)
-            
-            # Check if timestamp is in microseconds (very large number, > 10^15)
-            # Unix timestamps in microseconds would be > 10^15 (year 1970+)
-            if timestamp > 10**15:  # 1 quadrillion = year 1970 in microseconds
-                # Convert from microseconds to milliseconds
-                normalized = timestamp // 1000
-                logger.debug(f"Converted microsecond timestamp {timestamp} to millisecond timestamp {normalized}")
-                return normalized
-            
-            # Check if timestamp is in seconds (reasonable range for seconds, < 10^12)
-            # Unix timestamps in seconds would be around 10^9 (year 2001+) to 10^11 (year 5138)
-            elif timestamp < 10**12:  # 1 trillion = year 2001 in milliseconds
-                # Convert from seconds to milliseconds
-                normalized = timestamp * 1000
-                logger.debug(f"Converted second timestamp {timestamp} to millisecond timestamp {normalized}")
-                return normalized
-            
-            # Assume timestamp is already in milliseconds
-            else:
-                logger.debug(f"Using millisecond timestamp {timestamp} as-is")
-                return timestamp
-                
-        except (ValueError, TypeError) as e:
-            logger.warning(f"Failed to normalize timestamp {timestamp}: {e}")
-            return None
+        """Normalize timestamp to milliseconds since Unix epoch (see normalize_timestamp_ms)"""
+        return normalize_timestamp_ms(timestamp)
     
     def validate_message_timestamps(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -6,14 +6,26 @@ Replaces DOM scraping with WebSocket-based collection
 
 Enhanced with delta filtering to prevent old messages from entering backend processing.
 
+This is the only store of client data: chat messages, dice rolls, combat
+states, game deltas and world state all live in one ClientEventLog per client,
+read by the AI path, the AI tools and the HTTP API alike.
+
 License: CC-BY-NC-SA 4.0
 """
 
+import itertools
 import logging
 import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from .client_event_log import (
+    ClientEventLog, VIEW_CHAT, VIEW_ROLLS, VIEW_COMBAT, VIEW_GAME_DELTA, VIEW_WORLD_STATE
+)
+from .client_item_store import ClientItemStore, ingest_key, is_rendered_message
+from .compact_conversion_stage import get_compact_conversion_stage
+from .message_delta_service import normalize_timestamp_ms
+
 logger = logging.getLogger(__name__)
 
 class WebSocketMessageCollector:
@@ -26,14 +38,9 @@ class WebSocketMessageCollector:
     
     def __init__(self):
         """Initialize WebSocket message collector"""
-        self.client_messages: Dict[str, List[Dict[str, Any]]] = {}
-        self.client_rolls: Dict[str, List[Dict[str, Any]]] = {}
-        self.client_last_processed: Dict[str, int] = {}  # Track last processed timestamp per client
-        # CHANGED: Support multiple encounters per client
-        # Structure: {client_id: {encounter_id_1: {...}, encounter_id_2: {...}}}
-        self.client_combat_states: Dict[str, Dict[str, Dict[str, Any]]] = {}
-        self.client_game_delta: Dict[str, Optional[Dict[str, Any]]] = {}  # Store game delta per client
-        self.world_states: Dict[str, Dict[str, Any]] = {}  # Store full world state per client
+        # Chat, rolls, combat states (multiple encounters), game delta and world state per client
+        self.client_logs: Dict[str, ClientEventLog] = {}
+        self._event_counter = itertools.count(1)  # Process-wide, so versions never repeat
         self.max_messages_per_client = 100
         self.max_rolls_per_client = 50
         
@@ -48,57 +55,122 @@ class WebSocketMessageCollector:
         
         logger.info("WebSocketMessageCollector initialized")
     
-    def add_message_with_delta_filtering(self, client_id: str, message: Dict[str, Any], session_id: str) -> bool:
+    def _get_log(self, client_id: str) -> ClientEventLog:
+        """Get or create the event log of a client"""
+        log = self.client_logs.get(client_id)
+        if log is None:
+            log = self.client_logs[client_id] = ClientEventLog(self.max_messages_per_client, self.max_rolls_per_client)
+        return log
+    
+    def get_item_store(self, client_id: str) -> Optional[ClientItemStore]:
+        """Message/roll store of a client, or None if nothing was received yet"""
+        log = self.client_logs.get(client_id)
+        return log.items if log is not None else None
+    
+    def _get_combat_states(self, client_id: str) -> Dict[str, Dict[str, Any]]:
+        """Combat states of a client by encounter ID (empty if none)"""
+        log = self.client_logs.get(client_id)
+        return log.combat_states if log is not None else {}
+    
+    def _get_ingest_watermark(self, session_id: Optional[str]) -> Optional[int]:
+        """Session's last processed timestamp in ms for ingest filtering (None to keep everything)"""
+        if not (self.delta_service and session_id):
+            return None
+        last_processed = self.delta_service.ai_session_manager.get_session_timestamp(session_id)
+        return normalize_timestamp_ms(last_processed) if last_processed else None
+    
+    def _store_item(self, client_id: str, item: Dict[str, Any], is_roll: bool, watermark: Optional[int]) -> bool:
         """
-        Add a chat message from WebSocket client with delta filtering
+        Validate, timestamp and store a message or roll
+        
+        Ingestion is idempotent: an item already in the client's buffers
+        (same Foundry message ID, or same content when it has none) is not
+        stored again and counts as redundant traffic. The exception is a
+        rendered chat log copy of a message stored from a live frame, which
+        has only the inner content: it replaces the stored copy in place.
         
         Args:
             client_id: WebSocket client identifier
-            message: Message data
-            session_id: AI session ID for delta filtering
+            item: Message or roll data
+            is_roll: Store as a dice roll
+            watermark: Drop items older than this timestamp in ms (None keeps everything)
             
         Returns:
-            True if message added successfully, False if filtered out
+            True if stored or already present, False if invalid or filtered out
         """
+        kind = 'roll' if is_roll else 'message'
         try:
-            if client_id not in self.client_messages:
-                self.client_messages[client_id] = []
-            
-            # Validate message structure
-            if not self._validate_message(message):
-                logger.warning(f"Invalid message structure from client {client_id}: {message}")
+            # Validate structure
+            valid = self._validate_roll(item) if is_roll else self._validate_message(item)
+            if not valid:
+                logger.warning(f"Invalid {kind} structure from client {client_id}: {item}")
                 return False
             
-            # Add timestamp if not present
-            if 'timestamp' not in message:
-                message['timestamp'] = int(time.time() * 1000)
-            
-            # Apply delta filtering if available
-            if self.delta_service and session_id:
-                # Get session's last processed timestamp
-                last_processed = self.delta_service.ai_session_manager.get_session_timestamp(session_id)
-                msg_timestamp = message.get('ts') or message.get('timestamp')
-                
-                if msg_timestamp and last_processed and msg_timestamp < last_processed:
-                    logger.debug(f"Filtering old message {msg_timestamp} < {last_processed} for client {client_id}")
-                    return False  # Skip old message
+            # Reject items the client already sent (keyed before the backend adds fields)
+            log = self._get_log(client_id)
+            store = log.items
+            key = ingest_key(item, is_roll)
+            if store.is_duplicate(key, item, is_roll):
+                if (not is_roll and is_rendered_message(item) and not is_rendered_message(store.get_item(key))
+                        and store.replace_message(key, item)):
+                    item['client_id'] = client_id
+                    log.record(VIEW_CHAT, next(self._event_counter))
+                    get_compact_conversion_stage().submit(store, item)
+                    logger.debug(f"Replaced {kind} {key} from client {client_id} with its rendered copy")
+                else:
+                    logger.debug(f"Skipping duplicate {kind} {key} from client {client_id}")
+                return True
             
-            # Add client ID to message
-            message['client_id'] = client_id
+            # Add timestamp if not present
+            now_ms = int(time.time() * 1000)
+            if 'timestamp' not in item:
+                item['timestamp'] = now_ms
             
-            self.client_messages[client_id].append(message)
+            # Normalize once; the store orders and delta-filters by this value
+            timestamp_ms = normalize_timestamp_ms(item.get('ts') or item.get('timestamp'))
+            if timestamp_ms is None:
+                timestamp_ms = now_ms
             
-            # Limit message count
-            if len(self.client_messages[client_id]) > self.max_messages_per_client:
-                self.client_messages[client_id] = self.client_messages[client_id][-self.max_messages_per_client:]
+            # Apply delta filtering if available
+            if watermark is not None and timestamp_ms < watermark:
+                logger.debug(f"Filtering old {kind} {timestamp_ms} < {watermark} for client {client_id}")
+                return False  # Skip old item
+            
+            # Add client ID to item
+            item['client_id'] = client_id
+            
+            # Ring buffer evicts the oldest item of this kind beyond its per-client limit
+            if is_roll:
+                store.add_roll(item, timestamp_ms, key)
+                log.record(VIEW_ROLLS, next(self._event_counter))
+                logger.debug(f"Added roll from client {client_id}: {item.get('formula', 'unknown')}")
+            else:
+                store.add_message(item, timestamp_ms, key)
+                log.record(VIEW_CHAT, next(self._event_counter))
+                logger.debug(f"Added message from client {client_id}: {item.get('type', 'unknown')}")
             
-            logger.debug(f"Added message from client {client_id}: {message.get('type', 'unknown')}")
+            # Convert to compact JSON in the background, before an AI turn needs it
+            get_compact_conversion_stage().submit(store, item)
             return True
             
         except Exception as e:
-            logger.error(f"Error adding message from client {client_id}: {e}")
+            logger.error(f"Error adding {kind} from client {client_id}: {e}")
             return False
     
+    def add_message_with_delta_filtering(self, client_id: str, message: Dict[str, Any], session_id: str) -> bool:
+        """
+        Add a chat message from WebSocket client with delta filtering
+        
+        Args:
+            client_id: WebSocket client identifier
+            message: Message data
+            session_id: AI session ID for delta filtering
+            
+        Returns:
+            True if message added successfully, False if filtered out
+        """
+        return self._store_item(client_id, message, False, self._get_ingest_watermark(session_id))
+    
     def add_roll_with_delta_filtering(self, client_id: str, roll_data: Dict[str, Any], session_id: str) -> bool:
         """
         Add a dice roll from WebSocket client with delta filtering
@@ -111,44 +183,32 @@ class WebSocketMessageCollector:
         Returns:
             True if roll added successfully, False if filtered out
         """
-        try:
-            if client_id not in self.client_rolls:
-                self.client_rolls[client_id] = []
-            
-            # Validate roll structure
-            if not self._validate_roll(roll_data):
-                logger.warning(f"Invalid roll structure from client {client_id}: {roll_data}")
-                return False
-            
-            # Add timestamp if not present
-            if 'timestamp' not in roll_data:
-                roll_data['timestamp'] = int(time.time() * 1000)
-            
-            # Apply delta filtering if available
-            if self.delta_service and session_id:
-                # Get session's last processed timestamp
-                last_processed = self.delta_service.ai_session_manager.get_session_timestamp(session_id)
-                roll_timestamp = roll_data.get('ts') or roll_data.get('timestamp')
-                
-                if roll_timestamp and last_processed and roll_timestamp < last_processed:
-                    logger.debug(f"Filtering old roll {roll_timestamp} < {last_processed} for client {client_id}")
-                    return False  # Skip old roll
-            
-            # Add client ID to roll
-            roll_data['client_id'] = client_id
-            
-            self.client_rolls[client_id].append(roll_data)
-            
-            # Limit roll count
-            if len(self.client_rolls[client_id]) > self.max_rolls_per_client:
-                self.client_rolls[client_id] = self.client_rolls[client_id][-self.max_rolls_per_client:]
-            
-            logger.debug(f"Added roll from client {client_id}: {roll_data.get('formula', 'unknown')}")
-            return True
+        return self._store_item(client_id, roll_data, True, self._get_ingest_watermark(session_id))
+    
+    def add_items_with_delta_filtering(self, client_id: str, items: List[Dict[str, Any]], session_id: str,
+                                       detect_rolls: bool = True) -> int:
+        """
+        Add a batch of messages and rolls with delta filtering
+        
+        The session watermark is read once for the whole batch.
+        
+        Args:
+            client_id: WebSocket client identifier
+            items: Message dictionaries; type 'roll' marks a dice roll
+            session_id: AI session ID for delta filtering
+            detect_rolls: Store type 'roll' items as rolls (False stores everything as messages)
             
-        except Exception as e:
-            logger.error(f"Error adding roll from client {client_id}: {e}")
-            return False
+        Returns:
+            Number of items stored or already present
+        """
+        watermark = self._get_ingest_watermark(session_id)
+        stored = 0
+        for item in items:
+            is_roll = detect_rolls and item.get('type') == 'roll'
+            if is_roll:
+                logger.debug(f"Detected dice roll: {item.get('content', '')} (type: roll)")
+            stored += self._store_item(client_id, item, is_roll, watermark)
+        return stored
     
     def add_message(self, client_id: str, message: Dict[str, Any]) -> bool:
         """
@@ -161,34 +221,7 @@ class WebSocketMessageCollector:
         Returns:
             True if message added successfully
         """
-        try:
-            if client_id not in self.client_messages:
-                self.client_messages[client_id] = []
-            
-            # Validate message structure
-            if not self._validate_message(message):
-                logger.warning(f"Invalid message structure from client {client_id}: {message}")
-                return False
-            
-            # Add timestamp if not present
-            if 'timestamp' not in message:
-                message['timestamp'] = int(time.time() * 1000)
-            
-            # Add client ID to message
-            message['client_id'] = client_id
-            
-            self.client_messages[client_id].append(message)
-            
-            # Limit message count
-            if len(self.client_messages[client_id]) > self.max_messages_per_client:
-                self.client_messages[client_id] = self.client_messages[client_id][-self.max_messages_per_client:]
-            
-            logger.debug(f"Added message from client {client_id}: {message.get('type', 'unknown')}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error adding message from client {client_id}: {e}")
-            return False
+        return self._store_item(client_id, message, False, None)
     
     def add_roll(self, client_id: str, roll_data: Dict[str, Any]) -> bool:
         """
@@ -201,34 +234,7 @@ class WebSocketMessageCollector:
         Returns:
             True if roll added successfully
         """
-        try:
-            if client_id not in self.client_rolls:
-                self.client_rolls[client_id] = []
-            
-            # Validate roll structure
-            if not self._validate_roll(roll_data):
-                logger.warning(f"Invalid roll structure from client {client_id}: {roll_data}")
-                return False
-            
-            # Add timestamp if not present
-            if 'timestamp' not in roll_data:
-                roll_data['timestamp'] = int(time.time() * 1000)
-            
-            # Add client ID to roll
-            roll_data['client_id'] = client_id
-            
-            self.client_rolls[client_id].append(roll_data)
-            
-            # Limit roll count
-            if len(self.client_rolls[client_id]) > self.max_rolls_per_client:
-                self.client_rolls[client_id] = self.client_rolls[client_id][-self.max_rolls_per_client:]
-            
-            logger.debug(f"Added roll from client {client_id}: {roll_data.get('formula', 'unknown')}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error adding roll from client {client_id}: {e}")
-            return False
+        return self._store_item(client_id, roll_data, True, None)
     
     def get_combined_messages(self, client_id: str, max_count: int = 50, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -243,32 +249,40 @@ class WebSocketMessageCollector:
             Combined list of messages and rolls in chronological order (oldest first)
         """
         try:
-            messages = self.client_messages.get(client_id, [])
-            rolls = self.client_rolls.get(client_id, [])
-            
-            # Combine all items
-            all_items = messages + rolls
-            
-            # Filter out combat_context messages (should only come from get_encounter tool)
-            all_items = [item for item in all_items if item.get('type') != 'combat_context']
+            store = self.get_item_store(client_id)
+            if store is None:
+                return []
             
-            # Apply delta filtering if session_id is provided
+            # The store's index is already merged, timestamp-ordered and free of
+            # combat_context messages (those only come from the get_encounter tool)
             if session_id and self.delta_service:
-                all_items = self._apply_delta_filtering(session_id, all_items)
+                all_items = self._get_delta_items(session_id, store)
+                return all_items[-max_count:] if len(all_items) > max_count else all_items
             
-            # Sort by timestamp (oldest first for proper AI processing)
-            all_items.sort(key=lambda x: x.get('timestamp', 0))
-            
-            # Get most recent items, then return in chronological order (oldest first)
-            recent_items = all_items[-max_count:] if len(all_items) > max_count else all_items
-            recent_items.sort(key=lambda x: x.get('timestamp', 0))  # Ensure chronological order
-            
-            return recent_items
+            if max_count <= 0:
+                return store.all_items()
+            return store.last(max_count)
             
         except Exception as e:
             logger.error(f"Error getting combined messages for client {client_id}: {e}")
             return []
     
+    def get_chat_messages(self, client_id: str, max_count: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get the chat view of a client's log (no dice rolls)
+        
+        Args:
+            client_id: WebSocket client identifier
+            max_count: Maximum number of messages to return
+            
+        Returns:
+            Most recent chat messages in chronological order (oldest first)
+        """
+        store = self.get_item_store(client_id)
+        if store is None:
+            return []
+        return store.last_messages(max_count)
+    
     def get_delta_filtered_messages(self, client_id: str, session_id: str, max_count: int = 50) -> List[Dict[str, Any]]:
         """
         Get delta-filtered messages for a specific AI session
@@ -285,11 +299,6 @@ class WebSocketMessageCollector:
             # Get all combined messages with delta filtering applied
             messages = self.get_combined_messages(client_id, max_count, session_id)
             
-            # Log delta statistics for debugging
-            if self.delta_service:
-                stats = self.get_delta_stats(client_id, session_id)
-                # logger.info(f"Delta filtering for session {session_id}: {stats['filtered_count']}/{stats['original_count']} new messages (delta ratio: {stats['delta_ratio']:.1%})")
-            
             return messages
             
         except Exception as e:
@@ -336,16 +345,14 @@ class WebSocketMessageCollector:
                 logger.warning(f"No combat_id in combat state for client {client_id}")
                 return False
             
-            # Initialize client states if needed
-            if client_id not in self.client_combat_states:
-                self.client_combat_states[client_id] = {}
-            
             # Store combat state with timestamp and is_active flag
-            self.client_combat_states[client_id][encounter_id] = {
+            log = self._get_log(client_id)
+            log.combat_states[encounter_id] = {
                 **combat_state,
                 'last_updated': int(time.time() * 1000),
                 'is_active': combat_state.get('is_active', False)
             }
+            log.record(VIEW_COMBAT, next(self._event_counter))
             
             logger.info(f"Updated combat state for client {client_id}: encounter_id={encounter_id}, is_active={combat_state.get('is_active', False)}")
             return True
@@ -385,12 +392,11 @@ class WebSocketMessageCollector:
                 # This handles case where frontend sends encounters array without specifying which is active
                 first_encounter_active = (active_combat_id is None)
                 
-                # Initialize client states if needed
-                if client_id not in self.client_combat_states:
-                    self.client_combat_states[client_id] = {}
+                log = self._get_log(client_id)
+                client_states = log.combat_states
                 
                 # Get currently tracked encounter IDs for this client
-                current_encounter_ids = set(self.client_combat_states[client_id].keys()) if client_id in self.client_combat_states else set()
+                current_encounter_ids = set(client_states.keys())
                 
                 # Store each encounter and sync with CombatEncounterService
                 for i, encounter_state in enumerate(encounter_states):
@@ -405,7 +411,7 @@ class WebSocketMessageCollector:
                     is_active = (encounter_id == active_combat_id) if active_combat_id else (first_encounter_active and i == 0)
                     
                     # Update local cache
-                    self.client_combat_states[client_id][encounter_id] = {
+                    client_states[encounter_id] = {
                         **encounter_state,
                         'is_active': is_active,
                         'last_updated': int(time.time() * 1000)
@@ -426,10 +432,11 @@ class WebSocketMessageCollector:
                     remaining_encounters = [e for e in encounter_states if e.get('in_combat', False)]
                     if remaining_encounters:
                         first_remaining_id = remaining_encounters[0].get('combat_id')
-                        if first_remaining_id in self.client_combat_states[client_id]:
-                            self.client_combat_states[client_id][first_remaining_id]['is_active'] = True
+                        if first_remaining_id in client_states:
+                            client_states[first_remaining_id]['is_active'] = True
                             logger.info(f"Marked first remaining encounter {first_remaining_id} as active for client {client_id}")
                 
+                log.record(VIEW_COMBAT, next(self._event_counter))
                 logger.info(f"Updated {len(encounter_states)} combat states for client {client_id}, active={active_combat_id or 'first'}, synced with CombatEncounterService")
                 return True
             else:
@@ -461,7 +468,7 @@ class WebSocketMessageCollector:
             Cached combat state for active encounter or None if not available
         """
         try:
-            client_states = self.client_combat_states.get(client_id, {})
+            client_states = self._get_combat_states(client_id)
             
             # FIXED: Return ANY encounter if combat is active, not just is_active=True
             # This handles case where encounters are active but don't have is_active=True set properly
@@ -486,7 +493,7 @@ class WebSocketMessageCollector:
             Dict with active_count and encounters array
         """
         try:
-            client_states = self.client_combat_states.get(client_id, {})
+            client_states = self._get_combat_states(client_id)
             
             # Build response with is_active flags
             encounters = []
@@ -521,7 +528,7 @@ class WebSocketMessageCollector:
             Cached combat state or None if not found
         """
         try:
-            client_states = self.client_combat_states.get(client_id, {})
+            client_states = self._get_combat_states(client_id)
             return client_states.get(encounter_id)
             
         except Exception as e:
@@ -539,7 +546,10 @@ class WebSocketMessageCollector:
             True if cleared successfully
         """
         try:
-            self.client_combat_states.pop(client_id, None)
+            log = self.client_logs.get(client_id)
+            if log is not None:
+                log.combat_states.clear()
+                log.forget(VIEW_COMBAT)
             logger.debug(f"Cleared all combat states for client {client_id}")
             return True
             
@@ -559,8 +569,9 @@ class WebSocketMessageCollector:
             True if cleared successfully
         """
         try:
-            if client_id in self.client_combat_states:
-                self.client_combat_states[client_id].pop(encounter_id, None)
+            log = self.client_logs.get(client_id)
+            if log is not None:
+                log.combat_states.pop(encounter_id, None)
                 logger.debug(f"Cleared combat state for encounter {encounter_id} on client {client_id}")
             return True
             
@@ -580,7 +591,9 @@ class WebSocketMessageCollector:
             True if set successfully
         """
         try:
-            self.client_game_delta[client_id] = delta
+            log = self._get_log(client_id)
+            log.game_delta = delta
+            log.record(VIEW_GAME_DELTA, next(self._event_counter))
             logger.info(f"Game delta stored for client {client_id}: {delta}")
             return True
             
@@ -599,7 +612,8 @@ class WebSocketMessageCollector:
             Game delta object or None if not available
         """
         try:
-            return self.client_game_delta.get(client_id)
+            log = self.client_logs.get(client_id)
+            return log.game_delta if log is not None else None
             
         except Exception as e:
             logger.error(f"Error getting game delta for client {client_id}: {e}")
@@ -616,7 +630,10 @@ class WebSocketMessageCollector:
             True if cleared successfully
         """
         try:
-            self.client_game_delta.pop(client_id, None)
+            log = self.client_logs.get(client_id)
+            if log is not None:
+                log.game_delta = None
+                log.forget(VIEW_GAME_DELTA)
             logger.debug(f"Cleared game delta for client {client_id}")
             return True
             
@@ -637,10 +654,12 @@ class WebSocketMessageCollector:
         """
         try:
             # Store world state with timestamp
-            self.world_states[client_id] = {
+            log = self._get_log(client_id)
+            log.world_state = {
                 **world_state,
                 'last_updated': int(time.time() * 1000)
             }
+            log.record(VIEW_WORLD_STATE, next(self._event_counter))
             
             logger.info(f"World state updated for client {client_id}: "
                        f"scene={world_state.get('active_scene', {}).get('name', 'unknown')}, "
@@ -663,12 +682,29 @@ class WebSocketMessageCollector:
             World state object or None if not available
         """
         try:
-            return self.world_states.get(client_id)
+            log = self.client_logs.get(client_id)
+            return log.world_state if log is not None else None
             
         except Exception as e:
             logger.error(f"Error retrieving world state for client {client_id}: {e}")
             return None
     
+    def get_world_state_version(self, client_id: str) -> int:
+        """
+        Get the version of a client's stored world state
+        
+        Versions increase with every stored world state, so a version greater
+        than one read earlier means fresh state has arrived since.
+        
+        Args:
+            client_id: WebSocket client identifier
+            
+        Returns:
+            Version number, or 0 if no world state is stored
+        """
+        log = self.client_logs.get(client_id)
+        return log.version(VIEW_WORLD_STATE) if log is not None else 0
+    
     def clear_world_state(self, client_id: str) -> bool:
         """
         Clear world state for a client
@@ -680,7 +716,10 @@ class WebSocketMessageCollector:
             True if cleared successfully
         """
         try:
-            self.world_states.pop(client_id, None)
+            log = self.client_logs.get(client_id)
+            if log is not None:
+                log.world_state = None
+                log.forget(VIEW_WORLD_STATE)
             logger.debug(f"Cleared world state for client {client_id}")
             return True
             
@@ -699,12 +738,7 @@ class WebSocketMessageCollector:
             True if cleared successfully
         """
         try:
-            self.client_messages.pop(client_id, None)
-            self.client_rolls.pop(client_id, None)
-            self.client_last_processed.pop(client_id, None)
-            self.client_combat_states.pop(client_id, None)  # CHANGED: from client_combat_state
-            self.client_game_delta.pop(client_id, None)
-            self.world_states.pop(client_id, None)
+            self.client_logs.pop(client_id, None)
             
             logger.debug(f"Cleared data for client {client_id}")
             return True
@@ -713,26 +747,31 @@ class WebSocketMessageCollector:
             logger.error(f"Error clearing data for client {client_id}: {e}")
             return False
     
-    def _apply_delta_filtering(self, session_id: str, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _get_delta_items(self, session_id: str, store: ClientItemStore) -> List[Dict[str, Any]]:
         """
-        Apply delta filtering to messages using the delta service
+        Get a client's items that are new for a session
+        
+        Bisects the timestamp index at the session watermark (or reuses the
+        session's cursor) instead of checking every item.
         
         Args:
             session_id: AI session ID for timestamp tracking
-            messages: List of messages to filter
+            store: The client's item store
             
         Returns:
-            Filtered list containing only new messages since last AI call
+            Items newer than the session watermark, oldest first
         """
+        if not len(store):
+            return []
+        
         try:
-            if self.delta_service:
-                return self.delta_service.apply_message_delta(session_id, messages)
-            else:
-                logger.warning(f"Delta service not available for session {session_id}, returning all messages")
-                return messages
+            watermark = self.delta_service.get_delta_watermark(session_id, store.newest_timestamp())
+            if watermark is None:
+                return store.all_items()
+            return store.newer_than(watermark, cursor_id=session_id)
         except Exception as e:
             logger.error(f"Error applying delta filtering for session {session_id}: {e}")
-            return messages
+            return store.all_items()
     
     def _validate_message(self, message: Dict[str, Any]) -> bool:
         """
@@ -816,8 +855,10 @@ class WebSocketMessageCollector:
             Client statistics
         """
         try:
-            messages = self.client_messages.get(client_id, [])
-            rolls = self.client_rolls.get(client_id, [])
+            log = self.client_logs.get(client_id)
+            store = log.items if log is not None else None
+            messages = store.messages if store is not None else []
+            rolls = store.rolls if store is not None else []
             
             return {
                 'client_id': client_id,
@@ -826,6 +867,8 @@ class WebSocketMessageCollector:
                 'total_items': len(messages) + len(rolls),
                 'last_message_time': messages[-1].get('timestamp') if messages else None,
                 'last_roll_time': rolls[-1].get('timestamp') if rolls else None,
+                'ingest': store.get_ingest_stats() if store is not None else {},
+                'event_log': log.get_stats() if log is not None else {},
                 'timestamp': datetime.now().isoformat(),
                 'delta_filtering_enabled': self.delta_service is not None
             }
@@ -842,16 +885,17 @@ class WebSocketMessageCollector:
             All client statistics
         """
         try:
-            total_messages = sum(len(msgs) for msgs in self.client_messages.values())
-            total_rolls = sum(len(rolls) for rolls in self.client_rolls.values())
-            total_clients = len(set(list(self.client_messages.keys()) + list(self.client_rolls.keys())))
+            total_messages = sum(len(log.items.messages) for log in self.client_logs.values())
+            total_rolls = sum(len(log.items.rolls) for log in self.client_logs.values())
+            total_clients = len(self.client_logs)
             
             return {
                 'total_clients': total_clients,
                 'total_messages': total_messages,
                 'total_rolls': total_rolls,
                 'total_items': total_messages + total_rolls,
-                'client_ids': list(set(list(self.client_messages.keys()) + list(self.client_rolls.keys()))),
+                'client_ids': list(self.client_logs.keys()),
+                'ingest_by_client': {client_id: log.items.get_ingest_stats() for client_id, log in self.client_logs.items()},
                 'timestamp': datetime.now().isoformat(),
                 'delta_filtering_enabled': self.delta_service is not None
             }
@@ -921,6 +965,22 @@ def add_client_roll_with_delta(client_id: str, roll_data: Dict[str, Any], sessio
     """
     return websocket_message_collector.add_roll_with_delta_filtering(client_id, roll_data, session_id)
 
+def add_client_items_with_delta(client_id: str, items: List[Dict[str, Any]], session_id: str,
+                                detect_rolls: bool = True) -> int:
+    """
+    Add a batch of messages and rolls for a client with delta filtering (convenience function)
+    
+    Args:
+        client_id: WebSocket client identifier
+        items: Message dictionaries; type 'roll' marks a dice roll
+        session_id: AI session ID for delta filtering
+        detect_rolls: Store type 'roll' items as rolls (False stores everything as messages)
+        
+    Returns:
+        Number of items stored
+    """
+    return websocket_message_collector.add_items_with_delta_filtering(client_id, items, session_id, detect_rolls)
+
 def get_combined_client_messages(client_id: str, max_count: int = 50, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Get combined messages and rolls for a client with optional delta filtering
@@ -935,6 +995,19 @@ def get_combined_client_messages(client_id: str, max_count: int = 50, session_id
     """
     return websocket_message_collector.get_combined_messages(client_id, max_count, session_id)
 
+def get_client_chat_messages(client_id: str, max_count: int = 50) -> List[Dict[str, Any]]:
+    """
+    Get recent chat messages (no dice rolls) for a client
+    
+    Args:
+        client_id: WebSocket client identifier
+        max_count: Maximum number of messages to return
+        
+    Returns:
+        Chat messages in chronological order
+    """
+    return websocket_message_collector.get_chat_messages(client_id, max_count)
+
 def get_delta_filtered_client_messages(client_id: str, session_id: str, max_count: int = 50) -> List[Dict[str, Any]]:
     """
     Get delta-filtered messages for a specific AI session
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Connection Send Queue for The Gold Box
+Per-connection outbound queue drained by a dedicated writer task
+
+Callers enqueue frames and return immediately, so a slow or congested browser
+never stalls the AI loop or tool execution. Frames go out in priority order:
+frontend RPC requests and control frames first, then regular frames, then bulk
+chat output. A full queue is handled by the configured overflow policy.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Deque, List
+
+from shared.core.message_protocol import MessageProtocol
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, highest first
+LANE_CONTROL = 0
+LANE_NORMAL = 1
+LANE_BULK = 2
+LANE_NAMES = ('control', 'normal', 'bulk')
+
+# Frames the frontend must act on promptly: RPC requests waited on by tools and connection control
+CONTROL_MESSAGE_TYPES = frozenset({
+    MessageProtocol.TYPE_CONNECTED,
+    MessageProtocol.TYPE_PONG,
+    MessageProtocol.TYPE_EXECUTE_ROLL,
+    MessageProtocol.TYPE_COMBAT_STATE_REFRESH,
+    MessageProtocol.TYPE_CREATE_ENCOUNTER,
+    MessageProtocol.TYPE_DELETE_ENCOUNTER,
+    MessageProtocol.TYPE_ADVANCE_TURN,
+    MessageProtocol.TYPE_GET_ACTOR_DETAILS,
+    MessageProtocol.TYPE_MODIFY_TOKEN_ATTRIBUTE,
+    MessageProtocol.TYPE_WORLD_STATE_REFRESH,
+    MessageProtocol.TYPE_BATCH_REQUEST,
+    'activate_combat'
+})
+
+# Chat output; kept in one lane so chunks, responses and turn completion stay in order
+BULK_MESSAGE_TYPES = frozenset({
+    MessageProtocol.TYPE_CHAT_RESPONSE,
+    MessageProtocol.TYPE_CHAT_RESPONSE_CHUNK,
+    'ai_turn_complete',
+    'ai_turn_paused',
+    'test_chat_response'
+})
+
+# Overflow policies
+OVERFLOW_DROP_OLDEST = 'drop_oldest'    # Evict the oldest frame of the lowest-priority lane
+OVERFLOW_DROP_NEWEST = 'drop_newest'    # Refuse the new frame
+OVERFLOW_DISCONNECT = 'disconnect'      # Treat the client as dead
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_DISCONNECT)
+
+# Defaults, overridable from the environment
+DEFAULT_MAX_QUEUE_SIZE = int(os.environ.get('WS_SEND_QUEUE_SIZE', 1000))
+DEFAULT_OVERFLOW_POLICY = os.environ.get('WS_SEND_OVERFLOW_POLICY', OVERFLOW_DROP_OLDEST).lower()
+
+def message_lane(message: Dict[str, Any]) -> int:
+    """Priority lane for an outbound frame"""
+    message_type = message.get('type')
+    if message_type in CONTROL_MESSAGE_TYPES:
+        return LANE_CONTROL
+    if message_type in BULK_MESSAGE_TYPES:
+        return LANE_BULK
+    return LANE_NORMAL
+
+class ConnectionSendQueue:
+    """
+    Bounded, prioritized outbound queue for one WebSocket connection
+    
+    Frames within a lane are sent in the order they were queued. A send
+    error stops the writer and is reported through on_failure; the queue
+    never disconnects the client itself.
+    """
+    
+    def __init__(
+        self,
+        client_id: str,
+        websocket,
+        max_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        overflow_policy: str = DEFAULT_OVERFLOW_POLICY,
+        on_failure: Optional[Callable[["ConnectionSendQueue", str], None]] = None,
+        on_drop: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ):
+        """
+        Initialize send queue
+        
+        Args:
+            client_id: Client this queue sends to
+            websocket: WebSocket connection with send_json()
+            max_size: Maximum number of queued frames across all lanes
+            overflow_policy: One of OVERFLOW_POLICIES
+            on_failure: Called with (queue, reason) when the connection should be dropped
+            on_drop: Called with (client_id, message) for every frame discarded unsent
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            logger.warning(f"Unknown send queue overflow policy '{overflow_policy}', using {OVERFLOW_DROP_OLDEST}")
+            overflow_policy = OVERFLOW_DROP_OLDEST
+        
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_size = max(1, max_size)
+        self.overflow_policy = overflow_policy
+        self._on_failure = on_failure
+        self._on_drop = on_drop
+        
+        self._lanes: List[Deque[Dict[str, Any]]] = [deque() for _ in LANE_NAMES]
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self.closed = False
+        
+        # Statistics
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = [0] * len(LANE_NAMES)
+        self.high_water = 0
+        self.send_errors = 0
+        self.max_send_seconds = 0.0
+    
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+    
+    def start(self) -> None:
+        """Start the writer task"""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._run())
+    
+    def put(self, message: Dict[str, Any]) -> bool:
+        """
+        Queue a frame for sending
+        
+        Args:
+            message: Frame to send
+        
+        Returns:
+            True if the frame was queued
+        """
+        if self.closed:
+            return False
+        
+        lane = message_lane(message)
+        if len(self) >= self.max_size and not self._make_room(lane, message):
+            return False
+        
+        self._lanes[lane].append(message)
+        self.enqueued += 1
+        self.high_water = max(self.high_water, len(self))
+        self._ready.set()
+        return True
+    
+    def _make_room(self, lane: int, message: Dict[str, Any]) -> bool:
+        """Apply the overflow policy; returns True if the new frame may be queued"""
+        if self.overflow_policy == OVERFLOW_DISCONNECT:
+            logger.warning(f"Send queue for client {self.client_id} overflowed ({self.max_size} frames), disconnecting")
+            self._drop(lane, message)
+            self._fail("send queue overflow")
+            return False
+        
+        if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            # Never evict a frame that outranks the new one
+            for victim_lane in range(len(self._lanes) - 1, lane - 1, -1):
+                if self._lanes[victim_lane]:
+                    self._drop(victim_lane, self._lanes[victim_lane].popleft())
+                    return True
+        
+        self._drop(lane, message)
+        return False
+    
+    def _drop(self, lane: int, message: Dict[str, Any]) -> None:
+        """Discard a frame unsent"""
+        self.dropped[lane] += 1
+        logger.debug(f"Dropped {message.get('type')} frame for client {self.client_id} ({LANE_NAMES[lane]} lane)")
+        if self._on_drop is not None:
+            self._on_drop(self.client_id, message)
+    
+    def _fail(self, reason: str) -> None:
+        """Stop accepting frames and report the connection as failed"""
+        if self.closed:
+            return
+        self.closed = True
+        self._ready.set()
+        if self._on_failure is not None:
+            self._on_failure(self, reason)
+    
+    def _pop(self) -> Optional[Dict[str, Any]]:
+        """Next frame in priority order"""
+        for lane in self._lanes:
+            if lane:
+                return lane.popleft()
+        return None
+    
+    async def _run(self) -> None:
+        """Writer task: send queued frames until closed"""
+        while not self.closed:
+            message = self._pop()
+            if message is None:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            
+            started = time.monotonic()
+            try:
+                await self.websocket.send_json(message)
+            except Exception as e:
+                self.send_errors += 1
+                logger.error(f"Error sending to WebSocket client {self.client_id}: {e}")
+                self._fail(f"send failed: {e}")
+                break
+            
+            self.sent += 1
+            self.max_send_seconds = max(self.max_send_seconds, time.monotonic() - started)
+    
+    async def close(self) -> None:
+        """Stop the writer and discard frames that were not sent"""
+        self.closed = True
+        self._ready.set()
+        
+        writer, self._writer = self._writer, None
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+            try:
+                await writer
+            except (asyncio.CancelledError, Exception):
+                pass
+        
+        for lane_index, lane in enumerate(self._lanes):
+            while lane:
+                self._drop(lane_index, lane.popleft())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get queue statistics
+        
+        Returns:
+            Dictionary with queue depth per lane and send counters
+        """
+        return {
+            'depth': len(self),
+            'depth_by_lane': {name: len(lane) for name, lane in zip(LANE_NAMES, self._lanes)},
+            'high_water': self.high_water,
+            'max_size': self.max_size,
+            'overflow_policy': self.overflow_policy,
+            'enqueued': self.enqueued,
+            'sent': self.sent,
+            'dropped_by_lane': dict(zip(LANE_NAMES, self.dropped)),
+            'send_errors': self.send_errors,
+            'max_send_seconds': round(self.max_send_seconds, 4),
+            'closed': self.closed
+        }
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+RPC Registry for The Gold Box
+Correlates backend → frontend requests with their responses
+
+Every frontend round-trip (dice rolls, actor details, encounter tools) parks a
+future here keyed by client and request ID. The WebSocket connection manager
+owns the registry and fails a client's futures as soon as that client
+disconnects, so tool calls return immediately instead of waiting out their
+timeouts.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the age/latency histogram buckets; the last bucket is open-ended
+AGE_BUCKETS: Tuple[float, ...] = (1.0, 5.0, 15.0, 30.0)
+
+# Completed request IDs remembered to classify late and duplicate responses
+RECENTLY_COMPLETED_LIMIT = 1024
+
+class ClientDisconnectedException(Exception):
+    """Raised into pending requests when their client disconnects"""
+    pass
+
+def _bucket_labels() -> List[str]:
+    """Histogram bucket labels, e.g. ['<1s', '<5s', ..., '>=30s']"""
+    return [f"<{bound:g}s" for bound in AGE_BUCKETS] + [f">={AGE_BUCKETS[-1]:g}s"]
+
+def _bucket_index(seconds: float) -> int:
+    """Histogram bucket index for a duration"""
+    for index, bound in enumerate(AGE_BUCKETS):
+        if seconds < bound:
+            return index
+    return len(AGE_BUCKETS)
+
+class RpcRegistry:
+    """
+    Pending frontend requests keyed by client ID and request ID
+    
+    Responses are matched against the client that was asked, so a response
+    can only resolve a request sent to the same connection. Responses for
+    requests that already completed, timed out or were never issued are
+    rejected with a dictionary lookup and counted.
+    """
+    
+    def __init__(self):
+        """Initialize RPC registry"""
+        # client_id -> request_id -> (future, kind, created_at)
+        self._pending: Dict[str, Dict[str, Tuple[asyncio.Future, str, float]]] = {}
+        # (client_id, request_id) -> outcome ('resolved', 'rejected', 'released', 'disconnected')
+        self._recently_completed: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        
+        # Statistics
+        self.registered = 0
+        self.resolved = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self.failed_on_disconnect = 0
+        self.late_responses = 0
+        self.duplicate_responses = 0
+        self.unknown_responses = 0
+        self._latency_histogram = [0] * (len(AGE_BUCKETS) + 1)
+    
+    def register(self, client_id: str, request_id: str, kind: str = '') -> asyncio.Future:
+        """
+        Register a request and create the future its response will resolve
+        
+        Args:
+            client_id: Client the request is sent to
+            request_id: Unique request ID carried by the request and its response
+            kind: Request kind for statistics (e.g. 'roll_dice')
+        
+        Returns:
+            Future resolved with the response data
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(client_id, {})[request_id] = (future, kind, time.monotonic())
+        self.registered += 1
+        logger.debug(f"RPC {kind or 'request'} {request_id} registered for client {client_id} "
+                     f"({self.in_flight(client_id)} in flight)")
+        return future
+    
+    def _pop(self, client_id: str, request_id: str) -> Optional[Tuple[asyncio.Future, str, float]]:
+        """Remove and return a pending entry"""
+        client_pending = self._pending.get(client_id)
+        if not client_pending:
+            return None
+        
+        entry = client_pending.pop(request_id, None)
+        if not client_pending:
+            del self._pending[client_id]
+        return entry
+    
+    def _complete(self, client_id: str, request_id: str, outcome: str, created_at: float) -> None:
+        """Record a finished request for statistics and late-response detection"""
+        self._latency_histogram[_bucket_index(time.monotonic() - created_at)] += 1
+        self._recently_completed[(client_id, request_id)] = outcome
+        while len(self._recently_completed) > RECENTLY_COMPLETED_LIMIT:
+            self._recently_completed.popitem(last=False)
+    
+    def _reject_unmatched(self, client_id: str, request_id: str) -> None:
+        """Count a response that has no pending request"""
+        outcome = self._recently_completed.get((client_id, request_id))
+        if outcome in ('released', 'disconnected'):
+            self.late_responses += 1
+            logger.debug(f"Late response for request {request_id} from client {client_id} ({outcome})")
+        elif outcome is not None:
+            self.duplicate_responses += 1
+            logger.debug(f"Duplicate response for request {request_id} from client {client_id}")
+        else:
+            self.unknown_responses += 1
+            logger.warning(f"Received response for unknown request_id {request_id} from client {client_id}")
+    
+    def resolve(self, client_id: str, request_id: str, result: Any) -> bool:
+        """
+        Resolve a pending request with its response data
+        
+        Args:
+            client_id: Client the response came from
+            request_id: Request ID from the response
+            result: Response data
+        
+        Returns:
+            True if a waiting request was resolved
+        """
+        entry = self._pop(client_id, request_id)
+        if entry is None:
+            self._reject_unmatched(client_id, request_id)
+            return False
+        
+        future, kind, created_at = entry
+        self._complete(client_id, request_id, 'resolved', created_at)
+        if future.done():
+            return False
+        
+        future.set_result(result)
+        self.resolved += 1
+        logger.info(f"Resolved pending {kind or 'request'} {request_id} for client {client_id}")
+        return True
+    
+    def reject(self, client_id: str, request_id: str, error: Exception) -> bool:
+        """
+        Fail a pending request with an error reported by the frontend
+        
+        Args:
+            client_id: Client the error came from
+            request_id: Request ID from the error message
+            error: Exception raised to the waiter
+        
+        Returns:
+            True if a waiting request was failed
+        """
+        entry = self._pop(client_id, request_id)
+        if entry is None:
+            self._reject_unmatched(client_id, request_id)
+            return False
+        
+        future, kind, created_at = entry
+        self._complete(client_id, request_id, 'rejected', created_at)
+        if future.done():
+            return False
+        
+        future.set_exception(error)
+        self.rejected += 1
+        logger.info(f"Rejected pending {kind or 'request'} {request_id} for client {client_id}: {error}")
+        return True
+    
+    def release(self, client_id: str, request_id: str) -> bool:
+        """
+        Remove a request whose waiter gave up (timeout or error)
+        
+        Safe to call unconditionally from a finally block.
+        
+        Args:
+            client_id: Client the request was sent to
+            request_id: Request ID
+        
+        Returns:
+            True if the request was still pending (i.e. no response arrived)
+        """
+        entry = self._pop(client_id, request_id)
+        if entry is None:
+            return False
+        
+        future, _, created_at = entry
+        self._complete(client_id, request_id, 'released', created_at)
+        self.abandoned += 1
+        if not future.done():
+            future.cancel()
+        return True
+    
+    def fail_client(self, client_id: str, reason: str = 'client disconnected') -> int:
+        """
+        Fail every pending request of a client
+        
+        Args:
+            client_id: Client that disconnected
+            reason: Reason given to waiters
+        
+        Returns:
+            Number of requests failed
+        """
+        client_pending = self._pending.pop(client_id, None)
+        if not client_pending:
+            return 0
+        
+        for request_id, (future, kind, created_at) in client_pending.items():
+            self._complete(client_id, request_id, 'disconnected', created_at)
+            if not future.done():
+                future.set_exception(ClientDisconnectedException(
+                    f"{kind or 'Request'} {request_id} aborted: {reason} ({client_id})"
+                ))
+        
+        self.failed_on_disconnect += len(client_pending)
+        logger.info(f"Failed {len(client_pending)} pending requests for client {client_id}: {reason}")
+        return len(client_pending)
+    
+    def is_pending(self, client_id: str, request_id: str) -> bool:
+        """Check whether a request is still waiting for its response"""
+        return request_id in self._pending.get(client_id, ())
+    
+    def in_flight(self, client_id: Optional[str] = None) -> int:
+        """
+        Count pending requests
+        
+        Args:
+            client_id: Only count this client's requests (None for all clients)
+        
+        Returns:
+            Number of pending requests
+        """
+        if client_id is not None:
+            return len(self._pending.get(client_id, ()))
+        return sum(len(client_pending) for client_pending in self._pending.values())
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get registry statistics
+        
+        Returns:
+            Dictionary with in-flight counts, age histograms and response counters
+        """
+        now = time.monotonic()
+        labels = _bucket_labels()
+        age_histogram = [0] * len(labels)
+        by_kind: Dict[str, int] = {}
+        oldest_age = 0.0
+        
+        for client_pending in self._pending.values():
+            for _, kind, created_at in client_pending.values():
+                age = now - created_at
+                age_histogram[_bucket_index(age)] += 1
+                by_kind[kind or 'unknown'] = by_kind.get(kind or 'unknown', 0) + 1
+                oldest_age = max(oldest_age, age)
+        
+        return {
+            'in_flight': self.in_flight(),
+            'in_flight_by_client': {client_id: len(client_pending) for client_id, client_pending in self._pending.items()},
+            'in_flight_by_kind': by_kind,
+            'oldest_in_flight_seconds': round(oldest_age, 3),
+            'in_flight_age_histogram': dict(zip(labels, age_histogram)),
+            'completed_latency_histogram': dict(zip(labels, self._latency_histogram)),
+            'registered': self.registered,
+            'resolved': self.resolved,
+            'rejected': self.rejected,
+            'abandoned': self.abandoned,
+            'failed_on_disconnect': self.failed_on_disconnect,
+            'late_responses': self.late_responses,
+            'duplicate_responses': self.duplicate_responses,
+            'unknown_responses': self.unknown_responses
+        }
@@ -175,7 +175,7 @@ def get_message_collector() -> Any:
     Get the message collector from ServiceRegistry.
     
     Returns:
-        MessageCollector instance from ServiceRegistry
+        WebSocketMessageCollector instance (the per-client event logs) from ServiceRegistry
         
     Raises:
         RuntimeError: If ServiceRegistry is not ready or message_collector is not registered
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Task Supervisor for The Gold Box
+Tracks and bounds the background tasks started for WebSocket messages
+
+Every slow-path message (chat messages, dice rolls, combat context, AI turns)
+runs as a supervised task. Concurrency is capped per client and globally, and
+a new AI turn for a client supersedes the one still in flight: the old task is
+cancelled, which aborts its pending LiteLLM call, and the new turn starts once
+the old one has unwound so the two never race on the same session history.
+
+License: CC-BY-NC-SA 4.0 (compatible with dependencies)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Coroutine, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Concurrency limits
+DEFAULT_MAX_RUNNING_PER_CLIENT = 4
+DEFAULT_MAX_RUNNING_GLOBAL = 32
+DEFAULT_MAX_TRACKED_PER_CLIENT = 64  # Running + waiting; further tasks are refused
+
+# Task states
+STATE_WAITING = 'waiting'
+STATE_RUNNING = 'running'
+
+@dataclass
+class SupervisedTask:
+    """Bookkeeping for one supervised task"""
+    task_id: int
+    client_id: str
+    kind: str
+    supersede_key: Optional[Tuple[str, str]] = None
+    state: str = STATE_WAITING
+    created_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+    superseded: bool = False
+    bounded: bool = True
+    task: Optional[asyncio.Task] = None
+
+class TaskSupervisor:
+    """
+    Supervises background tasks per client
+    
+    Tasks wait for a per-client and a global slot before their coroutine
+    starts. Tasks sharing a supersede key replace each other: starting a new
+    one cancels the previous one.
+    """
+    
+    def __init__(
+        self,
+        max_running_per_client: int = DEFAULT_MAX_RUNNING_PER_CLIENT,
+        max_running_global: int = DEFAULT_MAX_RUNNING_GLOBAL,
+        max_tracked_per_client: int = DEFAULT_MAX_TRACKED_PER_CLIENT
+    ):
+        """
+        Initialize task supervisor
+        
+        Args:
+            max_running_per_client: Maximum tasks running at once for one client
+            max_running_global: Maximum tasks running at once across all clients
+            max_tracked_per_client: Maximum running plus waiting tasks for one client
+        """
+        self.max_running_per_client = max_running_per_client
+        self.max_running_global = max_running_global
+        self.max_tracked_per_client = max_tracked_per_client
+        
+        self._global_slots = asyncio.Semaphore(max_running_global)
+        self._client_slots: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: Dict[int, SupervisedTask] = {}
+        self._client_tasks: Dict[str, Set[int]] = {}
+        self._supersedable: Dict[Tuple[str, str], SupervisedTask] = {}
+        self._next_task_id = 1
+        
+        # Statistics
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.superseded = 0
+        self.refused = 0
+    
+    def spawn(
+        self,
+        client_id: str,
+        kind: str,
+        coro: Coroutine,
+        supersede: bool = False,
+        bounded: bool = True
+    ) -> Optional[asyncio.Task]:
+        """
+        Start a supervised background task
+        
+        Args:
+            client_id: Client the task works for
+            kind: Task kind, e.g. 'chat_request'
+            coro: Coroutine to run
+            supersede: Cancel this client's in-flight task of the same kind
+            bounded: Wait for slots and count against the tracked limit; False for
+                short housekeeping (e.g. a disconnect) that must run even when the
+                client's slots are held by the tasks it cleans up
+        
+        Returns:
+            The task, or None if the client already has too many tasks
+        """
+        if bounded and len(self._client_tasks.get(client_id, ())) >= self.max_tracked_per_client:
+            coro.close()
+            self.refused += 1
+            logger.warning(f"Refusing {kind} task for client {client_id}: "
+                           f"{self.max_tracked_per_client} tasks already tracked")
+            return None
+        
+        record = SupervisedTask(task_id=self._next_task_id, client_id=client_id, kind=kind, bounded=bounded)
+        self._next_task_id += 1
+        
+        previous_task = None
+        if supersede:
+            record.supersede_key = (client_id, kind)
+            previous = self._supersedable.get(record.supersede_key)
+            if previous is not None and not previous.task.done():
+                previous.superseded = True
+                previous.task.cancel()
+                previous_task = previous.task
+                self.superseded += 1
+                logger.info(f"{kind} task {previous.task_id} for client {client_id} superseded by task {record.task_id}")
+            self._supersedable[record.supersede_key] = record
+        
+        record.task = asyncio.create_task(self._run(record, coro, previous_task))
+        self._tasks[record.task_id] = record
+        self._client_tasks.setdefault(client_id, set()).add(record.task_id)
+        self.started += 1
+        return record.task
+    
+    async def _run(self, record: SupervisedTask, coro: Coroutine, previous_task: Optional[asyncio.Task]) -> Any:
+        """Wait for slots, run the coroutine and clean up"""
+        try:
+            if previous_task is not None:
+                # Let the superseded task unwind before this one touches the session
+                await asyncio.wait([previous_task])
+            
+            if record.bounded:
+                client_slots = self._client_slots.get(record.client_id)
+                if client_slots is None:
+                    client_slots = self._client_slots[record.client_id] = asyncio.Semaphore(self.max_running_per_client)
+                
+                async with client_slots, self._global_slots:
+                    record.state = STATE_RUNNING
+                    record.started_at = time.monotonic()
+                    result = await coro
+            else:
+                record.state = STATE_RUNNING
+                record.started_at = time.monotonic()
+                result = await coro
+            
+            self.completed += 1
+            return result
+        
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            logger.info(f"{record.kind} task {record.task_id} for client {record.client_id} cancelled"
+                        f"{' (superseded)' if record.superseded else ''}")
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"{record.kind} task {record.task_id} for client {record.client_id} failed: {e}", exc_info=True)
+        finally:
+            if record.state == STATE_WAITING:
+                coro.close()  # Never started
+            self._forget(record)
+    
+    def _forget(self, record: SupervisedTask) -> None:
+        """Remove a finished task from the tables"""
+        self._tasks.pop(record.task_id, None)
+        
+        client_tasks = self._client_tasks.get(record.client_id)
+        if client_tasks is not None:
+            client_tasks.discard(record.task_id)
+            if not client_tasks:
+                del self._client_tasks[record.client_id]
+                self._client_slots.pop(record.client_id, None)
+        
+        if record.supersede_key is not None and self._supersedable.get(record.supersede_key) is record:
+            del self._supersedable[record.supersede_key]
+    
+    async def wait_for_tasks(self, client_id: str, kinds: Tuple[str, ...], timeout: float) -> bool:
+        """
+        Wait for a client's in-flight tasks of the given kinds to finish
+        
+        Only tasks that exist when called are waited for.
+        
+        Args:
+            client_id: Client whose tasks are awaited
+            kinds: Task kinds to wait for, e.g. ('chat_message', 'dice_roll')
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            True if all of them finished within the timeout
+        """
+        current = asyncio.current_task()
+        tasks = [
+            record.task for task_id in self._client_tasks.get(client_id, ())
+            if (record := self._tasks.get(task_id)) is not None
+            and record.kind in kinds and record.task is not current and not record.task.done()
+        ]
+        if not tasks:
+            return True
+        
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.debug(f"{len(pending)} {'/'.join(kinds)} tasks for client {client_id} still running after {timeout}s")
+        return not pending
+    
+    def cancel_client(self, client_id: str) -> int:
+        """
+        Cancel every task of a client (except the calling task)
+        
+        Args:
+            client_id: Client whose tasks are cancelled
+        
+        Returns:
+            Number of tasks cancelled
+        """
+        current = asyncio.current_task()
+        cancelled = 0
+        for task_id in list(self._client_tasks.get(client_id, ())):
+            record = self._tasks.get(task_id)
+            if record is not None and record.task is not current and not record.task.done():
+                record.task.cancel()
+                cancelled += 1
+        
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} tasks for client {client_id}")
+        return cancelled
+    
+    def get_task_table(self) -> List[Dict[str, Any]]:
+        """
+        Get the live task table
+        
+        Returns:
+            One entry per tracked task, oldest first
+        """
+        now = time.monotonic()
+        return [
+            {
+                'task_id': record.task_id,
+                'client_id': record.client_id,
+                'kind': record.kind,
+                'state': record.state,
+                'age_seconds': round(now - record.created_at, 3),
+                'running_seconds': round(now - record.started_at, 3) if record.started_at is not None else 0.0,
+                'superseded': record.superseded
+            }
+            for record in sorted(self._tasks.values(), key=lambda record: record.task_id)
+        ]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get supervisor statistics
+        
+        Returns:
+            Dictionary with task counts and limits
+        """
+        running = sum(1 for record in self._tasks.values() if record.state == STATE_RUNNING)
+        return {
+            'tracked': len(self._tasks),
+            'running': running,
+            'waiting': len(self._tasks) - running,
+            'tasks_by_client': {client_id: len(task_ids) for client_id, task_ids in self._client_tasks.items()},
+            'max_running_per_client': self.max_running_per_client,
+            'max_running_global': self.max_running_global,
+            'max_tracked_per_client': self.max_tracked_per_client,
+            'started': self.started,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'superseded': self.superseded,
+            'refused': self.refused
+        }
@@ -189,6 +189,18 @@ class UniversalSettings:
             'required': False,
             'default': False,
             'description': 'Disable AI tool usage (get_messages, post_messages). Only enable if your AI provider does not support function calling.'
+        },
+        'stream responses': {
+            'type': bool,
+            'required': False,
+            'default': False,
+            'description': 'Stream AI responses and forward partial text to the client as it is generated'
+        },
+        'prompt caching': {
+            'type': bool,
+            'required': False,
+            'default': False,
+            'description': 'Lay out prompts static-first and send provider prompt cache hints'
         }
     }
     
@@ -458,6 +470,12 @@ class UniversalSettings:
                     schema_field = cls.SETTINGS_SCHEMA.get(settings_field, {})
                     provider_config[config_field] = schema_field.get('default')
             
+            # Streaming applies to both general and tactical LLMs
+            provider_config['stream'] = bool(settings.get('stream responses', cls.SETTINGS_SCHEMA['stream responses']['default']))
+            
+            # Prompt caching likewise applies to both
+            provider_config['prompt_caching'] = bool(settings.get('prompt caching', cls.SETTINGS_SCHEMA['prompt caching']['default']))
+            
             # Parse custom headers if provided
             custom_headers_str = provider_config.get('custom_headers', '{}')
             if custom_headers_str and custom_headers_str.strip() and custom_headers_str != '{}':
@@ -101,12 +101,10 @@ class WebSocketHandler:
             }
             
             # Manually add to connection manager since we already accepted
-            self.websocket_manager.active_connections.append(websocket)
-            self.websocket_manager.connection_info[client_id] = {
-                "websocket": websocket,
+            self.websocket_manager.register_connection(websocket, client_id, {
                 "connected_at": datetime.now().isoformat(),
                 **connection_info
-            }
+            })
             
             # Send connection confirmation
             await self.websocket_manager.send_to_client(client_id, {
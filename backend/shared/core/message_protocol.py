@@ -24,6 +24,7 @@ class MessageProtocol:
     TYPE_DISCONNECT = "disconnect"
     TYPE_CHAT_REQUEST = "chat_request"
     TYPE_CHAT_RESPONSE = "chat_response"
+    TYPE_CHAT_RESPONSE_CHUNK = "chat_response_chunk"
     TYPE_PING = "ping"
     TYPE_PONG = "pong"
     TYPE_ERROR = "error"
@@ -42,6 +43,8 @@ class MessageProtocol:
     TYPE_GAME_DELTA = "game_delta"
     TYPE_WORLD_STATE_SYNC = "world_state_sync"
     TYPE_WORLD_STATE_REFRESH = "world_state_refresh"
+    TYPE_BATCH_REQUEST = "batch_request"
+    TYPE_BATCH_RESULT = "batch_result"
     
     # Protocol version
     PROTOCOL_VERSION = "1.0"
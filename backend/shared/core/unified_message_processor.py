@@ -10,11 +10,13 @@ Replaces:
 License: CC-BY-NC-SA 4.0 (compatible with dependencies)
 """
 
+import hashlib
 import json
 import logging
 import re
 import html
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 from bs4 import BeautifulSoup
 
@@ -22,10 +24,20 @@ from bs4 import BeautifulSoup
 try:
     from services.message_services.chat_card_translator import get_translator
     from services.message_services.chat_card_translation_cache import get_current_cache, is_cache_active
+    from services.message_services.dynamic_chat_card_analyzer import parse_html, scan_html, analyze_chat_card
+    from services.message_services.compact_conversion_cache import get_compact_conversion_cache
 except ImportError:
     # Fallback for when running outside main application context
     def get_translator():
         return None
+    def parse_html(html_content):
+        return BeautifulSoup(html_content, 'html.parser')
+    def scan_html(soup, source=''):
+        return None
+    def analyze_chat_card(html_content, scan=None):
+        return None
+    def get_compact_conversion_cache():
+        return None
     def get_current_cache():
         return None
     def is_cache_active():
@@ -33,6 +45,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Generated system prompts kept by (role, prompt settings hash)
+SYSTEM_PROMPT_CACHE_SIZE = 32
+
 class UnifiedMessageProcessor:
     """
     Unified processor for all message transformations
@@ -66,6 +81,10 @@ class UnifiedMessageProcessor:
             (type_code, re.compile(pattern, re.IGNORECASE))
             for type_code, pattern in self.CLASSIFICATION_PATTERNS
         ]
+        # (ai_role, prompt settings hash) -> system prompt, least recently used first
+        self._system_prompts: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.system_prompt_hits = 0
+        self.system_prompt_misses = 0
         logger.info("UnifiedMessageProcessor initialized - single data flow for all message processing")
     
     def html_to_compact_json(self, html_content: str) -> Dict[str, Any]:
@@ -82,36 +101,131 @@ class UnifiedMessageProcessor:
             ValueError: If conversion fails (no silent fallbacks)
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Classify message type
-            message_type = self._classify_message(html_content)
-            
-            # Extract data based on type
-            if message_type == 'dr':
-                data = self._extract_dice_roll_data(soup)
-            elif message_type == 'cc':
-                data = self._extract_chat_card_data(soup)
-            elif message_type == 'cm':
-                data = self._extract_chat_message_data(soup)
-            else:
-                # No fallbacks - fail fast if type unknown
-                raise ValueError(f"Unknown message type: {message_type}")
-            
-            # Add type and timestamp
-            result = {'t': message_type, 'ts': int(datetime.now().timestamp() * 1000)}
-            result.update(data)
-            
-            # Sanitize result (no truncation)
-            result = self._sanitize_data(result)
-            
-            logger.debug(f"HTML → Compact: {message_type} → {result}")
-            return result
+            # Identical HTML converts to identical compact JSON for a given
+            # translation cache version - reuse earlier conversions
+            conversion_cache = get_compact_conversion_cache()
+            cache_version = self.translation_cache_version()
+            if conversion_cache is not None:
+                cached = conversion_cache.get(html_content, cache_version)
+                if cached is not None:
+                    cached['ts'] = int(datetime.now().timestamp() * 1000)
+                    return cached
+            
+            return self.finish_compact(html_content, self.analyze_html(html_content), cache_version)
             
         except Exception as e:
             logger.error(f"HTML to compact conversion failed: {e}")
             raise ValueError(f"Failed to convert HTML to compact JSON: {e}")
     
+    async def html_to_compact_json_many(self, html_contents: List[str]) -> List[Any]:
+        """
+        Convert many HTML messages to compact JSON, parsing them in the HTML parse pool
+        
+        Parsing and card analysis run in worker processes so the event loop
+        stays responsive; field codes are assigned here, where the translation
+        cache lives.
+        
+        Args:
+            html_contents: HTML content of each message
+            
+        Returns:
+            Compact JSON dictionary, or the ValueError its conversion raised, per message
+        """
+        from services.message_services.html_parse_pool import get_html_parse_pool
+        
+        conversion_cache = get_compact_conversion_cache()
+        cache_version = self.translation_cache_version()
+        results: List[Any] = [None] * len(html_contents)
+        
+        pending = []
+        for index, html_content in enumerate(html_contents):
+            cached = conversion_cache.get(html_content, cache_version) if conversion_cache is not None else None
+            if cached is not None:
+                cached['ts'] = int(datetime.now().timestamp() * 1000)
+                results[index] = cached
+            else:
+                pending.append(index)
+        
+        if pending:
+            analyses = await get_html_parse_pool().analyze_many([html_contents[index] for index in pending])
+            for index, analysis in zip(pending, analyses):
+                try:
+                    if isinstance(analysis, Exception):
+                        raise analysis
+                    results[index] = self.finish_compact(html_contents[index], analysis, cache_version)
+                except Exception as e:
+                    logger.error(f"HTML to compact conversion failed: {e}")
+                    results[index] = ValueError(f"Failed to convert HTML to compact JSON: {e}")
+        
+        return results
+    
+    def analyze_html(self, html_content: str) -> Dict[str, Any]:
+        """
+        Parse and analyze message HTML (the CPU-bound half of compact conversion)
+        
+        Has no side effects and returns plain picklable data, so it can run in
+        an HTML parse pool worker process.
+        
+        Args:
+            html_content: HTML content from Foundry
+            
+        Returns:
+            Dictionary with the type code 't' plus extracted 'data' (dice rolls,
+            chat messages) or the chat card structure 'card' (chat cards)
+            
+        Raises:
+            ValueError: If the message type is unknown
+        """
+        # Parse and index once - classification and card analysis share the result
+        soup = parse_html(html_content)
+        scan = scan_html(soup, html_content)
+        
+        # Classify message type
+        message_type = self._classify_message(html_content, scan)
+        
+        # Extract data based on type
+        if message_type == 'dr':
+            return {'t': message_type, 'data': self._extract_dice_roll_data(soup)}
+        elif message_type == 'cc':
+            return {'t': message_type, 'card': analyze_chat_card(html_content, scan)}
+        elif message_type == 'cm':
+            return {'t': message_type, 'data': self._extract_chat_message_data(soup)}
+        else:
+            # No fallbacks - fail fast if type unknown
+            raise ValueError(f"Unknown message type: {message_type}")
+    
+    def finish_compact(self, html_content: str, analysis: Dict[str, Any], cache_version: int) -> Dict[str, Any]:
+        """
+        Build compact JSON from an HTML analysis and cache it
+        
+        Args:
+            html_content: HTML content the analysis came from
+            analysis: Result of analyze_html()
+            cache_version: Translation cache version read before the analysis
+            
+        Returns:
+            Compact JSON dictionary
+        """
+        message_type = analysis['t']
+        if message_type == 'cc':
+            data = self._compact_chat_card(analysis['card'])
+        else:
+            data = analysis['data']
+        
+        # Add type and timestamp
+        result = {'t': message_type, 'ts': int(datetime.now().timestamp() * 1000)}
+        result.update(data)
+        
+        # Sanitize result (no truncation)
+        result = self._sanitize_data(result)
+        
+        conversion_cache = get_compact_conversion_cache()
+        if conversion_cache is not None:
+            conversion_cache.put(html_content, cache_version, result)
+        
+        logger.debug(f"HTML → Compact: {message_type} → {result}")
+        return result
+    
     def compact_to_api_format(self, compact_msg: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert compact JSON to Foundry API format - single authoritative implementation
@@ -269,8 +383,21 @@ class UnifiedMessageProcessor:
             logger.error(f"API message processing failed: {e}")
             raise ValueError(f"Failed to process API messages: {e}")
     
-    def _classify_message(self, html_content: str) -> str:
-        """Classify message type using patterns"""
+    def translation_cache_version(self) -> int:
+        """Version of the translation cache whose codes appear in chat card output"""
+        translator = get_translator()
+        cache = translator.cache if translator else get_current_cache()
+        return cache.cache_version if cache else 0
+    
+    def _classify_message(self, html_content: str, scan=None) -> str:
+        """Classify message type from scanned class names, or patterns when no scan is available"""
+        if scan is not None:
+            if scan.has_class_containing('dice-roll'):
+                return 'dr'
+            if scan.has_class_containing('chat-card') or scan.has_class_containing('activation-card'):
+                return 'cc'
+            return 'cm'  # Default to chat message
+        
         for type_code, pattern in self.compiled_patterns:
             if pattern.search(html_content):
                 return type_code
@@ -327,9 +454,9 @@ class UnifiedMessageProcessor:
         
         return data
     
-    def _extract_chat_card_data(self, soup: BeautifulSoup) -> Dict[str, Any]:
+    def _compact_chat_card(self, card_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Extract chat card data from HTML with dynamic field discovery
+        Build chat card data from its dynamic field discovery results
         Fail-fast architecture - no static fallbacks
         """
         # Use dynamic processing only - NO FALLBACKS
@@ -337,8 +464,7 @@ class UnifiedMessageProcessor:
         if not translator:
             raise ValueError("Chat card translator not available - fail-fast architecture")
         
-        html_content = str(soup)
-        compact_data = translator.html_to_compact(html_content)
+        compact_data = translator.compact_from_analysis(card_analysis)
         
         # Apply post-processing enhancements
         processed_data = translator.apply_post_processing([compact_data])
@@ -658,6 +784,20 @@ class UnifiedMessageProcessor:
         Returns:
             Enhanced system prompt string
         """
+        # The prompt only depends on the role, the player list and the combat status line
+        combat_context_info = self.combat_status_text(compact_messages)
+        player_list = context.get('player_list', '') if context else ''
+        settings_hash = hashlib.sha256(
+            json.dumps([player_list, combat_context_info]).encode('utf-8')
+        ).hexdigest()
+        key = (ai_role, settings_hash)
+        cached = self._system_prompts.get(key)
+        if cached is not None:
+            self._system_prompts.move_to_end(key)
+            self.system_prompt_hits += 1
+            return cached
+        self.system_prompt_misses += 1
+        
         # Build context codes and abbreviations from compact messages
         context_codes = []
         context_abbreviations = []
@@ -709,9 +849,6 @@ class UnifiedMessageProcessor:
             'player': 'You are assigned as a player, representing character(s) {player_list}. Your role is to participate in story via in-character chat and actions. EFFICIENCY: Roll multiple dice formulas in a single call when appropriate (e.g., attack roll + damage roll, or multiple saving throws together). Combine your character\'s description with dice rolls efficiently.'
         }
         
-        # Get player_list from context if available
-        player_list = context.get('player_list', '') if context else ''
-        
         # Replace {player_list} placeholder in player prompt
         player_role_prompt = role_prompts.get('player', '')
         if player_list:
@@ -724,6 +861,27 @@ class UnifiedMessageProcessor:
         
         role_specific_prompt = role_prompts.get(ai_role.lower(), role_prompts['gm'])
         
+        # Build enhanced system prompt (without dynamic field definitions)
+        system_prompt = f"""You are an AI assistant for tabletop RPG games, with role {ai_role}. {role_specific_prompt}{combat_context_info}"""
+        
+        self._system_prompts[key] = system_prompt
+        while len(self._system_prompts) > SYSTEM_PROMPT_CACHE_SIZE:
+            self._system_prompts.popitem(last=False)
+        
+        return system_prompt
+    
+    def combat_status_text(self, compact_messages: List[Dict[str, Any]]) -> str:
+        """
+        Combat status line of the system prompt
+        
+        Args:
+            compact_messages: List of compact messages for context
+        
+        Returns:
+            Status text, or an empty string when the messages have no combat context
+        """
+        has_combat = any(msg.get('t') == 'combat_context' for msg in compact_messages)
+        
         # Extract and add combat context if present
         combat_context_info = ""
         if has_combat:
@@ -752,10 +910,39 @@ In Combat: {combat_data.get('in_combat', False)}, Round: {combat_data.get('round
 
 """
         
-        # Build enhanced system prompt (without dynamic field definitions)
-        system_prompt = f"""You are an AI assistant for tabletop RPG games, with role {ai_role}. {role_specific_prompt}{combat_context_info}"""
+        return combat_context_info
         
-        return system_prompt
+    def split_system_prompt(self, system_prompt: str, compact_messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Separate the per-turn combat status from a generated system prompt
+        
+        Used by the prompt caching layout, which keeps the system prompt
+        unchanged between turns and sends the status with the turn instead.
+        
+        Args:
+            system_prompt: Prompt from generate_enhanced_system_prompt()
+            compact_messages: Messages the prompt was generated from
+        
+        Returns:
+            Tuple of (static prompt, combat status text)
+        """
+        status = self.combat_status_text(compact_messages)
+        if status and system_prompt.endswith(status):
+            return system_prompt[:-len(status)], status
+        return system_prompt, ''
+    
+    def get_system_prompt_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get system prompt memo statistics
+        
+        Returns:
+            Dictionary with entries, hits and misses
+        """
+        return {
+            'entries': len(self._system_prompts),
+            'hits': self.system_prompt_hits,
+            'misses': self.system_prompt_misses
+        }
     
     def _convert_compact_to_html(self, websocket_content: Dict[str, Any]) -> str:
         """
@@ -806,3 +993,7 @@ unified_processor = UnifiedMessageProcessor()
 def get_unified_processor() -> UnifiedMessageProcessor:
     """Get the unified message processor instance"""
     return unified_processor
+
+def analyze_message_html(html_content: str) -> Dict[str, Any]:
+    """Analyze message HTML with the global processor (entry point for parse pool workers)"""
+    return unified_processor.analyze_html(html_content)
@@ -17,6 +17,11 @@ import hashlib
 import secrets
 import json
 import configparser
+import sqlite3
+import threading
+import atexit
+import random
+from collections import deque
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta, UTC
@@ -71,72 +76,227 @@ class RateLimiter:
 # SessionManager replaced by SessionValidator in sessionvalidator.py
 
 class PersistentRateLimiter:
-    """File-based rate limiting that survives server restarts"""
+    """
+    Sliding-window rate limiting that survives server restarts
+    
+    Request timestamps are kept in per-client deques, so a check only touches
+    the caller's own window. Accepted requests are queued and written to a
+    SQLite (WAL) store in batches by a background thread, keeping disk I/O off
+    the event loop. The store is reloaded on startup and compacted periodically.
+    """
     
-    def __init__(self, storage_file: str = "server_files/rate_limits.json"):
+    # Timestamps older than this (or the largest window seen, if longer) are compacted away
+    RETENTION_SECONDS = 3600
+    FLUSH_INTERVAL_SECONDS = 1.0
+    FLUSH_BATCH_SIZE = 256
+    COMPACT_EVERY_FLUSHES = 60
+    
+    def __init__(self, storage_file: str = "server_files/rate_limits.db",
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
         self.storage_file = get_absolute_path(storage_file)
-        self.data = {}
+        self.legacy_file = self.storage_file.with_suffix('.json')
+        self.flush_interval = flush_interval
+        
+        # client_id -> deque of request timestamps (oldest first)
+        self.data: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        
+        # Accepted requests not yet written to disk
+        self._pending: List[Tuple[str, float]] = []
+        self._max_window = 0.0
+        
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._flush_count = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        
         self.load_limits()
         
+        self._flusher = threading.Thread(target=self._flush_loop, name="rate-limit-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        
     def load_limits(self):
-        """Load existing rate limit data from file"""
-        if self.storage_file.exists():
-            try:
-                with open(self.storage_file, 'r') as f:
-                    self.data = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                self.data = {}
-        else:
-            self.data = {}
+        """Open the store and load recent rate limit data from it"""
+        cutoff = time.time() - self.RETENTION_SECONDS
+        try:
+            self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.storage_file), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS requests (client_id TEXT NOT NULL, ts REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_requests_ts ON requests (ts)")
+            self._migrate_legacy_file()
+            self._db.commit()
+            
+            rows = self._db.execute(
+                "SELECT client_id, ts FROM requests WHERE ts > ? ORDER BY ts", (cutoff,)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to load rate limits from {self.storage_file}: {e}")
+            rows = []
+        
+        self.data = {}
+        for client_id, ts in rows:
+            self.data.setdefault(client_id, deque()).append(ts)
     
-    def save_limits(self):
-        """Save rate limit data to file"""
+    def _migrate_legacy_file(self):
+        """Import entries from the old JSON store once, then set it aside"""
+        if not self.legacy_file.exists():
+            return
+        
         try:
-            with open(self.storage_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
-        except IOError as e:
-            logger.error(f"Failed to save rate limits to {self.storage_file}: {e}")
-            # Consider implementing circuit breaker or fallback storage mechanism
-            # Don't silently ignore security-critical operations
+            with open(self.legacy_file, 'r') as f:
+                legacy_data = json.load(f)
+            rows = [
+                (client_id, float(ts))
+                for client_id, timestamps in legacy_data.items()
+                for ts in timestamps
+            ]
+            self._db.executemany("INSERT INTO requests (client_id, ts) VALUES (?, ?)", rows)
+            self.legacy_file.rename(self.legacy_file.with_suffix('.json.migrated'))
+            logger.info(f"Migrated {len(rows)} rate limit entries from {self.legacy_file}")
+        except (json.JSONDecodeError, IOError, AttributeError, TypeError, ValueError) as e:
+            logger.warning(f"Could not migrate legacy rate limits from {self.legacy_file}: {e}")
     
-    def is_allowed(self, client_id: str, config: Dict) -> bool:
-        """Check if client is allowed based on persistent storage"""
-        now = time.time()
-        window_start = now - config['window']
+    def save_limits(self):
+        """Write queued request timestamps to the store in a single transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, []
         
-        # Clean old entries
-        self.cleanup_old_entries(window_start)
+        if not pending:
+            return
         
-        # Check current requests
-        client_requests = self.data.get(client_id, [])
-        recent_requests = [r for r in client_requests if r > window_start]
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.executemany("INSERT INTO requests (client_id, ts) VALUES (?, ?)", pending)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to save rate limits to {self.storage_file}: {e}")
+                # Keep the batch for the next flush rather than losing security-relevant state
+                with self._lock:
+                    self._pending = pending + self._pending
+    
+    def is_allowed(self, client_id: str, config: Dict) -> bool:
+        """Check if client is allowed based on its sliding window"""
+        now = time.time()
+        window = config['window']
+        window_start = now - window
         
-        if len(recent_requests) >= config['requests']:
-            return False
+        with self._lock:
+            if window > self._max_window:
+                self._max_window = window
             
-        # Add current request
-        recent_requests.append(now)
-        self.data[client_id] = recent_requests
-        self.save_limits()
+            # Drop this client's expired entries
+            client_requests = self.data.get(client_id)
+            if client_requests is None:
+                client_requests = self.data[client_id] = deque()
+            while client_requests and client_requests[0] <= window_start:
+                client_requests.popleft()
+            
+            if len(client_requests) >= config['requests']:
+                return False
+            
+            # Add current request
+            client_requests.append(now)
+            self._pending.append((client_id, now))
+            flush_now = len(self._pending) >= self.FLUSH_BATCH_SIZE
+        
+        if flush_now:
+            self._wake.set()
         return True
     
     def cleanup_old_entries(self, cutoff_time: float):
-        """Remove old rate limit entries"""
-        for client_id in list(self.data.keys()):
-            requests = self.data[client_id]
-            self.data[client_id] = [r for r in requests if r > cutoff_time]
+        """Remove old rate limit entries from memory and the store"""
+        with self._lock:
+            for client_id in list(self.data.keys()):
+                requests = self.data[client_id]
+                while requests and requests[0] <= cutoff_time:
+                    requests.popleft()
+                
+                # Remove empty client entries
+                if not requests:
+                    del self.data[client_id]
+        
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                with self._db:
+                    self._db.execute("DELETE FROM requests WHERE ts <= ?", (cutoff_time,))
+            except sqlite3.Error as e:
+                logger.error(f"Failed to compact rate limits in {self.storage_file}: {e}")
+    
+    def _flush_loop(self):
+        """Background thread: flush batches and periodically compact the store"""
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            
+            self.save_limits()
+            
+            self._flush_count += 1
+            if self._flush_count % self.COMPACT_EVERY_FLUSHES == 0:
+                retention = max(self._max_window, self.RETENTION_SECONDS)
+                self.cleanup_old_entries(time.time() - retention)
+    
+    def close(self):
+        """Stop the flusher and write any remaining entries"""
+        if self._stopped.is_set():
+            return
+        
+        self._stopped.set()
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.save_limits()
         
-        # Remove empty client entries
-        self.data = {k: v for k, v in self.data.items() if v}
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
 
 class SecurityAuditor:
-    """Structured security event logging for comprehensive audit trails"""
+    """
+    Structured security event logging for comprehensive audit trails
+    
+    Events are queued and written by a background thread that keeps the log
+    file open and flushes in batches, so callers never block on disk. Routine
+    success events can be sampled; security failures are always written.
+    """
     
-    def __init__(self, log_file: str = "server_files/security_audit.log"):
+    # High-volume success events eligible for sampling
+    SAMPLED_EVENT_TYPES = frozenset({'access_granted', 'response_sent'})
+    FLUSH_INTERVAL_SECONDS = 1.0
+    FLUSH_BATCH_SIZE = 100
+    
+    def __init__(self, log_file: str = "server_files/security_audit.log",
+                 success_sample_rate: float = 1.0,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
         self.log_file = get_absolute_path(log_file)
+        self.success_sample_rate = max(0.0, min(1.0, success_sample_rate))
+        self.flush_interval = flush_interval
+        
+        # Statistics
+        self.events_logged = 0
+        self.events_sampled_out = 0
+        
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._writer: Optional[threading.Thread] = None
         
     def log_event(self, event_type: str, details: Dict):
-        """Log structured security event"""
+        """Queue structured security event"""
+        if self._is_sampled_out(event_type, details):
+            self.events_sampled_out += 1
+            return
+        
         event = {
             'timestamp': datetime.now(UTC).isoformat(),
             'event_type': event_type,
@@ -147,13 +307,96 @@ class SecurityAuditor:
             'details': details
         }
         
-        try:
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(event) + '\n')
-        except IOError as e:
-            logger.error(f"Failed to write audit log to {self.log_file}: {e}")
-            # Security logging failures should be monitored
-            # Consider implementing fallback logging mechanism
+        with self._lock:
+            self._buffer.append(event)
+            self.events_logged += 1
+            flush_now = len(self._buffer) >= self.FLUSH_BATCH_SIZE
+        
+        if self._stopped.is_set():
+            # Writer already shut down - write through
+            self.flush()
+            return
+        
+        self._ensure_writer()
+        if flush_now:
+            self._wake.set()
+    
+    def _is_sampled_out(self, event_type: str, details: Dict) -> bool:
+        """Decide whether a routine success event is dropped by sampling"""
+        if event_type not in self.SAMPLED_EVENT_TYPES or self.success_sample_rate >= 1.0:
+            return False
+        
+        # Error responses are always kept
+        if event_type == 'response_sent' and (details.get('status_code') or 0) >= 400:
+            return False
+        
+        return random.random() >= self.success_sample_rate
+    
+    def _ensure_writer(self):
+        """Start the background writer thread on first use"""
+        if self._writer is not None:
+            return
+        
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="security-audit-writer", daemon=True)
+                self._writer.start()
+                atexit.register(self.close)
+    
+    def _write_loop(self):
+        """Background thread: flush queued events on size or interval"""
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+    
+    def flush(self):
+        """Write all queued events to the audit log"""
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        
+        if not events:
+            return
+        
+        with self._file_lock:
+            try:
+                if self._file is None:
+                    self.log_file.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.log_file, 'a')
+                self._file.write(''.join(json.dumps(event, default=str) + '\n' for event in events))
+                self._file.flush()
+            except IOError as e:
+                logger.error(f"Failed to write audit log to {self.log_file}: {e}")
+                # Security logging failures should be monitored
+                # Consider implementing fallback logging mechanism
+    
+    def close(self):
+        """Stop the writer, flush remaining events and close the log file"""
+        if self._stopped.is_set():
+            return
+        
+        self._stopped.set()
+        self._wake.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.flush()
+        
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get audit logging statistics"""
+        with self._lock:
+            queued = len(self._buffer)
+        
+        return {
+            'events_logged': self.events_logged,
+            'events_sampled_out': self.events_sampled_out,
+            'queued': queued,
+            'success_sample_rate': self.success_sample_rate
+        }
 
 class UniversalSecurityMiddleware(BaseHTTPMiddleware):
     """Universal security middleware for all endpoints"""
@@ -162,7 +405,9 @@ class UniversalSecurityMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
         self.security_config = security_config
         self.rate_limiter = PersistentRateLimiter()
-        self.auditor = SecurityAuditor()
+        self.auditor = SecurityAuditor(
+            success_sample_rate=security_config.get('global', {}).get('audit_success_sample_rate', 1.0)
+        )
         # Use ServiceFactory for input validator
         from services.system_services.service_factory import get_input_validator
         self.input_validator = get_input_validator()
@@ -433,6 +678,18 @@ def load_security_config(config_file: str = "security_config.ini") -> Dict:
         except ValueError as e:
             raise SecurityException(f"Invalid boolean value for 'audit_logging' field: {e}")
         
+        # Optional audit sampling rate for routine success events
+        if 'audit_success_sample_rate' in global_section:
+            try:
+                sample_rate = global_section.getfloat('audit_success_sample_rate')
+            except ValueError as e:
+                raise SecurityException(f"Invalid float value for 'audit_success_sample_rate' field: {e}")
+            if not 0.0 <= sample_rate <= 1.0:
+                raise SecurityException("'audit_success_sample_rate' must be between 0.0 and 1.0")
+            security_config["global"]["audit_success_sample_rate"] = sample_rate
+        else:
+            security_config["global"]["audit_success_sample_rate"] = 1.0  # Explicit default
+        
         # Parse endpoint configurations with explicit validation
         endpoint_sections = [s for s in config.sections() if s.startswith('endpoint:')]
         
@@ -513,7 +770,8 @@ def get_default_security_config() -> Dict:
     return {
         "global": {
             "enabled": True,
-            "audit_logging": True
+            "audit_logging": True,
+            "audit_success_sample_rate": 1.0
         },
         "endpoints": {
             "/api/admin": {
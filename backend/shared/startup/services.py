@@ -10,7 +10,7 @@ import asyncio
 import re
 import json
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from fastapi import FastAPI
 
 logger = logging.getLogger(__name__)
@@ -40,22 +40,56 @@ def initialize_websocket_manager():
             """Manages WebSocket connections using FastAPI's built-in WebSocket support"""
             
             def __init__(self):
-                self.active_connections: List = []
+                from services.system_services.rpc_registry import RpcRegistry
+                from services.system_services.task_supervisor import TaskSupervisor
+                self.active_connections: Dict[str, Any] = {}  # client_id -> websocket
                 self.connection_info: Dict[str, Dict[str, Any]] = {}
+                self.send_queues: Dict[str, Any] = {}  # client_id -> ConnectionSendQueue
+                self.rpc_registry = RpcRegistry()  # Pending frontend round-trips per client
+                self.task_supervisor = TaskSupervisor()  # Slow-path message tasks per client
                 self._shutting_down: bool = False  # Flag to prevent new operations during shutdown
             
             async def connect(self, websocket, client_id: str, connection_info: Dict[str, Any]):
                 """Accept and register a new WebSocket connection"""
                 await websocket.accept()
-                self.active_connections.append(websocket)
+                self.register_connection(websocket, client_id, {
+                    "connected_at": "datetime.now().isoformat()",  # Simplified for startup
+                    **connection_info
+                })
+            
+            def register_connection(self, websocket, client_id: str, connection_info: Dict[str, Any]):
+                """Register an accepted WebSocket connection and start its writer task"""
+                from services.system_services.connection_send_queue import ConnectionSendQueue
+                
+                self.active_connections[client_id] = websocket
                 self.connection_info[client_id] = {
                     "websocket": websocket,
-                    "connected_at": "datetime.now().isoformat()",  # Simplified for startup
                     **connection_info
                 }
+                send_queue = ConnectionSendQueue(
+                    client_id, websocket,
+                    on_failure=self._on_send_queue_failure,
+                    on_drop=self._on_frame_dropped
+                )
+                self.send_queues[client_id] = send_queue
+                send_queue.start()
             
-            async def disconnect(self, client_id: str):
-                """Remove and disconnect a WebSocket client"""
+            async def disconnect(self, client_id: str, send_queue=None):
+                """
+                Remove and disconnect a WebSocket client
+                
+                Args:
+                    client_id: Client to disconnect
+                    send_queue: Only disconnect while this is still the client's send
+                        queue (None disconnects whatever connection the client has)
+                """
+                if send_queue is not None and self.send_queues.get(client_id) is not send_queue:
+                    return  # Replaced by a reconnect; the failed connection is already gone
+                
+                send_queue = self.send_queues.pop(client_id, None)
+                if send_queue is not None:
+                    await send_queue.close()
+                
                 if client_id in self.connection_info:
                     websocket = self.connection_info[client_id]["websocket"]
                     try:
@@ -64,30 +98,50 @@ def initialize_websocket_manager():
                         logger.debug(f"WebSocket close during message sending cleanup: {e}")
                     
                     # Remove from active connections
-                    if websocket in self.active_connections:
-                        self.active_connections.remove(websocket)
+                    self.active_connections.pop(client_id, None)
                     
                     del self.connection_info[client_id]
                     logger.info(f"WebSocket client disconnected: {client_id}")
+                
+                # Nothing can answer this client's outstanding requests any more
+                self.rpc_registry.fail_client(client_id, "client disconnected")
+                self.task_supervisor.cancel_client(client_id)
             
             async def send_to_client(self, client_id: str, message: Dict[str, Any]):
-                """Send message to specific client"""
-                if client_id in self.connection_info:
-                    websocket = self.connection_info[client_id]["websocket"]
-                    try:
-                        import time
-                        message["timestamp"] = time.time()
-                        await websocket.send_json(message)
-                        return True
-                    except Exception as e:
-                        logger.error(f"Error sending to WebSocket client {client_id}: {e}")
-                        # Remove disconnected client
-                        await self.disconnect(client_id)
-                        return False
+                """Queue message for a specific client; sent by the connection's writer task"""
+                send_queue = self.send_queues.get(client_id)
+                if send_queue is not None:
+                    message["timestamp"] = time.time()
+                    return send_queue.put(message)
                 else:
                     logger.warning(f"Attempted to send to unknown WebSocket client: {client_id}")
+                    self.rpc_registry.fail_client(client_id, "client not connected")
                     return False
             
+            def _on_send_queue_failure(self, send_queue, reason: str):
+                """Drop a connection whose writer failed or whose queue overflowed"""
+                # The connection may already have been replaced by a reconnect
+                if self.send_queues.get(send_queue.client_id) is send_queue:
+                    logger.warning(f"Dropping WebSocket client {send_queue.client_id}: {reason}")
+                    self.task_supervisor.spawn(
+                        send_queue.client_id, "disconnect",
+                        self.disconnect(send_queue.client_id, send_queue),
+                        bounded=False
+                    )
+            
+            def _on_frame_dropped(self, client_id: str, message: Dict[str, Any]):
+                """Fail the waiting request when an RPC frame is discarded unsent"""
+                request_id = message.get("request_id")
+                if request_id and self.rpc_registry.is_pending(client_id, request_id):
+                    self.rpc_registry.reject(
+                        client_id, request_id,
+                        Exception(f"{message.get('type')} request dropped: send queue overflow")
+                    )
+            
+            def get_send_queue_stats(self) -> Dict[str, Any]:
+                """Get outbound queue statistics for every connection"""
+                return {client_id: send_queue.get_stats() for client_id, send_queue in self.send_queues.items()}
+            
             async def handle_message(self, client_id: str, message: Dict[str, Any]):
                 """Handle incoming WebSocket message with fast-path/slow-path pattern"""
                 try:
@@ -111,6 +165,12 @@ def initialize_websocket_manager():
                         await self._handle_roll_result(client_id, message)
                         return
                     
+                    # Handle batched responses to frontend requests - FAST PATH
+                    # Each item is dispatched like the frame it replaces
+                    if message_type == "batch_result":
+                        await self._handle_batch_result(client_id, message)
+                        return
+                    
                     # Handle settings sync from frontend (frontend is source of truth) - FAST PATH
                     if message_type == "settings_sync":
                         await self._handle_settings_sync(client_id, message)
@@ -121,17 +181,17 @@ def initialize_websocket_manager():
                     
                     # Handle individual chat messages from frontend
                     if message_type == "chat_message":
-                        asyncio.create_task(self._handle_chat_message(client_id, message))
+                        self.task_supervisor.spawn(client_id, "chat_message", self._handle_chat_message(client_id, message))
                         return
                     
                     # Handle individual dice rolls from frontend
                     if message_type == "dice_roll":
-                        asyncio.create_task(self._handle_dice_roll(client_id, message))
+                        self.task_supervisor.spawn(client_id, "dice_roll", self._handle_dice_roll(client_id, message))
                         return
                     
                     # Handle combat context messages from frontend
                     if message_type == "combat_context":
-                        asyncio.create_task(self._handle_combat_context(client_id, message))
+                        self.task_supervisor.spawn(client_id, "combat_context", self._handle_combat_context(client_id, message))
                         return
                     
                     # Handle combat state messages from frontend - FAST PATH
@@ -179,12 +239,20 @@ def initialize_websocket_manager():
                         if active_test_session:
                             # Route to testing harness instead of AI service - fire and forget
                             logger.info(f"WebSocket: [SLOW PATH] Creating background task for test_chat_request")
-                            asyncio.create_task(self._handle_test_chat_request(client_id, message, active_test_session))
+                            self.task_supervisor.spawn(
+                                client_id, "test_chat_request",
+                                self._handle_test_chat_request(client_id, message, active_test_session)
+                            )
                             return
                         
                         # No active test session - use normal AI service logic - fire and forget
+                        # A newer AI turn for this client cancels the one still running
                         logger.info(f"WebSocket: [SLOW PATH] Creating background task for chat_request")
-                        asyncio.create_task(self._handle_chat_request_full(client_id, message))
+                        self.task_supervisor.spawn(
+                            client_id, "chat_request",
+                            self._handle_chat_request_full(client_id, message),
+                            supersede=True
+                        )
                         return
                     
                     # Unknown message type
@@ -232,13 +300,24 @@ def initialize_websocket_manager():
                     logger.error(f"Error storing AI response in conversation history: {e}")
                     # Don't fail the entire operation if history storage fails
             
-            def _convert_raw_html_to_compact(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-                """Convert raw HTML messages from WebSocket to compact JSON format"""
+            async def _convert_raw_html_to_compact(self, messages: List[Dict[str, Any]], client_id: Optional[str] = None) -> List[Dict[str, Any]]:
+                """Convert raw HTML messages from WebSocket to compact JSON format (precomputed at ingest when available)"""
+                from services.message_services.compact_conversion_stage import get_compact_conversion_stage
+                from services.message_services.websocket_message_collector import get_websocket_message_collector
+                
+                conversion_stage = get_compact_conversion_stage()
+                store = get_websocket_message_collector().get_item_store(client_id) if client_id else None
                 compact_messages = []
                 
+                # Parse messages the background stage has not reached yet in the HTML parse pool
+                try:
+                    await conversion_stage.prepare(store, messages)
+                except Exception as e:
+                    logger.warning(f"Batch compact conversion failed, converting messages one by one: {e}")
+                
                 for msg in messages:
                     try:
-                        compact_msg = self._convert_single_message_to_compact(msg)
+                        compact_msg = conversion_stage.compact_message(store, msg)
                         if compact_msg:
                             compact_messages.append(compact_msg)
                     except (ValueError, KeyError, TypeError) as e:
@@ -578,14 +657,7 @@ def initialize_websocket_manager():
                         
                         # Check if this is a response to a combat_state_refresh request
                         if request_id:
-                            from services.ai_tools.ai_tool_executor import _pending_roll_requests
-                            if request_id in _pending_roll_requests:
-                                future = _pending_roll_requests[request_id]
-                                if not future.done():
-                                    logger.info(f"Resolving pending combat_state_refresh request {request_id}")
-                                    future.set_result(combat_state)
-                                else:
-                                    logger.warning(f"Pending request {request_id} already done")
+                            self.rpc_registry.resolve(client_id, request_id, combat_state)
                         
                         # Store combat state in message collector
                         from services.system_services.service_factory import get_message_collector
@@ -641,14 +713,7 @@ def initialize_websocket_manager():
                         
                         # Respond with active encounter if request_id provided
                         if request_id and active_encounter:
-                            from services.ai_tools.ai_tool_executor import _pending_roll_requests
-                            if request_id in _pending_roll_requests:
-                                future = _pending_roll_requests[request_id]
-                                if not future.done():
-                                    logger.info(f"Resolving pending combat_state_refresh request {request_id}")
-                                    future.set_result(active_encounter)
-                                else:
-                                    logger.warning(f"Pending request {request_id} already done")
+                            self.rpc_registry.resolve(client_id, request_id, active_encounter)
                     
                     else:
                         logger.warning(f"Received combat_state message without valid combat data from client {client_id}")
@@ -674,18 +739,11 @@ def initialize_websocket_manager():
                         logger.warning(f"Received error message without request_id from client {client_id}")
                         return
                     
-                    # Forward to AI tool executor to reject pending request
-                    from services.ai_tools.ai_tool_executor import _pending_roll_requests
-                    if request_id in _pending_roll_requests:
-                        future = _pending_roll_requests[request_id]
-                        if not future.done():
-                            logger.info(f"Rejecting pending request {request_id} with error: {error_message}")
-                            # Reject future with exception containing error data
-                            future.set_exception(Exception(f"Frontend error: {error_message} (code: {error_code})"))
-                        else:
-                            logger.warning(f"Pending request {request_id} already done")
-                    else:
-                        logger.warning(f"Received error for unknown request_id: {request_id}")
+                    # Reject pending request with exception containing error data
+                    self.rpc_registry.reject(
+                        client_id, request_id,
+                        Exception(f"Frontend error: {error_message} (code: {error_code})")
+                    )
                     
                 except Exception as e:
                     logger.error(f"Error handling error message from client {client_id}: {e}", exc_info=True)
@@ -739,8 +797,15 @@ def initialize_websocket_manager():
                     logger.info(f"_handle_world_state_sync called for client {client_id}")
                     world_state = message.get("data", {})
                     
+                    # Syncs answering a world_state_refresh carry its request_id;
+                    # hook-driven syncs carry an unrelated one
+                    request_id = message.get("request_id")
+                    is_refresh_response = bool(request_id) and self.rpc_registry.is_pending(client_id, request_id)
+                    
                     if not world_state:
                         logger.warning("Received world_state_sync without data")
+                        if is_refresh_response:
+                            self.rpc_registry.reject(client_id, request_id, Exception("Frontend sent empty world state"))
                         return
                     
                     # Store world state in WebSocket message collector
@@ -750,37 +815,20 @@ def initialize_websocket_manager():
                     success = collector.set_world_state(client_id, world_state)
                     if success:
                         logger.info(f"World state stored for client {client_id}")
+                        if is_refresh_response:
+                            self.rpc_registry.resolve(client_id, request_id, collector.get_world_state_version(client_id))
                     else:
                         logger.warning(f"Failed to store world state for client {client_id}")
+                        if is_refresh_response:
+                            self.rpc_registry.reject(client_id, request_id, Exception("Failed to store world state"))
                     
                 except Exception as e:
                     logger.error(f"Error handling world_state_sync for client {client_id}: {e}")
             
             def _convert_single_message_to_compact(self, message: Dict[str, Any]) -> Dict[str, Any]:
                 """Convert a single raw HTML message to compact JSON format - DELEGATE TO UNIFIED PROCESSOR"""
-                # Import unified processor at function level to avoid circular import issues
-                from shared.core.unified_message_processor import get_unified_processor
-                
-                content = message.get("content", "")
-                original_timestamp = message.get("timestamp")
-                
-                # Skip empty messages
-                if not content or not content.strip():
-                    return None
-                
-                # Use unified processor for all HTML parsing - no duplicate logic
-                processor = get_unified_processor()
-                parsed = processor.html_to_compact_json(content)
-                
-                # Override with original timestamp if provided, otherwise use current time
-                if 'ts' in parsed:
-                    if original_timestamp is not None:
-                        parsed['ts'] = original_timestamp
-                else:
-                    # Generate timestamp from message if not provided
-                    parsed['ts'] = int(time.time() * 1000)
-                
-                return parsed
+                from services.message_services.compact_conversion_stage import convert_message_to_compact
+                return convert_message_to_compact(message)
             
             async def _handle_roll_result(self, client_id: str, message: Dict[str, Any]):
                 """Handle roll_result message from frontend (for AI tool roll_dice)"""
@@ -806,18 +854,54 @@ def initialize_websocket_manager():
                     # Forward to AI tool executor to resolve pending request
                     from services.ai_tools.ai_tool_executor import handle_roll_result
                     logger.info(f"Calling handle_roll_result() for request {request_id}")
-                    handle_roll_result(request_id, result_data)
+                    handle_roll_result(client_id, request_id, result_data)
                     logger.info(f"handle_roll_result() completed for request {request_id}")
                     
                 except Exception as e:
                     logger.error(f"Error handling roll_result from client {client_id}: {e}", exc_info=True)
             
+            async def _handle_batch_result(self, client_id: str, message: Dict[str, Any]):
+                """Handle batch_result message from frontend - fail batched requests that got no response"""
+                try:
+                    results = message.get("data", {}).get("results", [])
+                    logger.info(f"Received batch_result from client {client_id} with {len(results)} items")
+                    
+                    # Answered items arrive as their own response frames and are not listed
+                    for item in results:
+                        if item.get("deferred"):
+                            # Handler responds with its own frame later
+                            continue
+                        elif item.get("request_id"):
+                            # Frontend handler failed without a response frame
+                            error_message = item.get("error", "No response from frontend handler")
+                            self.rpc_registry.reject(
+                                client_id, item["request_id"],
+                                Exception(f"Frontend error: {error_message}")
+                            )
+                    
+                except Exception as e:
+                    logger.error(f"Error handling batch_result from client {client_id}: {e}", exc_info=True)
+            
+            def _normalize_chat_request_messages(self, messages: List[Any]) -> List[Dict[str, Any]]:
+                """Convert chat_request messages to dictionaries (plain strings become chat messages)"""
+                normalized = []
+                for msg in messages:
+                    if isinstance(msg, dict):
+                        normalized.append(msg)
+                    elif isinstance(msg, str):
+                        normalized.append({
+                            "content": msg,
+                            "type": "chat",
+                            "timestamp": int(time.time() * 1000)
+                        })
+                return normalized
+            
             async def _handle_test_chat_request(self, client_id: str, message: Dict[str, Any], active_test_session: Dict[str, Any]):
                 """Handle chat_request when there's an active test session - route to testing harness"""
                 try:
                     from services.system_services.service_factory import get_testing_harness, get_testing_command_processor, get_testing_session_manager
                     from shared.core.message_protocol import MessageProtocol
-                    from services.message_services.websocket_message_collector import add_client_message_with_delta
+                    from services.message_services.websocket_message_collector import add_client_items_with_delta
                     
                     test_session_id = active_test_session['test_session_id']
                     
@@ -854,18 +938,9 @@ def initialize_websocket_manager():
                     
                     # Store all messages from chat_request
                     messages = message_data.get("messages", [])
-                    for msg in messages:
-                        if isinstance(msg, dict):
-                            # Add message to collector with delta filtering
-                            add_client_message_with_delta(client_id, msg, session_id)
-                            logger.debug(f"Stored message in test mode for client {client_id}")
-                        elif isinstance(msg, str):
-                            # Convert string messages to dict format
-                            add_client_message_with_delta(client_id, {
-                                "content": msg,
-                                "type": "chat",
-                                "timestamp": int(time.time() * 1000)
-                            }, session_id)
+                    add_client_items_with_delta(
+                        client_id, self._normalize_chat_request_messages(messages), session_id, detect_rolls=False
+                    )
                     
                     logger.info(f"Stored {len(messages)} messages in WebSocket collector for test session {test_session_id}")
                     
@@ -904,7 +979,6 @@ def initialize_websocket_manager():
                 try:
                     # Import full message processing logic from original file
                     from shared.core.message_protocol import MessageProtocol
-                    from services.message_services.message_collector import add_client_message, add_client_roll, get_combined_client_messages, clear_client_data
                     from services.system_services.universal_settings import extract_universal_settings, get_provider_config
                     from services.ai_services.ai_service import get_ai_service
                     from shared.core.unified_message_processor import get_unified_processor
@@ -957,7 +1031,7 @@ def initialize_websocket_manager():
                     
                     # Use new WebSocket message collector with delta filtering
                     from services.message_services.websocket_message_collector import (
-                        add_client_message_with_delta, add_client_roll_with_delta, get_combined_client_messages, clear_client_data
+                        add_client_items_with_delta, get_combined_client_messages, clear_client_data
                     )
                     
                     # Get frontend settings for processing first (frontend is source of truth)
@@ -1007,30 +1081,9 @@ def initialize_websocket_manager():
                         logger.info(f"Force full context for session {session_id} - bypassing delta filtering")
                         message_delta_service.force_full_context(session_id)
                     
-                    # Add each message to WebSocket message collector for this client with delta filtering
-                    for msg in messages:
-                        if isinstance(msg, dict):
-                            # Simplified dice roll detection - delegate to unified processor
-                            msg_type = msg.get("type", "")
-                            content = msg.get("content", "")
-                            
-                            # Check if this is a dice roll message (basic type check only)
-                            is_dice_roll = (msg_type == "roll")
-                            
-                            if is_dice_roll:
-                                # This is a dice roll - add to rolls collection with delta filtering
-                                logger.debug(f"Detected dice roll: {content} (type: {msg_type})")
-                                add_client_roll_with_delta(client_id, msg, session_id)
-                            else:
-                                # This is a regular chat message - add with delta filtering
-                                add_client_message_with_delta(client_id, msg, session_id)
-                        elif isinstance(msg, str):
-                            # Convert string messages to dict format and add with delta filtering
-                            add_client_message_with_delta(client_id, {
-                                "content": msg,
-                                "type": "chat",
-                                "timestamp": int(time.time() * 1000)
-                            }, session_id)
+                    # Add all messages to WebSocket message collector for this client with delta filtering
+                    # Dice rolls (type "roll") go to the rolls collection
+                    add_client_items_with_delta(client_id, self._normalize_chat_request_messages(messages), session_id)
                     
                     # Get delta-filtered messages from WebSocket message collector for processing
                     from services.message_services.websocket_message_collector import get_delta_filtered_client_messages
@@ -1048,7 +1101,7 @@ def initialize_websocket_manager():
                     processor = get_unified_processor()
                     
                     # Step 1.5: Convert raw HTML messages to compact JSON for AI service
-                    compact_stored_messages = self._convert_raw_html_to_compact(stored_messages)
+                    compact_stored_messages = await self._convert_raw_html_to_compact(stored_messages, client_id)
                     
                     # Use compact messages (AI service will handle conversation history)
                     compact_messages = compact_stored_messages
@@ -1079,8 +1132,8 @@ def initialize_websocket_manager():
                     
                     # Generate enhanced system prompt based on AI role using unified processor
                     system_prompt = processor.generate_enhanced_system_prompt(ai_role, compact_messages, universal_settings)
-                    import json
-                    compact_json_context = json.dumps(compact_messages, indent=2)
+                    from shared.utils.prompt_encoder import encode_for_prompt
+                    compact_json_context = encode_for_prompt(compact_messages, 'chat_context', universal_settings.get('general llm model'))
                     
                     # Generate dynamic combat-aware prompt
                     from services.ai_services.combat_prompt_generator import get_combat_prompt_generator
@@ -1173,17 +1226,8 @@ def initialize_websocket_manager():
                         logger.warning(f"Received token_actor_details without request_id from client {client_id}")
                         return
                     
-                    # Forward to AI tool executor to resolve pending request
-                    from services.ai_tools.ai_tool_executor import _pending_roll_requests
-                    if request_id in _pending_roll_requests:
-                        future = _pending_roll_requests[request_id]
-                        if not future.done():
-                            logger.info(f"Resolving pending request {request_id} with actor details")
-                            future.set_result(actor_data)
-                        else:
-                            logger.warning(f"Pending request {request_id} already done")
-                    else:
-                        logger.warning(f"Received token_actor_details for unknown request_id: {request_id}")
+                    # Resolve pending get_actor_details request
+                    self.rpc_registry.resolve(client_id, request_id, actor_data)
                     
                 except Exception as e:
                     logger.error(f"Error handling token_actor_details for client {client_id}: {e}", exc_info=True)
@@ -1203,17 +1247,8 @@ def initialize_websocket_manager():
                         logger.warning(f"Received token_attribute_modified without request_id from client {client_id}")
                         return
                     
-                    # Forward to AI tool executor to resolve pending request
-                    from services.ai_tools.ai_tool_executor import _pending_roll_requests
-                    if request_id in _pending_roll_requests:
-                        future = _pending_roll_requests[request_id]
-                        if not future.done():
-                            logger.info(f"Resolving pending request {request_id} with attribute modification result")
-                            future.set_result(modification_data)
-                        else:
-                            logger.warning(f"Pending request {request_id} already done")
-                    else:
-                        logger.warning(f"Received token_attribute_modified for unknown request_id: {request_id}")
+                    # Resolve pending modify_token_attribute request
+                    self.rpc_registry.resolve(client_id, request_id, modification_data)
                     
                 except Exception as e:
                     logger.error(f"Error handling token_attribute_modified for client {client_id}: {e}", exc_info=True)
@@ -1318,6 +1353,21 @@ def get_global_services() -> Dict[str, Any]:
     # Import service registry
     from services.system_services.registry import ServiceRegistry
     
+    # Initialize HTML parse pool first: workers are forked, which is only safe
+    # before any other service starts a thread (e.g. the session repository writer)
+    from services.message_services.html_parse_pool import get_html_parse_pool
+    try:
+        html_parse_pool = get_html_parse_pool()
+        html_parse_pool.start()
+        if not ServiceRegistry.register('html_parse_pool', html_parse_pool):
+            logger.error("Failed to register HTML parse pool")
+        else:
+            services['html_parse_pool'] = html_parse_pool
+            logger.info(f"OK HTML parse pool initialized and registered ({html_parse_pool.pool_size} workers)")
+    except Exception as e:
+        # Not fatal: message HTML is parsed inline without the pool
+        logger.warning(f"Failed to initialize HTML parse pool, parsing inline: {e}")
+    
     # Initialize WebSocket connection manager
     websocket_manager = initialize_websocket_manager()
     if websocket_manager:
@@ -1482,6 +1532,19 @@ def get_global_services() -> Dict[str, Any]:
         logger.error(f"Failed to initialize chat card translation cache: {e}")
         raise StartupServicesException(f"Unexpected chat card translation cache error: {e}")
     
+    # Initialize compact conversion cache (HTML → compact JSON results)
+    from services.message_services.compact_conversion_cache import get_compact_conversion_cache
+    try:
+        compact_conversion_cache = get_compact_conversion_cache()
+        if not ServiceRegistry.register('compact_conversion_cache', compact_conversion_cache):
+            logger.error("Failed to register compact conversion cache")
+        else:
+            services['compact_conversion_cache'] = compact_conversion_cache
+            logger.info("OK Compact conversion cache initialized and registered")
+    except Exception as e:
+        logger.error(f"Failed to initialize compact conversion cache: {e}")
+        raise StartupServicesException(f"Unexpected compact conversion cache error: {e}")
+    
     # Initialize chat card translator
     from services.message_services.chat_card_translator import get_translator, reset_translator
     try:
@@ -1500,6 +1563,27 @@ def get_global_services() -> Dict[str, Any]:
         logger.error(f"Failed to initialize chat card translator: {e}")
         raise StartupServicesException(f"Unexpected chat card translator error: {e}")
     
+    # Initialize tokenizer service (token counts for history budgets and prompt sizes)
+    from services.ai_services.tokenizer_service import get_tokenizer_service, ALLOW_TOKENIZER_DOWNLOADS
+    if not ALLOW_TOKENIZER_DOWNLOADS:
+        # Process-wide LiteLLM switch: fetching a HuggingFace tokenizer blocks token
+        # counting for tens of seconds when offline (set TOKENIZER_ALLOW_DOWNLOADS to allow it)
+        try:
+            import litellm
+            litellm.disable_hf_tokenizer_download = True
+        except ImportError:
+            pass
+    try:
+        tokenizer_service = get_tokenizer_service()
+        if not ServiceRegistry.register('tokenizer_service', tokenizer_service):
+            logger.error("Failed to register tokenizer service")
+        else:
+            services['tokenizer_service'] = tokenizer_service
+            logger.info("OK Tokenizer service initialized and registered")
+    except Exception as e:
+        logger.error(f"Failed to initialize tokenizer service: {e}")
+        raise StartupServicesException(f"Unexpected tokenizer service error: {e}")
+    
     # Initialize AI session manager
     from services.ai_services.ai_session_manager import get_ai_session_manager
     try:
@@ -323,6 +323,10 @@ class ServerStartup:
             # Start FastAPI server with uvicorn
             server.run()
             
+            # Stop the HTML parse workers once the server has exited
+            from services.message_services.html_parse_pool import get_html_parse_pool
+            get_html_parse_pool().shutdown()
+            
         except Exception as e:
             logger.error(f"Failed to start server: {e}")
             sys.exit(1)
@@ -5,19 +5,22 @@ Used by both production API and testing harness to ensure consistency
 """
 
 import logging
-import json
 from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
 # Import log truncation utility
 from shared.utils.log_utils import truncate_for_log
+from services.ai_services.tokenizer_service import get_tokenizer_service
+from shared.utils.prompt_encoder import encode_for_prompt
 
 
 def build_initial_messages_with_delta(
     universal_settings: Dict[str, Any],
     system_prompt: str,
-    is_first_turn: bool = True
+    is_first_turn: bool = True,
+    cache_layout: bool = False,
+    dynamic_context: str = ''
 ) -> List[Dict[str, Any]]:
     """
     Build initial messages for AI with delta or full context injection
@@ -30,6 +33,8 @@ def build_initial_messages_with_delta(
         universal_settings: Settings dictionary containing 'message_delta', 'ai role', and 'client_id'
         system_prompt: Base system prompt (without delta information)
         is_first_turn: Whether this is the first turn for the session (default: True)
+        cache_layout: Lay messages out static-first for provider prompt caching
+        dynamic_context: Per-turn text moved out of the system prompt (cache layout only)
         
     Returns:
         List of messages in OpenAI format:
@@ -37,8 +42,20 @@ def build_initial_messages_with_delta(
             {"role": "system", "content": system_prompt + delta_display or full_context},
             {"role": "user", "content": user_message}
         ]
+        or, with cache_layout, the unchanging parts first:
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": full_context},  # first turn only
+            {"role": "user", "content": dynamic_context + delta_display + user_message}
+        ]
     """
+    tokenizer = get_tokenizer_service()
+    model = universal_settings.get('general llm model')
+    
     try:
+        context_display = ''
+        delta_display = ''
+        
         if is_first_turn:
             # FIRST TURN: Build full initial context
             logger.info(f"Building initial context for first turn")
@@ -54,9 +71,10 @@ def build_initial_messages_with_delta(
                 context_display = f"""
 
 World State Overview:
-{json.dumps(initial_context, indent=2)}
+{encode_for_prompt(initial_context, 'world_state', model)}
 """
-                logger.info(f"Full initial context injected for first turn: {truncate_for_log(initial_context)}")
+                logger.info(f"Full initial context injected for first turn "
+                            f"({tokenizer.count_tokens(context_display, model)} tokens): {truncate_for_log(initial_context)}")
                 system_prompt_with_context = system_prompt + context_display
             except Exception as e:
                 logger.warning(f"Failed to build initial context: {e}")
@@ -75,9 +93,10 @@ World State Overview:
                 delta_display = f"""
 
 Recent changes to the game:
-{json.dumps(message_delta, indent=2)}
+{encode_for_prompt(message_delta, 'message_delta', model)}
 """
-                logger.info(f"Delta hasChanges: True - including full delta JSON: {truncate_for_log(message_delta)}")
+                logger.info(f"Delta hasChanges: True - including full delta JSON "
+                            f"({tokenizer.count_tokens(delta_display, model)} tokens): {truncate_for_log(message_delta)}")
             else:
                 # No changes - show clear message
                 delta_display = """
@@ -101,6 +120,22 @@ No changes to game state since last AI turn
         
         user_message = role_messages.get(ai_role, 'Take your turn as Game Master.')
         
+        if cache_layout:
+            # Static first: role prompt, then world state; everything that changes per turn goes last
+            messages = [{"role": "system", "content": system_prompt}]
+            if context_display:
+                messages.append({"role": "system", "content": context_display.strip()})
+            turn_parts = [part.strip() for part in (dynamic_context, delta_display) if part and part.strip()]
+            messages.append({"role": "user", "content": "\n\n".join(turn_parts + [user_message])})
+            
+            logger.info(f"Initial messages (cache layout): static prefix "
+                        f"{tokenizer.count_tokens(system_prompt + context_display, model)} tokens "
+                        f"({tokenizer.get_tokenizer_name(model)})")
+            return messages
+        
+        logger.info(f"Initial system prompt: {tokenizer.count_tokens(system_prompt_with_context, model)} tokens "
+                    f"({tokenizer.get_tokenizer_name(model)})")
+        
         # Return OpenAI format messages
         return [
             {"role": "system", "content": system_prompt_with_context},
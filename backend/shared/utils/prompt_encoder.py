@@ -0,0 +1,237 @@
+"""
+Prompt Encoder for The Gold Box
+Serializes JSON that is injected into AI prompts (world state, deltas, chat
+context, tool results) with a selectable profile
+
+Profiles:
+- pretty: indented JSON, as readable as the logs (debugging)
+- minified: no whitespace between tokens, non-ASCII text kept as is
+- compact: minified, with long repeated keys replaced by short codes and a
+  key legend line in front of the JSON
+
+The profile comes from the PROMPT_ENCODING_PROFILE environment variable
+(default: minified). Every encoded section is counted in bytes and tokens,
+per section name, so the prompt cost of each part of an AI turn is visible
+in the admin stats.
+"""
+
+import json
+import logging
+import os
+from collections import Counter
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+from services.ai_services.tokenizer_service import get_tokenizer_service
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PRETTY = 'pretty'
+PROFILE_MINIFIED = 'minified'
+PROFILE_COMPACT = 'compact'
+PROFILES = (PROFILE_PRETTY, PROFILE_MINIFIED, PROFILE_COMPACT)
+
+# Profile used when a caller does not ask for one
+DEFAULT_PROFILE = os.environ.get('PROMPT_ENCODING_PROFILE', PROFILE_MINIFIED).strip().lower()
+
+# Keys up to this length are never abbreviated by the compact profile
+MIN_ABBREVIATED_KEY_LENGTH = 4
+
+# Separators a legend entry costs besides its code and key: "":"",
+LEGEND_ENTRY_OVERHEAD = 6
+
+LEGEND_PREFIX = 'Key legend: '
+
+def _dumps(data: Any, profile: str) -> str:
+    """Serialize without key abbreviation"""
+    if profile == PROFILE_PRETTY:
+        return json.dumps(data, indent=2)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def _count_keys(data: Any, counts: Counter) -> None:
+    """Count string keys of all nested dictionaries"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(key, str):
+                counts[key] += 1
+            _count_keys(value, counts)
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            _count_keys(value, counts)
+
+def _codes(taken: set) -> Iterator[str]:
+    """Short codes a, b, ..., z, aa, ab, ... that are not already used as keys"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    width = 1
+    while True:
+        indexes = [0] * width
+        while True:
+            code = ''.join(letters[i] for i in indexes)
+            if code not in taken:
+                yield code
+            position = width - 1
+            while position >= 0 and indexes[position] == len(letters) - 1:
+                indexes[position] = 0
+                position -= 1
+            if position < 0:
+                break
+            indexes[position] += 1
+        width += 1
+
+def _rename_keys(data: Any, mapping: Dict[str, str]) -> Any:
+    """Copy of data with dictionary keys renamed through mapping"""
+    if isinstance(data, dict):
+        return {mapping.get(key, key) if isinstance(key, str) else key: _rename_keys(value, mapping)
+                for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_rename_keys(value, mapping) for value in data]
+    return data
+
+def abbreviate_keys(data: Any, cost: Optional[Callable[[str], int]] = None) -> Tuple[Any, Dict[str, str]]:
+    """
+    Replace long repeated keys with short codes
+    
+    Keys are taken in order of the characters they cost, so the most
+    expensive keys get the shortest codes, and a key is only abbreviated when
+    that saves more than its legend entry costs. Codes never collide with
+    keys that already occur in the data.
+    
+    Args:
+        data: JSON-serializable data
+        cost: Cost of a text snippet, e.g. its token count (default: its length)
+    
+    Returns:
+        Tuple of (data with renamed keys, legend mapping code -> key)
+    """
+    counts: Counter = Counter()
+    _count_keys(data, counts)
+    
+    if cost is None:
+        def key_cost(text: str) -> int:
+            return len(text) + 3
+        legend_overhead = LEGEND_ENTRY_OVERHEAD
+    else:
+        # Keys are costed as they appear in the JSON, with quotes and separators
+        def key_cost(text: str) -> int:
+            return cost(f',"{text}":')
+        legend_overhead = 0
+    
+    codes = _codes(set(counts))
+    code = next(codes)
+    mapping: Dict[str, str] = {}
+    legend: Dict[str, str] = {}
+    for key, count in sorted(counts.items(), key=lambda item: (-len(item[0]) * item[1], item[0])):
+        if len(key) < MIN_ABBREVIATED_KEY_LENGTH:
+            continue
+        key_size, code_size = key_cost(key), key_cost(code)
+        # A legend entry costs about one key and one code
+        saving = count * (key_size - code_size) - (key_size + code_size + legend_overhead)
+        if saving <= 0:
+            continue
+        mapping[key] = code
+        legend[code] = key
+        code = next(codes)
+    
+    if not mapping:
+        return data, legend
+    return _rename_keys(data, mapping), legend
+
+class PromptEncoder:
+    """
+    Prompt JSON serialization with per-section size accounting
+    """
+    
+    def __init__(self, profile: str = DEFAULT_PROFILE):
+        """
+        Initialize encoder
+        
+        Args:
+            profile: Default profile (pretty, minified or compact); unknown names fall back to minified
+        """
+        if profile not in PROFILES:
+            logger.warning(f"Unknown prompt encoding profile '{profile}', using '{PROFILE_MINIFIED}'")
+            profile = PROFILE_MINIFIED
+        self.profile = profile
+        self._sections: Dict[str, Dict[str, int]] = {}
+    
+    def encode(self, data: Any, section: str, profile: Optional[str] = None, model: Optional[str] = None) -> str:
+        """
+        Serialize data for a prompt and record its size
+        
+        Args:
+            data: JSON-serializable data
+            section: Prompt section name the size is recorded under (e.g. 'world_state')
+            profile: Profile for this call (default: the encoder's profile)
+            model: Model name for token counting (default tokenizer if None)
+        
+        Returns:
+            Encoded text; with the compact profile, a key legend line may precede the JSON
+        
+        Raises:
+            TypeError: If data is not JSON-serializable
+        """
+        profile = profile if profile in PROFILES else self.profile
+        
+        if profile == PROFILE_COMPACT:
+            tokenizer = get_tokenizer_service()
+            abbreviated, legend = abbreviate_keys(data, lambda text: tokenizer.count_tokens(text, model))
+            text = _dumps(abbreviated, profile)
+            if legend:
+                text = f"{LEGEND_PREFIX}{_dumps(legend, profile)}\n{text}"
+        else:
+            text = _dumps(data, profile)
+        
+        self._record(section, text, model)
+        return text
+    
+    def _record(self, section: str, text: str, model: Optional[str]) -> None:
+        """Add an encoded section to the statistics"""
+        size = len(text.encode('utf-8'))
+        tokens = get_tokenizer_service().count_tokens(text, model)
+        
+        counters = self._sections.setdefault(section, {'calls': 0, 'bytes': 0, 'tokens': 0})
+        counters['calls'] += 1
+        counters['bytes'] += size
+        counters['tokens'] += tokens
+        logger.debug(f"Prompt section {section}: {size} bytes, {tokens} tokens")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get prompt encoding statistics
+        
+        Returns:
+            Dictionary with the profile and bytes/tokens per section
+        """
+        return {
+            'profile': self.profile,
+            'sections': {
+                section: dict(
+                    counters,
+                    avg_tokens=round(counters['tokens'] / counters['calls'], 1) if counters['calls'] else 0.0
+                )
+                for section, counters in self._sections.items()
+            }
+        }
+
+# Global encoder shared by all prompt builders
+_prompt_encoder: Optional[PromptEncoder] = None
+
+def get_prompt_encoder() -> PromptEncoder:
+    """Get the global prompt encoder instance"""
+    global _prompt_encoder
+    if _prompt_encoder is None:
+        _prompt_encoder = PromptEncoder()
+    return _prompt_encoder
+
+def encode_for_prompt(data: Any, section: str, model: Optional[str] = None) -> str:
+    """
+    Serialize data for a prompt with the configured profile
+    
+    Args:
+        data: JSON-serializable data
+        section: Prompt section name for the statistics
+        model: Model name for token counting
+    
+    Returns:
+        Encoded text
+    """
+    return get_prompt_encoder().encode(data, section, model=model)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+HTML Parse Benchmark
+Measures per-card parse and traversal cost of the chat message pipeline
+
+Compares the previous flow (regex classification, parse, serialize, re-parse,
+then one selector pass per field-extraction method) against the single-parse
+flow (parse once, one DOM scan shared by classification and field extraction).
+
+Usage: python testing/html_parse_benchmark.py [iterations]
+"""
+
+import os
+import sys
+import re
+import time
+import logging
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Learned chat card codes must not be read from or written to the server's snapshot
+os.environ['TRANSLATION_CACHE_FILE'] = ''
+
+from bs4 import BeautifulSoup
+
+from services.message_services.dynamic_chat_card_analyzer import HTML_PARSER, parse_html, scan_html
+from services.message_services.compact_conversion_cache import get_compact_conversion_cache
+from shared.core.unified_message_processor import UnifiedMessageProcessor
+
+# Keep the per-card info/debug logging out of the timings
+logging.disable(logging.CRITICAL)
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+SAMPLE_MESSAGES = [
+    # dnd5e activation card with footer pills, roll links, effects
+    '''<div class="dnd5e2 chat-card activation-card" data-display-challenge="">
+<section class="card-header description collapsible">
+<header class="summary"><img class="gold-icon" src="icons/sword.webp" alt="Longsword">
+<div class="name-stacked border"><span class="title">Longsword</span><span class="subtitle">Martial Melee Weapon</span></div></header>
+<section class="details collapsible-content card-content"><div class="wrapper"><p>Versatile (1d10). Damage: 1d8 slashing</p>
+<span class="roll-link-group" data-formulas="1d8 + 3" data-type="damage"><a class="roll-link">1d8 + 3</a></span></div></section></section>
+<div class="card-buttons"><button type="button" data-action="rollAttack">Attack</button><button type="button" data-action="rollDamage">Damage</button></div>
+<ul class="card-footer pills unlist"><li class="pill"><span class="label">Martial</span></li><li class="pill"><span class="label">Proficient</span></li><li class="pill"><span class="label">5 ft</span></li></ul>
+<ul class="effects unlist"><li class="effect" data-id="abc"><img class="gold-icon" src="icons/bless.webp"><div class="name-stacked"><span class="title">Blessed</span><span class="subtitle">1 minute</span></div></li></ul>
+</div>''',
+    # spell card with definition list and table
+    '''<div class="chat-card item-card" data-actor-id="x1" data-item-id="y2">
+<header class="card-header flexrow"><h3 class="item-name">Fireball</h3></header>
+<div class="card-content"><p>A bright streak flashes. Range: 150 feet</p>
+<dl><dt>Level</dt><dd>3</dd><dt>School</dt><dd>Evocation</dd><dt>Casting Time</dt><dd>1 Action</dd></dl>
+<table><tr><th>Slot</th><th>Damage</th></tr><tr><td>3rd</td><td>8d6</td></tr><tr><td>4th</td><td>9d6</td></tr></table>
+</div>
+<div class="card-buttons"><button data-action="placeTemplate">Place Template</button></div>
+<footer class="card-footer"><span class="pill"><span class="label">V, S, M</span></span><span>Concentration: No</span></footer>
+<enchantment-application><div class="preview"><span class="name">Flame Blade</span><img class="gold-icon" src="icons/flame.webp"></div></enchantment-application>
+</div>''',
+    # generic feature card
+    '''<div class="chat-card"><div class="card-header"><span class="title">Second Wind</span><span class="subtitle">Fighter Feature</span></div>
+<div class="card-content"><p>Bonusaction: regain hit points equal to 1d10 + your fighter level.</p><span class="item-value" value="1">Uses</span></div></div>''',
+    # dice roll
+    '''<div class="message-content"><div class="dice-roll"><div class="dice-result"><div class="dice-formula">1d20 + 5</div>
+<div class="dice-tooltip"><span class="part-formula">1d20</span></div><h4 class="dice-total">17</h4></div></div>
+<span class="flavor-text">Longsword - Attack Roll</span></div>''',
+    # plain chat message
+    '''<li class="chat-message message flexcol"><header class="message-header flexrow"><h4 class="message-sender">Gandalf</h4></header>
+<div class="message-content"><p>You shall not pass!</p></div></li>''',
+]
+
+
+LEGACY_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for _, pattern in UnifiedMessageProcessor.CLASSIFICATION_PATTERNS
+]
+
+
+def legacy_parse_and_traverse(html_content):
+    """Reproduce the parse/traversal work of the previous pipeline"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for pattern in LEGACY_PATTERNS:
+        if pattern.search(html_content):
+            break
+    
+    # Chat card analysis re-parsed the serialized soup
+    card_soup = BeautifulSoup(str(soup), 'html.parser')
+    
+    # Card type classification
+    for _ in range(3):
+        card_soup.select_one('.chat-card')
+    
+    # Field extraction - one traversal per method
+    card_soup.find_all(attrs={'data': True})
+    card_soup.find_all()
+    card_soup.find_all('dt')
+    card_soup.find_all('table')
+    card_soup.find_all(string=True)
+    card_soup.find_all('table')
+    card_soup.select('.card-footer .pill .label')
+    card_soup.select('.roll-link-group[data-formulas]')
+    card_soup.select('.effect')
+    card_soup.select('enchantment-application')
+    
+    # Metadata
+    card_soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+    card_soup.find(class_=lambda x: x and 'card' in str(x).lower())
+    return card_soup
+
+
+def single_parse_and_traverse(html_content):
+    """Parse once and build the shared DOM scan"""
+    return scan_html(parse_html(html_content), html_content)
+
+
+def time_per_card(func, iterations):
+    """Return mean microseconds per card for func over all sample messages"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html_content in SAMPLE_MESSAGES:
+            func(html_content)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(SAMPLE_MESSAGES)) * 1_000_000
+
+
+def main():
+    print("=" * 80)
+    print("HTML Parse Benchmark")
+    print("=" * 80)
+    print(f"Parser: {HTML_PARSER}")
+    print(f"Sample messages: {len(SAMPLE_MESSAGES)}, iterations: {ITERATIONS}")
+    print()
+    
+    processor = UnifiedMessageProcessor()
+    conversion_cache = get_compact_conversion_cache()
+    
+    def convert_uncached(html_content):
+        conversion_cache.invalidate()
+        return processor.html_to_compact_json(html_content)
+    
+    # Warm up caches (card codes, class pattern memo)
+    for html_content in SAMPLE_MESSAGES:
+        processor.html_to_compact_json(html_content)
+    
+    parse_only = time_per_card(lambda h: BeautifulSoup(h, HTML_PARSER), ITERATIONS)
+    legacy = time_per_card(legacy_parse_and_traverse, ITERATIONS)
+    single = time_per_card(single_parse_and_traverse, ITERATIONS)
+    pipeline = time_per_card(convert_uncached, ITERATIONS)
+    pipeline_cached = time_per_card(processor.html_to_compact_json, ITERATIONS)
+    
+    print(f"{'Single parse only':<40} {parse_only:>10.1f} us/card")
+    print(f"{'Before: parse + re-parse + 15 passes':<40} {legacy:>10.1f} us/card")
+    print(f"{'After: parse + one scan':<40} {single:>10.1f} us/card")
+    print(f"{'Speedup (parse + traversal)':<40} {legacy / single:>10.2f}x")
+    print()
+    print(f"{'Full html_to_compact_json (uncached)':<40} {pipeline:>10.1f} us/card")
+    print(f"{'Full html_to_compact_json (cache hit)':<40} {pipeline_cached:>10.1f} us/card")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Post-Processing Benchmark
+Measures ChatCardTranslator.apply_post_processing over growing message windows
+
+Compares the previous duplicate abbreviation (rescan of every value location
+per duplicate value, every card copied) and redundancy removal (all-pairs
+containment per card) against single-pass value interning and the
+length-window containment check. Windows are built from real chat card HTML
+converted by the translator, tiled to 10-200 cards around the realistic
+50-card window; near-constant time per card means near-linear scaling.
+
+Usage: python testing/post_processing_benchmark.py [iterations]
+"""
+
+import os
+import sys
+import time
+import logging
+from collections import defaultdict
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Learned chat card codes must not be read from or written to the server's snapshot
+os.environ['TRANSLATION_CACHE_FILE'] = ''
+
+from services.message_services.chat_card_translator import ChatCardTranslator
+
+# Keep the per-card info/debug logging out of the timings
+logging.disable(logging.CRITICAL)
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+WINDOW_SIZES = [10, 25, 50, 100, 200]
+
+# A session's cards: a few weapons and spells used repeatedly
+ITEMS = [
+    ('Longsword', 'Martial Melee Weapon', '1d8 + 3', 'slashing'),
+    ('Shortbow', 'Simple Ranged Weapon', '1d6 + 2', 'piercing'),
+    ('Dagger', 'Simple Melee Weapon', '1d4 + 3', 'piercing'),
+    ('Greataxe', 'Martial Melee Weapon', '1d12 + 4', 'slashing'),
+]
+SPELLS = [
+    ('Fireball', '3', 'Evocation', '8d6'),
+    ('Magic Missile', '1', 'Evocation', '3d4 + 3'),
+    ('Hold Person', '2', 'Enchantment', '-'),
+]
+
+WEAPON_CARD = '''<div class="dnd5e2 chat-card activation-card" data-display-challenge="">
+<section class="card-header description collapsible">
+<header class="summary"><img class="gold-icon" src="icons/{icon}.webp" alt="{name}">
+<div class="name-stacked border"><span class="title">{name}</span><span class="subtitle">{subtitle}</span></div></header>
+<section class="details collapsible-content card-content"><div class="wrapper"><p>{name}, {subtitle}. Damage: {formula} {damage} on a hit against target {target}</p>
+<p>{name}, {subtitle}. Damage: {formula} {damage} on a hit</p>
+<span class="roll-link-group" data-formulas="{formula}" data-type="damage"><a class="roll-link">{formula}</a></span></div></section></section>
+<div class="card-buttons"><button type="button" data-action="rollAttack">Attack</button><button type="button" data-action="rollDamage">Damage</button></div>
+<ul class="card-footer pills unlist"><li class="pill"><span class="label">Martial</span></li><li class="pill"><span class="label">Proficient</span></li><li class="pill"><span class="label">5 ft</span></li></ul>
+</div>'''
+
+SPELL_CARD = '''<div class="chat-card item-card" data-actor-id="x{index}" data-item-id="y{index}">
+<header class="card-header flexrow"><h3 class="item-name">{name}</h3></header>
+<div class="card-content"><p>{name} is cast at level {level} by caster {caster}. Range: 150 feet</p>
+<dl><dt>Level</dt><dd>{level}</dd><dt>School</dt><dd>{school}</dd><dt>Casting Time</dt><dd>1 Action</dd></dl>
+<table><tr><th>Slot</th><th>Damage</th></tr><tr><td>{level}</td><td>{dice}</td></tr></table>
+</div>
+<div class="card-buttons"><button data-action="placeTemplate">Place Template</button></div>
+<footer class="card-footer"><span class="pill"><span class="label">V, S, M</span></span><span>Concentration: No</span></footer>
+</div>'''
+
+
+def build_cards(translator, count):
+    """Convert count chat cards of a play session to compact JSON"""
+    cards = []
+    for index in range(count):
+        if index % 3 == 2:
+            name, level, school, dice = SPELLS[index % len(SPELLS)]
+            html_content = SPELL_CARD.format(index=index, name=name, level=level, school=school,
+                                             dice=dice, caster=f"Wizard {index % 4}")
+        else:
+            name, subtitle, formula, damage = ITEMS[index % len(ITEMS)]
+            html_content = WEAPON_CARD.format(icon=name.lower(), name=name, subtitle=subtitle,
+                                              formula=formula, damage=damage, target=f"Goblin {index}")
+        cards.append(translator.html_to_compact(html_content))
+    return cards
+
+
+def legacy_abbreviate_duplicates(translator, message_data):
+    """Previous detect_and_abbreviate_duplicates"""
+    value_counts = defaultdict(int)
+    value_locations = []
+    for card_idx, card in enumerate(message_data):
+        if 'f' not in card or not isinstance(card['f'], dict):
+            continue
+        for code, value in card['f'].items():
+            value_key = translator._make_value_hashable(value)
+            value_counts[value_key] += 1
+            value_locations.append((card_idx, code, value_key, value))
+    
+    duplicate_values = {k: v for k, v in value_counts.items() if v > 1}
+    if not duplicate_values:
+        return message_data, {}
+    
+    value_dict = {}
+    abbreviation_counter = 1
+    for value_key in duplicate_values:
+        abbreviation = f"@v{abbreviation_counter}"
+        for _, _, _, actual_value in value_locations:
+            if translator._make_value_hashable(actual_value) == value_key:
+                value_dict[abbreviation] = actual_value
+                break
+        abbreviation_counter += 1
+    
+    value_to_abbreviation = {}
+    for abbreviation, actual_value in value_dict.items():
+        value_to_abbreviation[translator._make_value_hashable(actual_value)] = abbreviation
+    
+    updated_cards = []
+    for card in message_data:
+        updated_card = card.copy()
+        if 'f' in updated_card and isinstance(updated_card['f'], dict):
+            updated_fields = {}
+            for code, value in updated_card['f'].items():
+                value_key = translator._make_value_hashable(value)
+                updated_fields[code] = value_to_abbreviation.get(value_key, value)
+            updated_card['f'] = updated_fields
+        updated_cards.append(updated_card)
+    return updated_cards, value_dict
+
+
+def legacy_remove_redundancy(translator, message_data):
+    """Previous detect_and_remove_redundancy"""
+    processed_cards = []
+    for card in message_data:
+        if 'f' not in card or not isinstance(card['f'], dict):
+            processed_cards.append(card)
+            continue
+        fields = card['f']
+        redundant_codes = set()
+        for code1, value1 in fields.items():
+            if not translator._is_redundancy_candidate(value1):
+                continue
+            for code2, value2 in fields.items():
+                if code1 == code2 or not translator._is_redundancy_candidate(value2):
+                    continue
+                if translator._is_contained(value1, value2, 0.9):
+                    if len(str(value1)) == len(str(value2)) and len(str(code1)) != len(str(code2)):
+                        redundant_codes.add(code1 if len(str(code1)) < len(str(code2)) else code2)
+                    else:
+                        redundant_codes.add(code1)
+                    break
+        cleaned_card = card.copy()
+        cleaned_card['f'] = {code: value for code, value in fields.items() if code not in redundant_codes}
+        processed_cards.append(cleaned_card)
+    return processed_cards
+
+
+def legacy_post_processing(translator, message_data):
+    """Previous apply_post_processing (pattern consolidation is unchanged)"""
+    processed_cards = [translator.detect_and_consolidate_patterns(card) for card in message_data]
+    deduped_cards, value_dict = legacy_abbreviate_duplicates(translator, processed_cards)
+    result = {'cards': legacy_remove_redundancy(translator, deduped_cards)}
+    if value_dict:
+        result['value_dict'] = value_dict
+    return result
+
+
+def time_per_card(func, cards, iterations):
+    """Return mean microseconds per card for one post-processing call over the window"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(cards)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(cards)) * 1_000_000
+
+
+def main():
+    print("=" * 80)
+    print("Post-Processing Benchmark")
+    print("=" * 80)
+    
+    translator = ChatCardTranslator()
+    all_cards = build_cards(translator, max(WINDOW_SIZES))
+    fields = sum(len(card.get('f', {})) for card in all_cards) / len(all_cards)
+    print(f"Cards: {len(all_cards)} ({fields:.1f} fields/card), iterations: {ITERATIONS}")
+    print()
+    print(f"{'Window':>8} {'Before us/card':>16} {'After us/card':>16} {'Speedup':>10} {'Abbreviations':>15}")
+    
+    # Warm up (value hashing, regex and allocator caches)
+    for _ in range(ITERATIONS):
+        legacy_post_processing(translator, all_cards)
+        translator.apply_post_processing(all_cards)
+    
+    baseline = None
+    for size in WINDOW_SIZES:
+        cards = all_cards[:size]
+        before = legacy_post_processing(translator, cards)
+        after = translator.apply_post_processing(cards)
+        if before != after:
+            raise SystemExit(f"Output differs from the previous implementation at window {size}")
+        
+        legacy = time_per_card(lambda window: legacy_post_processing(translator, window), cards, ITERATIONS)
+        current = time_per_card(translator.apply_post_processing, cards, ITERATIONS)
+        baseline = baseline or current
+        print(f"{size:>8} {legacy:>16.1f} {current:>16.1f} {legacy / current:>9.2f}x "
+              f"{len(after.get('value_dict', {})):>15}")
+    
+    print()
+    print(f"{'After: per-card cost growth 10 -> 200':<40} {current / baseline:>10.2f}x (1.00x = linear)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Prompt Encoding Benchmark
+Compares the prompt encoder profiles on the JSON sections of an AI turn
+
+Builds a world state overview, a message delta, a chat context window and a
+get_message_history tool result shaped like the ones the backend injects,
+encodes each with the pretty (previous indent=2 output), minified and
+compact profiles, and prints bytes, tokens and encoding time per section.
+
+Usage: python testing/prompt_encoding_benchmark.py [model] [iterations]
+"""
+
+import sys
+import time
+import logging
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BACKEND_DIR))
+
+from shared.utils.prompt_encoder import PromptEncoder, PROFILES
+from services.ai_services.tokenizer_service import get_tokenizer_service
+
+logging.disable(logging.CRITICAL)
+
+MODEL = sys.argv[1] if len(sys.argv) > 1 else 'gpt-4o'
+ITERATIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+def world_state():
+    """World state overview with a party, a populated scene and an encounter"""
+    tokens = [
+        {
+            'id': f'token{index}', 'name': f'Goblin {index}', 'actor_id': f'actor{index}',
+            'position': {'x': 100 + index * 50, 'y': 200, 'elevation': 0},
+            'disposition': 'hostile', 'hidden': False,
+            'attributes': {'hp': {'value': 7, 'max': 7}, 'ac': 15, 'speed': 30}
+        }
+        for index in range(12)
+    ]
+    return {
+        'session_info': {'game_system': 'dnd5e', 'gm_name': 'The Dungeon Master', 'players': ['Alice', 'Bob', 'Charlie']},
+        'party_compendium': [
+            {'id': 'actorA', 'name': 'Valerius', 'player': 'Alice'},
+            {'id': 'actorB', 'name': 'Mirel', 'player': 'Bob'},
+            {'id': 'actorC', 'name': 'Thorn', 'player': 'Charlie'}
+        ],
+        'active_scene': {
+            'id': 'scene123', 'name': 'The Sunless Citadel',
+            'dimensions': {'width': 4000, 'height': 3000, 'grid': 50},
+            'tokens': tokens,
+            'notes': [{'id': f'note{index}', 'text': f'Room {index}: collapsed stairs', 'position': {'x': index * 300, 'y': 80}}
+                      for index in range(6)],
+            'light_sources': [{'id': f'light{index}', 'bright_radius': 20, 'dim_radius': 40, 'position': {'x': index * 400, 'y': 500}}
+                              for index in range(5)]
+        },
+        'compendium_index': [{'pack_name': 'dnd5e.monsters', 'type': 'Actor'}, {'pack_name': 'dnd5e.items', 'type': 'Item'}],
+        'active_encounter': {
+            'round': 2, 'turn': 3,
+            'combatants': [{'name': token['name'], 'initiative': 20 - index, 'is_current_turn': index == 3}
+                           for index, token in enumerate(tokens)]
+        }
+    }
+
+def message_delta():
+    """Delta after a round of combat"""
+    return {
+        'hasChanges': True,
+        'NewMessages': 6,
+        'TokenChanges': [{'tokenId': f'token{index}', 'changedAttributes': {'hp': {'from': 7, 'to': 3}}} for index in range(4)],
+        'CombatChanges': {'roundChanged': True, 'turnChanged': True, 'currentCombatant': 'Goblin 4'}
+    }
+
+def chat_context():
+    """Compact chat messages as sent in standard mode"""
+    messages = []
+    for index in range(40):
+        if index % 3 == 0:
+            messages.append({'t': 'dr', 'ts': 1700000000000 + index, 's': 'Valerius', 'f': '1d20 + 5', 'tt': 17 + index % 4,
+                             'r': [12 + index % 4], 'ft': 'Longsword - Attack Roll'})
+        else:
+            messages.append({'t': 'cm', 'ts': 1700000000000 + index, 's': 'Bob', 'c': f'I move toward goblin {index} and shout a warning — ça va?'})
+    return messages
+
+def tool_result():
+    """get_message_history result"""
+    return {'success': True, 'messages': chat_context()[:15], 'count': 15, 'total_available': 40}
+
+SECTIONS = [
+    ('world_state', world_state()),
+    ('message_delta', message_delta()),
+    ('chat_context', chat_context()),
+    ('tool:get_message_history', tool_result()),
+]
+
+def main():
+    tokenizer = get_tokenizer_service()
+    print(f"Prompt encoding benchmark (model {MODEL}, tokenizer {tokenizer.get_tokenizer_name(MODEL)}, "
+          f"{ITERATIONS} iterations)")
+    print(f"{'section':<26}{'profile':<10}{'bytes':>8}{'tokens':>8}{'vs pretty':>11}{'us/encode':>11}")
+    
+    totals = {profile: 0 for profile in PROFILES}
+    for section, data in SECTIONS:
+        baseline = None
+        for profile in PROFILES:
+            encoder = PromptEncoder(profile)
+            text = encoder.encode(data, section, model=MODEL)
+            tokens = tokenizer.count_tokens(text, MODEL)
+            totals[profile] += tokens
+            if baseline is None:
+                baseline = tokens
+            
+            start = time.perf_counter()
+            for _ in range(ITERATIONS):
+                encoder.encode(data, section, model=MODEL)
+            elapsed = (time.perf_counter() - start) / ITERATIONS * 1e6
+            
+            change = (tokens - baseline) / baseline if baseline else 0.0
+            print(f"{section:<26}{profile:<10}{len(text.encode('utf-8')):>8}{tokens:>8}{change:>+11.1%}{elapsed:>11.1f}")
+    
+    print()
+    for profile in PROFILES:
+        change = (totals[profile] - totals[PROFILES[0]]) / totals[PROFILES[0]]
+        print(f"total {profile:<10}{totals[profile]:>8} tokens ({change:+.1%})")
+
+if __name__ == '__main__':
+    main()
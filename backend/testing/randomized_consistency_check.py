@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Randomized Consistency Check
+Compares the indexed message store and translator post-processing against
+straightforward reference implementations on random inputs
+
+Checks:
+- ClientItemStore: last N, last N messages, newest timestamp and newer_than
+  (including the per-session cursors kept across inserts, evictions and
+  replacements) against buffers that are sorted on every read
+- WebSocketMessageCollector delta reads: get_combined_messages with a session
+  against MessageDeltaService.apply_message_delta over every buffered item,
+  including the watermark saved for new sessions
+- ChatCardTranslator: detect_and_abbreviate_duplicates and
+  detect_and_remove_redundancy against the previous implementations kept in
+  post_processing_benchmark.py
+
+Any mismatch stops the run with the seed and trial needed to reproduce it.
+
+Usage: python testing/randomized_consistency_check.py [trials] [seed]
+"""
+
+import os
+import sys
+import copy
+import random
+import logging
+from collections import deque
+from pathlib import Path
+
+# Add backend to path
+BACKEND_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Learned chat card codes must not be read from or written to the server's snapshot
+os.environ['TRANSLATION_CACHE_FILE'] = ''
+
+from services.message_services.client_item_store import (
+    ClientItemStore, EXCLUDED_TYPES, KIND_MESSAGE, KIND_ROLL, MAX_CURSORS, ingest_key
+)
+from services.message_services.message_delta_service import MessageDeltaService, normalize_timestamp_ms
+from services.message_services.websocket_message_collector import WebSocketMessageCollector
+from services.message_services.chat_card_translator import ChatCardTranslator
+from post_processing_benchmark import legacy_abbreviate_duplicates, legacy_remove_redundancy
+
+logging.disable(logging.CRITICAL)
+
+TRIALS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+SEED = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+BASE_MS = 1_700_000_000_000
+
+# More readers than the store keeps cursors for, so cursors are evicted and rebuilt
+CURSOR_IDS = [None] + [f"session{index}" for index in range(MAX_CURSORS + 4)]
+
+class ReferenceStore:
+    """Per-kind buffers; every read sorts all buffered items"""
+    
+    def __init__(self, max_messages, max_rolls):
+        self.buffers = {KIND_MESSAGE: deque(maxlen=max_messages), KIND_ROLL: deque(maxlen=max_rolls)}
+        self.sequence = 0
+    
+    def add(self, item, timestamp_ms, kind):
+        if self.buffers[kind].maxlen == 0:
+            return
+        self.buffers[kind].append([timestamp_ms, kind, self.sequence, item])
+        self.sequence += 1
+    
+    def replace(self, old, new):
+        for entry in self.buffers[KIND_MESSAGE]:
+            if entry[3] is old:
+                if 'timestamp' in old:
+                    new['timestamp'] = old['timestamp']
+                entry[3] = new
+                return True
+        return False
+    
+    def readable(self):
+        entries = [entry for buffer in self.buffers.values() for entry in buffer
+                   if entry[3].get('type') not in EXCLUDED_TYPES]
+        return sorted(entries, key=lambda entry: entry[:3])
+    
+    def items(self):
+        return [entry[3] for entry in self.readable()]
+
+def same_items(actual, expected):
+    """Same items (by identity) in the same order"""
+    return len(actual) == len(expected) and all(a is e for a, e in zip(actual, expected))
+
+def check_item_store(rng, trial):
+    """ClientItemStore reads and cursors against ReferenceStore"""
+    max_messages, max_rolls = rng.randint(0, 12), rng.randint(0, 8)
+    store = ClientItemStore(max_messages, max_rolls)
+    reference = ReferenceStore(max_messages, max_rolls)
+    watermarks = {}
+    
+    for step in range(rng.randint(1, 120)):
+        context = f"trial {trial} step {step}"
+        action = rng.random()
+        
+        if action < 0.45:
+            is_roll = rng.random() < 0.35
+            timestamp_ms = BASE_MS + rng.randint(0, 25)
+            item = {'_id': f"message{step}", 'type': 'roll' if is_roll else rng.choice(['chat', 'chat', 'whisper', 'combat_context']),
+                    'content': f"item {step}", 'timestamp': timestamp_ms}
+            key = ingest_key(item, is_roll)
+            if is_roll:
+                store.add_roll(item, timestamp_ms, key)
+            else:
+                store.add_message(item, timestamp_ms, key)
+            reference.add(item, timestamp_ms, KIND_ROLL if is_roll else KIND_MESSAGE)
+        
+        elif action < 0.5:
+            # Swap a buffered message for another copy (same Foundry ID), as the collector does for rendered copies
+            buffered = list(reference.buffers[KIND_MESSAGE])
+            if buffered:
+                old = rng.choice(buffered)[3]
+                new = dict(old, content=f"<li class=\"chat-message\">{old['content']}</li>")
+                replaced = store.replace_message(ingest_key(old, False), new)
+                assert replaced == reference.replace(old, new), context
+        
+        elif action < 0.85:
+            cursor_id = rng.choice(CURSOR_IDS)
+            if cursor_id in watermarks and rng.random() < 0.6:
+                watermark = watermarks[cursor_id]  # Same watermark again: the cursor is reused
+            else:
+                watermark = BASE_MS + rng.randint(-2, 27)
+            if cursor_id is not None:
+                watermarks[cursor_id] = watermark
+            expected = [item for timestamp_ms, _, _, item in reference.readable() if timestamp_ms > watermark]
+            assert same_items(store.newer_than(watermark, cursor_id=cursor_id), expected), \
+                f"newer_than({watermark}, {cursor_id}) differs ({context})"
+        
+        else:
+            count = rng.randint(-1, 15)
+            expected = reference.items()
+            assert same_items(store.last(count), expected[-count:] if count > 0 else []), \
+                f"last({count}) differs ({context})"
+            messages = [item for item in expected if item.get('type') != 'roll']
+            assert same_items(store.last_messages(count), messages[-count:] if count > 0 else []), \
+                f"last_messages({count}) differs ({context})"
+            readable = reference.readable()
+            assert store.newest_timestamp() == (readable[-1][0] if readable else None), context
+            assert same_items(store.all_items(), expected) and len(store) == len(expected), context
+
+class SessionTimestamps:
+    """Minimal AI session manager: session timestamps only"""
+    
+    def __init__(self):
+        self.timestamps = {}
+    
+    def auto_cleanup(self):
+        pass
+    
+    def get_session_timestamp(self, session_id):
+        return self.timestamps.get(session_id)
+    
+    def update_session_timestamp(self, session_id, timestamp):
+        self.timestamps[session_id] = timestamp
+        return True
+
+def random_timestamp(rng):
+    """Timestamp in one of the formats clients send (ms, seconds, string)"""
+    offset = rng.randint(0, 30)
+    form = rng.random()
+    if form < 0.6:
+        return BASE_MS + offset * 1000
+    if form < 0.8:
+        return BASE_MS // 1000 + offset
+    return str(BASE_MS + offset * 1000)
+
+def check_collector_delta(rng, trial):
+    """Collector delta reads against apply_message_delta over all buffered items"""
+    sessions, reference_sessions = SessionTimestamps(), SessionTimestamps()
+    collector = WebSocketMessageCollector()
+    collector.delta_service = MessageDeltaService(sessions)
+    reference_delta = MessageDeltaService(reference_sessions)
+    collector.max_messages_per_client = rng.randint(1, 12)
+    collector.max_rolls_per_client = rng.randint(1, 8)
+    reference = ReferenceStore(collector.max_messages_per_client, collector.max_rolls_per_client)
+    session_ids = ['session-a', 'session-b', 'session-c']
+    
+    for step in range(rng.randint(1, 100)):
+        context = f"trial {trial} step {step}"
+        action = rng.random()
+        
+        if action < 0.5:
+            is_roll = rng.random() < 0.35
+            item = {'type': 'roll' if is_roll else rng.choice(['chat', 'chat', 'combat_context']),
+                    'content': f"item {step}", 'timestamp': random_timestamp(rng)}
+            if is_roll:
+                item.update(formula='1d20', total=rng.randint(1, 20))
+                stored = collector.add_roll('client', item)
+            else:
+                if item['type'] == 'combat_context':
+                    item['combat_context'] = {'in_combat': True}
+                stored = collector.add_message('client', item)
+            # Items failing validation are not stored
+            if stored:
+                reference.add(item, normalize_timestamp_ms(item['timestamp']), KIND_ROLL if is_roll else KIND_MESSAGE)
+        
+        elif action < 0.6:
+            # An AI turn finished: set (or drop) a session's watermark in both managers
+            session_id = rng.choice(session_ids)
+            watermark = rng.choice([None, BASE_MS + rng.randint(0, 30) * 1000])
+            for manager in (sessions, reference_sessions):
+                if watermark is None:
+                    manager.timestamps.pop(session_id, None)
+                else:
+                    manager.timestamps[session_id] = watermark
+        
+        else:
+            session_id = rng.choice(session_ids + [None])
+            count = rng.randint(1, 20)
+            actual = collector.get_combined_messages('client', count, session_id)
+            expected = reference.items()
+            if session_id is not None and expected:
+                expected = reference_delta.apply_message_delta(session_id, expected)
+            assert same_items(actual, expected[-count:]), f"get_combined_messages({count}, {session_id}) differs ({context})"
+            assert sessions.timestamps == reference_sessions.timestamps, f"saved watermarks differ ({context})"
+
+TEXTS = [
+    "Longsword attack against the goblin chieftain",
+    "Longsword attack against the goblin chieftain!",
+    "longsword attack against the goblin",
+    "Martial Melee Weapon",
+    "Fireball: each creature in a 20-foot radius makes a Dexterity save",
+    "each creature in a 20-foot radius makes a Dexterity save",
+    "Damage: 1d8 + 3 slashing on a hit",
+    "Damage: 1d8 + 3 slashing on a hit against target Goblin 4",
+    "short",
+]
+
+def random_value(rng):
+    """Field value shaped like compact card fields"""
+    kind = rng.random()
+    if kind < 0.55:
+        return rng.choice(TEXTS)
+    if kind < 0.7:
+        return rng.randint(0, 5)
+    if kind < 0.75:
+        return rng.choice([True, False, None, 1.5])
+    if kind < 0.9:
+        return [rng.choice(TEXTS) for _ in range(rng.randint(0, 2))]
+    return {'label': rng.choice(TEXTS), 'value': rng.randint(0, 3)}
+
+def random_cards(rng):
+    """A window of compact cards, some without fields"""
+    cards = []
+    for index in range(rng.randint(0, 12)):
+        if rng.random() < 0.1:
+            cards.append({'t': 'cm', 'c': f"message {index}"})
+            continue
+        codes = rng.sample(['n', 'nm', 'dsc', 'desc', 'dmg', 'd', 'sub', 'subtitle', 'lbl', 'tx'], rng.randint(1, 6))
+        cards.append({'t': 'cc', 'ct': rng.choice(['weapon', 'spell']), 'f': {code: random_value(rng) for code in codes}})
+    return cards
+
+def check_translator(rng, trial, translator):
+    """Post-processing steps against the previous implementations"""
+    cards = random_cards(rng)
+    original = copy.deepcopy(cards)
+    
+    assert translator.detect_and_abbreviate_duplicates(cards) == legacy_abbreviate_duplicates(translator, cards), \
+        f"detect_and_abbreviate_duplicates differs (trial {trial})"
+    assert translator.detect_and_remove_redundancy(cards) == legacy_remove_redundancy(translator, cards), \
+        f"detect_and_remove_redundancy differs (trial {trial})"
+    assert cards == original, f"input cards were modified (trial {trial})"
+
+def main():
+    translator = ChatCardTranslator()
+    checks = [
+        ('client item store', check_item_store),
+        ('collector delta reads', check_collector_delta),
+        ('translator post-processing', lambda rng, trial: check_translator(rng, trial, translator)),
+    ]
+    
+    print(f"Randomized consistency check ({TRIALS} trials per check, seed {SEED})")
+    for name, check in checks:
+        rng = random.Random(SEED)
+        for trial in range(TRIALS):
+            try:
+                check(rng, trial)
+            except AssertionError as e:
+                print(f"FAIL {name}: {e} (seed {SEED})")
+                return 1
+        print(f"OK   {name}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -25,6 +25,7 @@ class GoldBoxWebSocketClient {
     this.pingInterval = null;
     this.messageHandlers = new Map();
     this.pendingRequests = new Map(); // request_id -> Promise resolver
+    this.batchPending = new Set(); // batched request_ids whose handler has not sent a response yet
   }
 
   /**
@@ -264,6 +265,11 @@ class GoldBoxWebSocketClient {
           this.handleChatResponse(message);
           break;
 
+        case 'chat_response_chunk':
+          // Partial AI text while streaming - forward to main handler for live preview
+          this.onMessage?.(message);
+          break;
+
         case 'ai_turn_complete':
           // AI turn completed - forward to main message handler
           console.log('WebSocket: Received ai_turn_complete message, forwarding to main handler');
@@ -311,6 +317,11 @@ class GoldBoxWebSocketClient {
           // Game delta processed by backend, no action needed
           break;
 
+        case 'batch_request':
+          // Several backend requests in one frame - each answered on its own, failures in one batch_result
+          this.handleBatchRequest(message);
+          break;
+
         default:
           // No handler found for this message type
           console.warn('Unknown message type:', message.type);
@@ -321,6 +332,62 @@ class GoldBoxWebSocketClient {
     }
   }
 
+  /**
+   * Handle batch request message
+   * Runs all requests concurrently; each response frame is sent as soon as its
+   * handler produces it, like the standalone frame it replaces. Requests that
+   * failed or are still unanswered are reported in one batch_result frame
+   */
+  async handleBatchRequest(message) {
+    const requests = message.data?.requests || [];
+    const outcomes = await Promise.all(requests.map(item => this.handleBatchItem(item)));
+    const results = outcomes.filter(result => result !== null);
+    if (results.length === 0) {
+      return;
+    }
+
+    try {
+      await this.send({
+        type: 'batch_result',
+        request_id: message.request_id,
+        data: { results }
+      });
+    } catch (error) {
+      console.error('Error sending batch_result:', error);
+    }
+  }
+
+  /**
+   * Run one batched request through its registered handler
+   * Returns the batch_result entry for the request, or null when the handler
+   * already sent its response frame
+   */
+  async handleBatchItem(item) {
+    const handler = this.messageHandlers.get(item.type);
+    if (!handler) {
+      return { request_id: item.request_id, success: false, error: `Unknown request type: ${item.type}` };
+    }
+
+    // Cleared by send() once the handler's response frame goes out
+    this.batchPending.add(item.request_id);
+    try {
+      await handler({ type: item.type, request_id: item.request_id, data: item.data });
+      if (!this.batchPending.has(item.request_id)) {
+        return null;
+      }
+      // Handler answers asynchronously - its response is sent on its own
+      return { request_id: item.request_id, success: true, deferred: true };
+    } catch (error) {
+      console.error(`Error handling batched ${item.type} request:`, error);
+      if (!this.batchPending.has(item.request_id)) {
+        return null;
+      }
+      return { request_id: item.request_id, success: false, error: error.message };
+    } finally {
+      this.batchPending.delete(item.request_id);
+    }
+  }
+
   /**
    * Handle chat response message
    */
@@ -673,6 +740,8 @@ class GoldBoxWebSocketClient {
         }
 
         this.ws.send(JSON.stringify(message));
+        // Response to a batched request went out - no batch_result entry needed for it
+        this.batchPending.delete(requestId);
         
         // For non-chat messages, resolve immediately
         if (message.type !== 'chat_request') {
@@ -203,8 +203,8 @@ class WebSocketCommunicator {
         try {
           // Check if WorldStateCollector is available
           if (this.worldStateCollector && typeof this.worldStateCollector.sendWorldState === 'function') {
-            // Send current world state
-            await this.worldStateCollector.sendWorldState();
+            // Send current world state, echoing request_id so the backend can stop waiting
+            await this.worldStateCollector.sendWorldState(message.request_id);
             console.log('WebSocketCommunicator: World state transmitted in response to refresh request');
           } else {
             console.warn('WebSocketCommunicator: WorldStateCollector not available or sendWorldState not found');
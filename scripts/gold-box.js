@@ -634,6 +634,7 @@ class GoldBoxModule {
       // Only add if we have HTML content
       if (fullHtml) {
         messages.push({
+          ...(messageId && { id: messageId }),  // Foundry message ID, lets the backend skip messages it already has
           content: fullHtml,  // Send complete HTML, not extracted content
           timestamp: timestamp,
           sender: sender,  // Add sender for better backend processing
@@ -678,10 +679,18 @@ class GoldBoxModule {
       console.log('The Gold Box: Received WebSocket message:', message);
       
       switch (message.type) {
+        case 'chat_response_chunk':
+          // Streaming preview of partial AI text - replaced by the final chat_response
+          if (message.data) {
+            this.uiManager.updateStreamingPreview(message.data);
+          }
+          break;
+          
         case 'chat_response':
           // Handle AI response from WebSocket - NEW: support structured message data
           // NOTE: Do NOT reset button here - wait for ai_turn_complete message
           console.log('The Gold Box: Received chat_response (not resetting button yet)');
+          this.uiManager.hideStreamingPreview();
           
           if (message.data && message.data.message) {
             const msgData = message.data.message;
@@ -723,6 +732,7 @@ class GoldBoxModule {
           
           // Use unified cleanup handler for turn completion
           // This is the ONLY place where we reset the button state
+          this.uiManager.hideStreamingPreview();
           this.api.handleTurnCompletion();
           console.log('The Gold Box: Turn completion handled via WebSocket ai_turn_complete message');
           
@@ -749,6 +759,7 @@ class GoldBoxModule {
           
         case 'error':
           // Reset button state on error as well
+          this.uiManager.hideStreamingPreview();
           this.uiManager.aiTurnButtonHandler.onAITurnError(message.data);
           console.log('The Gold Box: Reset button state after WebSocket error received');
           
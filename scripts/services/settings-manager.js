@@ -38,6 +38,8 @@ class SettingsManager {
     this.registerAIRole();
     this.registerPlayerList();
     this.registerDisableFunctionCalling();
+    this.registerStreamResponses();
+    this.registerPromptCaching();
     this.registerGeneralLLMSettings();
     this.registerTacticalLLMSettings();
     this.registerSettingsConfigHooks();
@@ -163,6 +165,36 @@ class SettingsManager {
     });
   }
 
+  /**
+   * Register Stream Responses setting
+   */
+  registerStreamResponses() {
+    game.settings.register(this.moduleName, 'streamResponses', {
+      name: "Stream AI Responses",
+      hint: "Show the AI's response as it is being generated instead of waiting for the full reply. Recommended for slow or local models. Default: unchecked.",
+      scope: "world",
+      config: true,
+      type: Boolean,
+      default: false,
+      group: "general"
+    });
+  }
+
+  /**
+   * Register Prompt Caching setting
+   */
+  registerPromptCaching() {
+    game.settings.register(this.moduleName, 'promptCaching', {
+      name: "Prompt Caching",
+      hint: "Order AI requests so the provider can reuse the unchanged start of the prompt between turns and tool calls, reducing cost and latency on providers that support prompt caching. Default: unchecked.",
+      scope: "world",
+      config: true,
+      type: Boolean,
+      default: false,
+      group: "general"
+    });
+  }
+
   /**
    * Register General LLM Provider settings
    */
@@ -391,6 +423,8 @@ class SettingsManager {
         'ai role': this.getSetting('aiRole', 'dm'),
         'player list': this.getSetting('playerList', ''),
         'disable function calling': this.getSetting('disableFunctionCalling', false),
+        'stream responses': this.getSetting('streamResponses', false),
+        'prompt caching': this.getSetting('promptCaching', false),
         'general llm provider': this.getSetting('generalLlmProvider', ''),
         'general llm base url': this.getSetting('generalLlmBaseUrl', ''),
         'general llm model': this.getSetting('generalLlmModel', ''),
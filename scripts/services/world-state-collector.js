@@ -779,8 +779,9 @@ class WorldStateCollector {
     
     /**
      * Send world state to backend via WebSocket
+     * @param {string|null} requestId - request_id of the world_state_refresh being answered, if any
      */
-    async sendWorldState() {
+    async sendWorldState(requestId = null) {
         try {
             const worldState = this.getFullWorldState();
             
@@ -803,6 +804,10 @@ class WorldStateCollector {
                 data: worldState,
                 timestamp: Date.now()
             };
+            if (requestId) {
+                // Answer to a world_state_refresh request
+                message.request_id = requestId;
+            }
             
             await wsCommunicator.webSocketClient.send(message);
             console.log('World state sent to backend');
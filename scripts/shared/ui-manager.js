@@ -809,6 +809,60 @@ class GoldBoxUIManager {
     }
   }
 
+  /**
+   * Update streaming preview with a chat_response_chunk from the backend
+   * @param {Object} chunk - Chunk data (stream_id, index, delta, done)
+   */
+  updateStreamingPreview(chunk) {
+    let preview = document.querySelector('.gold-box-streaming');
+    
+    // New stream (next AI iteration) - start with an empty preview
+    if (preview && preview.dataset.streamId !== chunk.stream_id) {
+      preview.remove();
+      preview = null;
+    }
+    
+    if (!preview) {
+      if (!chunk.delta) {
+        return;
+      }
+      preview = document.createElement('div');
+      preview.className = 'gold-box-streaming';
+      preview.dataset.streamId = chunk.stream_id;
+      preview.style.cssText = `
+        position: fixed;
+        bottom: 20px;
+        right: 320px;
+        max-width: 400px;
+        max-height: 300px;
+        overflow-y: auto;
+        background: rgba(0, 0, 0, 0.8);
+        color: white;
+        padding: 12px;
+        border-radius: 8px;
+        z-index: 1000;
+        white-space: pre-wrap;
+        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);
+      `;
+      document.body.appendChild(preview);
+    }
+    
+    if (chunk.delta) {
+      preview.textContent += chunk.delta;
+      preview.scrollTop = preview.scrollHeight;
+    }
+  }
+
+  /**
+   * Hide streaming preview
+   */
+  hideStreamingPreview() {
+    const preview = document.querySelector('.gold-box-streaming');
+    if (preview) {
+      preview.remove();
+    }
+  }
+
   /**
    * Show error notification to user
    */
@@ -833,6 +887,7 @@ class GoldBoxUIManager {
   tearDown() {
     // Remove processing indicator
     this.hideProcessingIndicator();
+    this.hideStreamingPreview();
     
     // Remove chat button
     $('#gold-box-ai-turn-btn').remove();